@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""Benchmark single-text requests in an async service: predict_text per request vs. AsyncBatcher.
+
+Requests arrive at a fixed rate, as in a web service, and their latency is measured
+from their arrival, so time spent waiting for a blocked event loop is included.
+`--duplicates` is the share of requests repeating one of a few popular texts.
+The event loop stall is the longest delay of a 1 ms heartbeat, i.e. how long
+other work in the service (health checks, I/O) could be held up.
+
+Example calls:
+python benchmarks/bench_async_batcher.py
+python benchmarks/bench_async_batcher.py --rate 20000 --requests 50000 --max-wait 0.002
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from tempfile import NamedTemporaryFile
+
+from bench_predict_proba import train_model
+
+from module_classifier.classification import AsyncBatcher, ModuleClassifier
+
+
+async def serve(predict, texts, rate):
+    """Send the texts at a fixed rate; return the latencies and the longest loop stall."""
+    loop = asyncio.get_running_loop()
+    latencies = []
+    stall = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal stall
+        while not done:
+            start = loop.time()
+            await asyncio.sleep(0.001)
+            stall = max(stall, loop.time() - start - 0.001)
+
+    async def handle(text, arrival):
+        await predict(text)
+        latencies.append(loop.time() - arrival)
+
+    beat = loop.create_task(heartbeat())
+    start = loop.time()
+    requests = []
+    for i, text in enumerate(texts):
+        arrival = start + i / rate
+        delay = arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        requests.append(loop.create_task(handle(text, arrival)))
+    await asyncio.gather(*requests)
+    done = True
+    await beat
+    return sorted(latencies), stall
+
+
+async def direct(classifier, texts, args):
+    async def predict(text):
+        # blocks the event loop
+        return classifier.predict_text(text, k=3)
+
+    return await serve(predict, texts, args.rate), None
+
+
+async def batched(classifier, texts, args):
+    async with AsyncBatcher(classifier, args.max_batch_size, args.max_wait) as batcher:
+        result = await serve(lambda text: batcher.predict(text, k=3), texts, args.rate)
+    return result, batcher.stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark AsyncBatcher.")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=5000, help="Requests/s.")
+    parser.add_argument("--duplicates", type=float, default=0.2)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait", type=float, default=0.005)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        words = train_model(model_file.name)
+        classifier = ModuleClassifier(model_file.name)
+
+    rng = random.Random(1)
+    popular = [" ".join(rng.choices(words, k=50)) for _ in range(10)]
+    texts = [
+        (
+            rng.choice(popular)
+            if rng.random() < args.duplicates
+            else " ".join(rng.choices(words, k=50))
+        )
+        for _ in range(args.requests)
+    ]
+    print(f"{len(texts)} requests at {args.rate:.0f}/s")
+
+    for name, run in [("predict_text", direct), ("AsyncBatcher", batched)]:
+        (latencies, stall), stats = asyncio.run(run(classifier, texts, args))
+        print(
+            f"{name:<14}{latencies[len(latencies) // 2] * 1e3:8.2f} ms p50"
+            f"{latencies[int(len(latencies) * 0.99)] * 1e3:8.2f} ms p99"
+            f"{stall * 1e3:8.2f} ms max loop stall"
+        )
+        if stats is not None:
+            print(
+                f"{'':<14}{stats.batches} batches, mean size {stats.mean_batch_size:.1f},"
+                f" {stats.coalesced} coalesced"
+            )
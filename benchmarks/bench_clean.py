@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+"""Throughput benchmark for text cleaning.
+
+Compares the single-pass `Normalizer` against the original multi-pass
+implementation, and checks that both produce identical output.
+
+Example call:
+python benchmarks/bench_clean.py -i archive.csv --repeat 3
+"""
+
+import argparse
+import csv
+import os
+import random
+import string
+import sys
+import time
+from typing import Callable, List
+
+from module_classifier.preprocessing import clean, clean_many
+from module_classifier.preprocessing.settings import (
+    MIN_TOKEN_LENGTH,
+    PUNCTUATION_CHARACTERS,
+)
+
+
+def legacy_clean(s: str) -> str:
+    for c in PUNCTUATION_CHARACTERS:
+        s = s.replace(c, " ")
+    for n in "0123456789":
+        s = s.replace(n, "0")
+    return " ".join(
+        (
+            token
+            for token in s.strip().replace(os.linesep, " ").lower().split()
+            if len(token) >= MIN_TOKEN_LENGTH
+        )
+    )
+
+
+def synthetic_corpus(n: int, length: int, seed: int = 0) -> List[str]:
+    """Generate word-like texts; every other text contains typographic quotes."""
+    rng = random.Random(seed)
+    vocabulary = (
+        [
+            "".join(rng.choices(string.ascii_letters, k=rng.randint(1, 12)))
+            for _ in range(10000)
+        ]
+        + list(string.punctuation)
+        + ["2021", "3.5%", "–", "“quoted”"]
+    )
+    corpus = []
+    for i in range(n):
+        text = " ".join(rng.choices(vocabulary, k=length // 6))
+        corpus.append(text if i % 2 else text.replace("–", "-").replace("“quoted”", ""))
+    return corpus
+
+
+def csv_corpus(f) -> List[str]:
+    return [value for row in csv.reader(f) for value in row]
+
+
+def measure(name: str, func: Callable[[List[str]], List[str]], corpus, repeat: int):
+    n_chars: int = sum(len(text) for text in corpus)
+    best: float = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(corpus)
+        best = min(best, time.perf_counter() - start)
+    print(
+        f"{name:<12}{best:10.4f}s{len(corpus) / best:14.0f} texts/s"
+        f"{n_chars / best / 1e6:10.1f} MB/s"
+    )
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark text cleaning.")
+    parser.add_argument(
+        "--input",
+        "-i",
+        type=argparse.FileType("r"),
+        help="A CSV file to read texts from. If not given, generate random texts.",
+    )
+    parser.add_argument("--n", type=int, default=20000, help="Number of texts.")
+    parser.add_argument("--length", type=int, default=1000, help="Text length.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="If given, also measure cleaning with a token budget.",
+    )
+    args = parser.parse_args()
+
+    if args.input:
+        csv.field_size_limit(sys.maxsize)
+        corpus = csv_corpus(args.input)
+    else:
+        corpus = synthetic_corpus(args.n, args.length)
+
+    expected = [legacy_clean(text) for text in corpus]
+    if clean_many(corpus) != expected or [clean(t) for t in corpus] != expected:
+        raise AssertionError("Output differs from the legacy implementation.")
+
+    legacy = measure(
+        "legacy", lambda c: [legacy_clean(t) for t in c], corpus, args.repeat
+    )
+    single = measure("clean", lambda c: [clean(t) for t in c], corpus, args.repeat)
+    batch = measure("clean_many", clean_many, corpus, args.repeat)
+    print(f"Speedup: clean {legacy / single:.2f}x, clean_many {legacy / batch:.2f}x")
+
+    if args.max_tokens is not None:
+        budget = measure(
+            "max_tokens",
+            lambda c: clean_many(c, max_tokens=args.max_tokens),
+            corpus,
+            args.repeat,
+        )
+        print(f"Speedup with token budget: {batch / budget:.2f}x")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""Benchmark scoring rows with both classifiers: separate classifiers vs. CombinedClassifier.
+
+Rows hold all text fields of both classifiers, with publication names drawn from a
+small set, as in the archive.
+
+Example calls:
+python benchmarks/bench_combined_classifier.py
+python benchmarks/bench_combined_classifier.py --rows 100000
+"""
+
+import argparse
+import random
+import time
+from tempfile import NamedTemporaryFile
+
+from bench_predict_binary import train_model as train_binary_model
+from bench_predict_proba import train_model
+
+from module_classifier.classification import CombinedClassifier, ModuleClassifier
+from module_classifier.classification.binary_classifier import MainEditionClassifier
+from module_classifier.preprocessing.settings import (
+    MAIN_EDITION_TEXT_FIELDS,
+    TEXT_FIELDS,
+)
+
+FIELD_WORDS = {
+    "item_title": 10,
+    "authors": 3,
+    "publication_name": 3,
+    "abstract_description": 120,
+    "excerpts_ts": 60,
+    "yt_description": 0,
+    "excerpt_ts": 60,
+}
+
+
+def separate_lines(combined: CombinedClassifier, rows):
+    return [
+        combined.module_classifier.fasttext_line(row, combined.text_fields)
+        for row in rows
+    ], [
+        combined.main_edition_classifier.fasttext_line(
+            row, combined.main_edition_text_fields
+        )
+        for row in rows
+    ]
+
+
+def combined_lines(combined: CombinedClassifier, rows):
+    return combined.fasttext_lines(
+        {field: [row[field] for row in rows] for field in combined.fields}
+    )
+
+
+def separate(combined: CombinedClassifier, rows):
+    modules = combined.module_classifier.predict_rows(rows, 3, combined.text_fields)
+    main_editions = combined.main_edition_classifier.predict_rows(
+        rows, 1, combined.main_edition_text_fields
+    )
+    return modules, main_editions
+
+
+def combined_rows(combined: CombinedClassifier, rows):
+    return combined.predict_rows(rows, 3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the combined classifier.")
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as module_file, NamedTemporaryFile(
+        suffix=".bin"
+    ) as main_edition_file:
+        words = train_model(module_file.name)
+        train_binary_model(main_edition_file.name)
+        combined = CombinedClassifier(
+            ModuleClassifier(module_file.name),
+            MainEditionClassifier(main_edition_file.name),
+        )
+
+    rng = random.Random(1)
+    vocabulary = words + [w.capitalize() + "," for w in words[:500]] + ["–", "&"]
+    publications = [" ".join(rng.choices(vocabulary, k=3)) for _ in range(200)]
+
+    def value(field: str) -> str:
+        if field == "publication_name":
+            return rng.choice(publications)
+        return " ".join(rng.choices(vocabulary, k=FIELD_WORDS[field]))
+
+    rows = [
+        {field: value(field) for field in (*TEXT_FIELDS, *MAIN_EDITION_TEXT_FIELDS)}
+        for _ in range(args.rows)
+    ]
+    print(f"{len(rows)} rows")
+
+    assert separate_lines(combined, rows[:100]) == combined_lines(combined, rows[:100])
+    for name, run in [
+        ("separate lines", separate_lines),
+        ("combined lines", combined_lines),
+        ("separate", separate),
+        ("combined", combined_rows),
+    ]:
+        start = time.perf_counter()
+        run(combined, rows)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16}{elapsed:8.2f}s{len(rows) / elapsed:10.0f} rows/s")
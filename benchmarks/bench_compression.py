@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""Benchmark reading and writing compressed CSV files against the uncompressed path.
+
+Example call:
+python benchmarks/bench_compression.py --size-mb 500
+"""
+
+import argparse
+import os
+import shutil
+import time
+from tempfile import TemporaryDirectory
+
+from bench_csv_reader import generate_archive
+from module_classifier.preprocessing.compression import open_file
+from module_classifier.preprocessing.reader import CSVReader
+from module_classifier.preprocessing.settings import CLASS_FIELD, TEXT_FIELDS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compressed CSV I/O.")
+    parser.add_argument(
+        "--size-mb", type=int, default=100, help="Uncompressed archive size."
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=["", ".gz", ".bz2", ".xz"], metavar="EXT"
+    )
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmpdir:
+        plain = os.path.join(tmpdir, "archive.csv")
+        with open(plain, "w", newline="") as f:
+            generate_archive(f, args.size_mb)
+        size = os.path.getsize(plain)
+
+        for extension in args.formats:
+            path = plain + extension
+
+            start = time.perf_counter()
+            if extension:
+                with open(plain, newline="") as source, open_file(
+                    path, "w", newline=""
+                ) as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open_file(path, newline="") as f:
+                n = sum(1 for _ in CSVReader(f, ["id", *TEXT_FIELDS, CLASS_FIELD]))
+            read_time = time.perf_counter() - start
+
+            print(
+                f"{extension or 'plain':<6}{os.path.getsize(path) / 1e6:10.1f} MB on disk"
+                f"{n:10d} rows  read {size / read_time / 1e6:7.1f} MB/s"
+                + (f"  write {size / write_time / 1e6:7.1f} MB/s" if extension else "")
+            )
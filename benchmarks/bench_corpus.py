@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+"""Benchmark writing FastText training files from an archive CSV export and from a cached corpus.
+
+Example calls:
+python benchmarks/bench_corpus.py -i archive.csv
+python benchmarks/bench_corpus.py --size-mb 1000
+"""
+
+import argparse
+import os
+import shutil
+from functools import partial
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+
+from bench_csv_reader import generate_archive, measure
+
+from module_classifier.preprocessing.corpus import Corpus
+from module_classifier.preprocessing.settings import CLASS_FIELD, TEXT_FIELDS
+from module_classifier.training.module_trainer import ModuleTrainer
+
+
+def write_training_file(path: str, corpus: bool) -> range:
+    with NamedTemporaryFile("w+") as target_file:
+        ModuleTrainer()._write_training_file(
+            path, target_file, TEXT_FIELDS, CLASS_FIELD, corpus=corpus
+        )
+        target_file.seek(0)
+        return range(sum(1 for _ in target_file))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cached corpus.")
+    parser.add_argument("--input", "-i", type=str, help="An archive CSV file.")
+    parser.add_argument(
+        "--size-mb",
+        type=int,
+        default=200,
+        help="Size of the generated archive if no input file is given.",
+    )
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "archive.csv")
+        if args.input:
+            shutil.copy(args.input, path)
+        else:
+            with open(path, "w", newline="") as f:
+                generate_archive(f, args.size_mb)
+        size = os.path.getsize(path)
+        print(f"Writing FastText lines from {size / 1e6:.0f} MB.")
+
+        measure("CSV", partial(write_training_file, path, False), size, False)
+        measure("corpus (build)", partial(write_training_file, path, True), size, False)
+        measure(
+            "corpus (cached)", partial(write_training_file, path, True), size, False
+        )
+
+        corpus = Corpus.load(path + ".corpus")
+        print(f"{len(corpus)} rows, {len(corpus.vocabulary)} distinct tokens.")
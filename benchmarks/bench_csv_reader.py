@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+"""Benchmark reading an archive CSV export with csv.DictReader vs. CSVReader.
+
+Example calls:
+python benchmarks/bench_csv_reader.py -i archive.csv
+python benchmarks/bench_csv_reader.py --size-mb 4000  # generate a multi-GB archive
+"""
+
+import argparse
+import csv
+import os
+import random
+import string
+import time
+import tracemalloc
+from tempfile import NamedTemporaryFile
+from typing import Callable, Iterable
+
+from module_classifier.preprocessing.reader import CSVReader, set_field_size_limit
+from module_classifier.preprocessing.settings import CLASS_FIELD, TEXT_FIELDS
+
+ARCHIVE_FIELDS = [
+    "id",
+    "content_type",
+    "authors",
+    "publication_name",
+    "external_url",
+    "language",
+    "item_title",
+    CLASS_FIELD,
+    "item_status",
+    "paywall",
+    "abstract_description",
+    "excerpts_ts",
+    "yt_description",
+]
+
+
+def generate_archive(f, size_mb: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(20000)
+    ]
+
+    def text(n: int) -> str:
+        return " ".join(rng.choices(words, k=n))
+
+    writer = csv.writer(f)
+    writer.writerow(ARCHIVE_FIELDS)
+    i = 0
+    while f.tell() < size_mb * 1024 * 1024:
+        i += 1
+        writer.writerow(
+            [
+                i,
+                "JOURNALISM",
+                text(2),
+                text(2),
+                f"https://example.com/{i}",
+                "ENGLISH",
+                text(8),
+                f"S{rng.randint(1, 6)}_M{rng.randint(1, 10)}",
+                "DISTRIBUTION",
+                "False",
+                text(100),
+                text(300) + "\n" + text(100),
+                text(50),
+            ]
+        )
+    f.flush()
+
+
+def measure(name: str, rows: Callable[[], Iterable], size: int, memory: bool):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    n = sum(1 for _ in rows())
+    elapsed = time.perf_counter() - start
+    peak = ""
+    if memory:
+        peak = f"{tracemalloc.get_traced_memory()[1] / 1e6:10.1f} MB peak"
+        tracemalloc.stop()
+    print(
+        f"{name:<24}{n:10d} rows{elapsed:9.2f}s{size / elapsed / 1e6:9.1f} MB/s {peak}"
+    )
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CSV reading.")
+    parser.add_argument("--input", "-i", type=str, help="An archive CSV file.")
+    parser.add_argument(
+        "--size-mb",
+        type=int,
+        default=200,
+        help="Size of the generated archive if no input file is given.",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Measure peak memory of materializing all rows (slow).",
+    )
+    args = parser.parse_args()
+
+    set_field_size_limit()
+    columns = ["id", *TEXT_FIELDS, CLASS_FIELD]
+
+    with NamedTemporaryFile("w", suffix=".csv", newline="") as tmp:
+        if args.input:
+            path = args.input
+        else:
+            generate_archive(tmp, args.size_mb)
+            path = tmp.name
+        size = os.path.getsize(path)
+        print(f"Reading {size / 1e6:.0f} MB from '{path}'.")
+
+        def dict_reader():
+            with open(path, newline="") as f:
+                yield from csv.DictReader(f)
+
+        def csv_reader(columns=None):
+            with open(path, newline="") as f:
+                yield from CSVReader(f, columns)
+
+        for name, rows in [
+            ("csv.DictReader", dict_reader),
+            ("CSVReader (all)", csv_reader),
+            ("CSVReader (projected)", lambda: csv_reader(columns)),
+        ]:
+            measure(name, rows, size, memory=False)
+            if args.memory:
+                measure(name, lambda: list(rows()), size, memory=True)
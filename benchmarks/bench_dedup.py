@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""Benchmark near-duplicate detection and the training time it saves.
+
+Generates an archive in which a fraction of the items are re-posted with small
+edits, writes FastText training files with and without deduplication, and trains
+a model on each.
+
+Example calls:
+python benchmarks/bench_dedup.py
+python benchmarks/bench_dedup.py --size-mb 200 --duplicates 0.3 --epoch 5
+"""
+
+import argparse
+import csv
+import os
+import random
+import time
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+
+import fasttext
+from bench_csv_reader import generate_archive
+
+from module_classifier.preprocessing.reader import set_field_size_limit
+from module_classifier.preprocessing.settings import CLASS_FIELD, TEXT_FIELDS
+from module_classifier.training.module_trainer import ModuleTrainer
+from module_classifier.training.settings import TRAINING_PARAMS
+
+
+def add_duplicates(source: str, target: str, fraction: float, seed: int = 0):
+    """Copy an archive, re-posting a fraction of its items with one edited token per field."""
+    rng = random.Random(seed)
+    with open(source, newline="") as f, open(target, "w", newline="") as out:
+        reader = csv.DictReader(f)
+        writer = csv.DictWriter(out, reader.fieldnames)
+        writer.writeheader()
+        for row in reader:
+            writer.writerow(row)
+            if rng.random() < fraction:
+                edited = dict(row, id=f"{row['id']}-dup")
+                for field in TEXT_FIELDS:
+                    tokens = edited[field].split()
+                    if len(tokens) > 3:
+                        tokens[rng.randrange(len(tokens))] = "edited"
+                    edited[field] = " ".join(tokens)
+                writer.writerow(edited)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate removal.")
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument(
+        "--duplicates",
+        type=float,
+        default=0.2,
+        help="Fraction of items that are re-posted with small edits.",
+    )
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--epoch", type=int, default=TRAINING_PARAMS["epoch"])
+    args = parser.parse_args()
+
+    set_field_size_limit()
+    training_params = dict(TRAINING_PARAMS, epoch=args.epoch, thread=1, verbose=0)
+
+    with TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, "source.csv")
+        path = os.path.join(tmpdir, "archive.csv")
+        with open(source, "w", newline="") as f:
+            generate_archive(f, args.size_mb)
+        add_duplicates(source, path, args.duplicates)
+        print(f"Archive of {os.path.getsize(path) / 1e6:.0f} MB.")
+
+        for deduplicate in (False, True):
+            with NamedTemporaryFile("w+") as target_file:
+                start = time.perf_counter()
+                ModuleTrainer()._write_training_file(
+                    path,
+                    target_file,
+                    TEXT_FIELDS,
+                    CLASS_FIELD,
+                    processes=args.processes,
+                    deduplicate=deduplicate,
+                )
+                preprocessing = time.perf_counter() - start
+                target_file.seek(0)
+                lines = sum(1 for _ in target_file)
+
+                start = time.perf_counter()
+                fasttext.train_supervised(target_file.name, **training_params)
+                training = time.perf_counter() - start
+
+            name = "deduplicated" if deduplicate else "all items"
+            print(
+                f"{name:<14}{lines:8d} lines  preprocessing {preprocessing:7.2f}s  training {training:7.2f}s"
+            )
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+"""Benchmark the import time of the package, as reported by `python -X importtime`.
+
+Prints the median cumulative import time of each module over several fresh
+interpreters, and the slowest modules imported along with it. With --budget, exits
+with an error if a median exceeds the budget, e.g. to catch an eager import of
+LIME (> 1s) on a dedicated machine.
+
+Example calls:
+python benchmarks/bench_import_time.py
+python benchmarks/bench_import_time.py module_classifier.explanation --runs 10 --top 20
+python benchmarks/bench_import_time.py --budget 0.6
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """The cumulative import time per module in microseconds."""
+    stderr: str = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark import times.")
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=["module_classifier.classification", "module_classifier.explanation"],
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--budget", type=float, help="The maximum median import time in seconds."
+    )
+    args = parser.parse_args()
+
+    over_budget: List[str] = []
+    for module in args.modules:
+        runs: List[Dict[str, int]] = [import_times(module) for _ in range(args.runs)]
+        median: float = statistics.median(run[module] for run in runs)
+        print(f"{module:<40}{median / 1e3:8.1f} ms")
+        slowest = sorted(runs[-1].items(), key=lambda item: -item[1])[1 : args.top + 1]
+        for name, time in slowest:
+            print(f"    {name:<50}{time / 1e3:8.1f} ms")
+        if args.budget is not None and median / 1e6 > args.budget:
+            over_budget.append(module)
+
+    if over_budget:
+        sys.exit(f"Import time over the budget of {args.budget}s: {over_budget}")
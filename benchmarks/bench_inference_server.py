@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+"""Benchmark the inference server: requests/s and latency against the number of workers.
+
+Each client process sends requests one after another over a keep-alive connection
+for a fixed duration. Clients run on the same machine, so they compete with the
+workers for CPUs.
+
+Example calls:
+python benchmarks/bench_inference_server.py
+python benchmarks/bench_inference_server.py --workers 1 2 4 8 --clients 16 --texts 10
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import time
+from tempfile import NamedTemporaryFile
+
+from bench_predict_proba import train_model
+
+from module_classifier.classification import ModuleClassifier
+from module_classifier.serving import InferenceServer
+
+
+def run_client(address, bodies, duration):
+    connection = http.client.HTTPConnection(*address)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        connection.request("POST", "/predict/module", bodies[i % len(bodies)])
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 200, response.status
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    connection.close()
+    return latencies
+
+
+def wait_until_ready(address):
+    while True:
+        try:
+            connection = http.client.HTTPConnection(*address)
+            connection.request("GET", "/health/ready")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.05)
+        finally:
+            connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the inference server.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--texts", type=int, default=1, help="Texts per request.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds.")
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        words = train_model(model_file.name)
+        classifier = ModuleClassifier(model_file.name)
+
+    rng = random.Random(1)
+    bodies = [
+        json.dumps(
+            {
+                "texts": [
+                    " ".join(rng.choices(words, k=50)) for _ in range(args.texts)
+                ],
+                "k": 3,
+            }
+        ).encode()
+        for _ in range(100)
+    ]
+    print(
+        f"{multiprocessing.cpu_count()} CPU(s), {args.clients} clients,"
+        f" {args.texts} text(s) per request"
+    )
+
+    context = multiprocessing.get_context("fork")
+    for workers in args.workers:
+        server = InferenceServer(classifier, port=0, workers=workers)
+        address = server.address
+        process = context.Process(target=server.serve_forever)
+        process.start()
+        server.socket.close()
+        wait_until_ready(address)
+
+        with context.Pool(args.clients) as pool:
+            results = pool.starmap(
+                run_client, [(address, bodies, args.duration)] * args.clients
+            )
+        process.terminate()
+        process.join()
+
+        latencies = sorted(latency for result in results for latency in result)
+        print(
+            f"{workers} worker(s){len(latencies) / args.duration:10.0f} requests/s"
+            f"{latencies[len(latencies) // 2] * 1e3:8.2f} ms p50"
+            f"{latencies[int(len(latencies) * 0.99)] * 1e3:8.2f} ms p99"
+        )
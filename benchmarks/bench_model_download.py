@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+"""Benchmark downloading a model: one stream vs. concurrent ranged parts vs. resuming.
+
+S3 is simulated by a client with a fixed latency per request and a limited
+bandwidth per connection, so the numbers show the effect of concurrency, not of
+the network the benchmark runs on.
+
+Example calls:
+python benchmarks/bench_model_download.py
+python benchmarks/bench_model_download.py --size 200 --bandwidth 50 --latency 0.05
+"""
+
+import argparse
+import io
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from module_classifier.classification.download import (
+    PART_SUFFIX,
+    STATE_SUFFIX,
+    download_model,
+)
+
+
+class SimulatedS3Client:
+    def __init__(self, content: bytes, latency: float, bandwidth: float):
+        self.content = content
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.fail_at = None
+        self.requests = 0
+
+    def head_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        return {"ContentLength": len(self.content), "ETag": '"multipart-etag"'}
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.requests += 1
+        if self.requests == self.fail_at:
+            raise ConnectionError("simulated interruption")
+        first, last = 0, len(self.content) - 1
+        if Range is not None:
+            first, last = map(int, Range[len("bytes=") :].split("-"))
+        time.sleep(self.latency + (last - first + 1) / self.bandwidth)
+        return {"Body": io.BytesIO(self.content[first : last + 1])}
+
+    def download_file(self, Bucket, Key, Filename):
+        """The previous download: a single request, written directly to the target."""
+        with open(Filename, "wb") as f:
+            f.write(self.get_object(Bucket, Key)["Body"].read())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model downloads.")
+    parser.add_argument(
+        "--size", type=int, default=100, help="The size of the model in MB."
+    )
+    parser.add_argument(
+        "--bandwidth", type=float, default=100, help="MB/s per connection."
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.03, help="Seconds per request."
+    )
+    args = parser.parse_args()
+
+    content = os.urandom(args.size * 1024 * 1024)
+    client = SimulatedS3Client(content, args.latency, args.bandwidth * 1e6)
+
+    with TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.bin")
+
+        def clean():
+            for suffix in ("", PART_SUFFIX, STATE_SUFFIX):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+        def run(name, download):
+            clean()
+            client.requests = 0
+            start = time.perf_counter()
+            download()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<32}{elapsed:8.2f} s{client.requests:6d} requests")
+
+        run("download_file", lambda: client.download_file("b", "k", path))
+        for concurrency in (1, 4, 8):
+            run(
+                f"ranged parts, {concurrency} thread(s)",
+                lambda: download_model(
+                    client, "b", "k", path, max_concurrency=concurrency
+                ),
+            )
+
+        def interrupted():
+            # interrupted half-way, then resumed
+            clean()
+            client.requests = 0
+            client.fail_at = len(content) // (2 * 8 * 1024 * 1024)
+            try:
+                download_model(client, "b", "k", path, max_concurrency=1, retries=0)
+            except ConnectionError:
+                pass
+            client.fail_at = None
+            start = time.perf_counter()
+            client.requests = 0
+            download_model(client, "b", "k", path)
+            print(f"{'resumed after interruption':<32}", end="")
+            print(f"{time.perf_counter() - start:8.2f} s{client.requests:6d} requests")
+
+        interrupted()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+"""Benchmark verifying the MD5 sum of a model file: whole-file read vs. chunked vs. sidecar.
+
+Peak memory is the peak of Python allocations (tracemalloc); the pages of a memory
+map are file-backed and not counted, as they can be dropped by the kernel.
+
+Example calls:
+python benchmarks/bench_model_hashing.py
+python benchmarks/bench_model_hashing.py --size 1000
+python benchmarks/bench_model_hashing.py -m classifier.model.ftz
+"""
+
+import argparse
+import hashlib
+import os
+import time
+import tracemalloc
+from tempfile import TemporaryDirectory
+
+from module_classifier.classification.checksums import file_md5, verified_md5
+from module_classifier.classification.settings import MD5_SIDECAR_SUFFIX
+
+
+def read_md5(path: str) -> str:
+    """The previous implementation of `Classifier.validate_md5()`."""
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model hashing.")
+    parser.add_argument("--model", "-m", type=str, help="A model file.")
+    parser.add_argument(
+        "--size", type=int, default=300, help="The size of a random file in MB."
+    )
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        path = args.model
+        if path is None:
+            path = os.path.join(tmp, "model.bin")
+            with open(path, "wb") as f:
+                for _ in range(args.size):
+                    f.write(os.urandom(1024 * 1024))
+        sidecar = path + MD5_SIDECAR_SUFFIX
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        print(f"{os.path.getsize(path) / 1e6:.0f} MB")
+
+        for name, hash_file in [
+            ("read", read_md5),
+            ("chunked", file_md5),
+            ("sidecar, first", verified_md5),
+            ("sidecar, unchanged", verified_md5),
+        ]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            hash_file(path)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:<20}{elapsed * 1e3:10.1f} ms{peak / 1e6:10.1f} MB peak")
+
+        os.remove(sidecar)
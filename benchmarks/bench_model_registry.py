@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+"""Benchmark building several classifiers of the same model: separate loads vs. the registry.
+
+Memory is the resident set size (RSS) of the process, read from /proc (Linux only).
+
+Example calls:
+python benchmarks/bench_model_registry.py
+python benchmarks/bench_model_registry.py -m classifier.model.ftz --classifiers 8
+"""
+
+import argparse
+import resource
+import time
+from tempfile import NamedTemporaryFile
+
+import fasttext
+from bench_predict_proba import train_model
+
+from module_classifier.classification import ModuleClassifier
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the model registry.")
+    parser.add_argument("--model", "-m", type=str, help="A module classifier model.")
+    parser.add_argument("--classifiers", type=int, default=5)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        if args.model is None:
+            train_model(model_file.name)
+        path = args.model or model_file.name
+
+        for name, load in [
+            ("fasttext.load_model", lambda: fasttext.load_model(path)),
+            ("ModuleClassifier", lambda: ModuleClassifier(path).model),
+        ]:
+            before = rss()
+            start = time.perf_counter()
+            models = [load() for _ in range(args.classifiers)]
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:<22}{args.classifiers} models{elapsed:8.2f}s"
+                f"{(rss() - before) / 1e6:10.1f} MB"
+            )
+            del models
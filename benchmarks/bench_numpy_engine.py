@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+"""Benchmark predictions by batch size: the FastText library vs. the NumPy engine.
+
+Trains a module classifier with the production settings (word bigrams and character
+n-grams) on synthetic data, unless a model is given, and predicts the same texts in
+batches of increasing size with both engines. The NumPy engine's token cache is
+cleared before each run, so every run pays for hashing the vocabulary once.
+
+Example calls:
+python benchmarks/bench_numpy_engine.py
+python benchmarks/bench_numpy_engine.py --quantize --texts 50000
+python benchmarks/bench_numpy_engine.py -m classifier.model.ftz
+"""
+
+import argparse
+import random
+import string
+import time
+from tempfile import NamedTemporaryFile
+
+import fasttext
+import numpy as np
+
+from module_classifier.classification import ModuleClassifier
+from module_classifier.classification.classifier import _batches
+from module_classifier.classification.engine import NumpyModel
+
+
+def train_model(path: str, dim: int, quantize: bool, seed: int = 0):
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(5000)]
+    labels = [f"S{s}_M{m}" for s in range(1, 7) for m in range(1, 11)]
+    with NamedTemporaryFile("w") as f:
+        for _ in range(20000):
+            f.write(
+                f"__label__{rng.choice(labels)} {' '.join(rng.choices(words, k=50))}\n"
+            )
+        f.flush()
+        model = fasttext.train_supervised(
+            f.name,
+            dim=dim,
+            epoch=1,
+            wordNgrams=2,
+            minn=2,
+            maxn=5,
+            thread=1,
+            verbose=0,
+        )
+        if quantize:
+            model.quantize(f.name, retrain=True, thread=1, verbose=0)
+        model.save_model(path)
+    return words
+
+
+def predict(classifier: ModuleClassifier, texts, batch_size: int, k: int):
+    for batch in _batches(texts, batch_size):
+        classifier._predict_arrays(batch, k)
+
+
+def clear_token_cache(model: NumpyModel):
+    model._token_index.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy engine.")
+    parser.add_argument("--model", "-m", type=str, help="A module classifier model.")
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=100)
+    parser.add_argument("--quantize", action="store_true")
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    suffix = ".ftz" if args.quantize else ".bin"
+    with NamedTemporaryFile(suffix=suffix) as model_file:
+        words = train_model(model_file.name, args.dim, args.quantize)
+        fasttext_classifier = ModuleClassifier(args.model or model_file.name)
+        numpy_classifier = ModuleClassifier(args.model or model_file.name, "numpy")
+
+    rng = random.Random(1)
+    # already clean, to compare only the cost of prediction
+    texts = [" ".join(rng.choices(words, k=50)) for _ in range(args.texts)]
+    print(f"{len(texts)} texts, {len(numpy_classifier.raw_labels)} labels, k={args.k}")
+
+    # the same predictions, up to rounding (compared with FastText's prediction of
+    # single texts; the probabilities of its batch prediction depend on the
+    # installed NumPy version)
+    model = fasttext_classifier.model
+    counts, label_ids, probs = numpy_classifier._predict_arrays(texts[:200], args.k)
+    expected = [
+        model.f.predict(text + "\n", args.k, 0.0, "strict") for text in texts[:200]
+    ]
+    assert counts.tolist() == list(map(len, expected))
+    assert np.allclose(probs, [p for text in expected for p, _ in text], atol=1e-5)
+
+    for batch_size in (1, 10, 100, 1000, 10000):
+        results = []
+        for classifier in (fasttext_classifier, numpy_classifier):
+            if isinstance(classifier.model, NumpyModel):
+                clear_token_cache(classifier.model)
+            start = time.perf_counter()
+            predict(classifier, texts, batch_size, args.k)
+            results.append(len(texts) / (time.perf_counter() - start))
+        print(
+            f"batch size {batch_size:<7}fasttext{results[0]:10.0f} texts/s"
+            f"    numpy{results[1]:10.0f} texts/s    x{results[1] / results[0]:.2f}"
+        )
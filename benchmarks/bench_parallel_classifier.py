@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""Benchmark ParallelClassifier throughput and memory against the number of workers.
+
+Memory is the proportional set size (PSS) of the parent and the workers, read from
+/proc (Linux only), in which pages shared copy-on-write count once in total.
+
+Example calls:
+python benchmarks/bench_parallel_classifier.py
+python benchmarks/bench_parallel_classifier.py -m classifier.model.ftz --processes 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import time
+from tempfile import NamedTemporaryFile
+
+from bench_predict_proba import train_model
+
+from module_classifier.classification import ModuleClassifier, ParallelClassifier
+
+
+def pss(pid: int) -> int:
+    """The proportional set size of a process in bytes."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ParallelClassifier.")
+    parser.add_argument("--model", "-m", type=str, help="A module classifier model.")
+    parser.add_argument("--texts", type=int, default=100000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--start-methods", nargs="+", default=["fork", "spawn"])
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        words = train_model(model_file.name)
+        classifier = ModuleClassifier(args.model or model_file.name)
+
+        rng = random.Random(1)
+        texts = [" ".join(rng.choices(words, k=50)) for _ in range(args.texts)]
+        print(f"{len(texts)} texts, {os.cpu_count()} CPUs")
+
+        start = time.perf_counter()
+        classifier.predict_texts(texts)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'in-process':<16}{elapsed:8.2f}s{len(texts) / elapsed:10.0f} texts/s"
+            f"{pss(os.getpid()) / 1e6:10.1f} MB"
+        )
+
+        for start_method in args.start_methods:
+            for processes in args.processes:
+                with ParallelClassifier(
+                    classifier, processes, start_method=start_method
+                ) as parallel:
+                    parallel.predict_texts(texts[: 2 * parallel.chunk_size])  # warm up
+                    start = time.perf_counter()
+                    parallel.predict_texts(texts)
+                    elapsed = time.perf_counter() - start
+                    workers = (
+                        parallel._executor._processes if parallel._executor else {}
+                    )
+                    memory = pss(os.getpid()) + sum(pss(pid) for pid in workers)
+                name = f"{start_method} x{processes}"
+                print(
+                    f"{name:<16}{elapsed:8.2f}s{len(texts) / elapsed:10.0f} texts/s"
+                    f"{memory / 1e6:10.1f} MB"
+                )
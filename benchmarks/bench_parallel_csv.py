@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+"""Benchmark parsing an archive CSV export with an increasing number of processes.
+
+Example calls:
+python benchmarks/bench_parallel_csv.py -i archive.csv
+python benchmarks/bench_parallel_csv.py --size-mb 2000 --processes 1 2 4 8
+"""
+
+import argparse
+import os
+from functools import partial
+from tempfile import NamedTemporaryFile
+
+from bench_csv_reader import generate_archive, measure
+
+from module_classifier.classification import ModuleClassifier
+from module_classifier.preprocessing.parallel_reader import ParallelCSVReader
+from module_classifier.preprocessing.settings import (
+    CLASS_FIELD,
+    CSV_CHUNK_SIZE,
+    TEXT_FIELDS,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parallel CSV parsing.")
+    parser.add_argument("--input", "-i", type=str, help="An archive CSV file.")
+    parser.add_argument(
+        "--size-mb",
+        type=int,
+        default=500,
+        help="Size of the generated archive if no input file is given.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="+",
+        help="The numbers of processes to compare. Defaults to powers of 2 up to the number of CPUs.",
+    )
+    parser.add_argument("--chunk-size-mb", type=int, default=CSV_CHUNK_SIZE >> 20)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    processes = args.processes or [2**i for i in range(cpus.bit_length())]
+    columns = [*TEXT_FIELDS, CLASS_FIELD]
+    fasttext_line = partial(
+        ModuleClassifier.fasttext_line, text_fields=TEXT_FIELDS, class_field=CLASS_FIELD
+    )
+
+    with NamedTemporaryFile("w", suffix=".csv", newline="") as tmp:
+        if args.input:
+            path = args.input
+        else:
+            generate_archive(tmp, args.size_mb)
+            path = tmp.name
+        size = os.path.getsize(path)
+        print(f"Reading {size / 1e6:.0f} MB from '{path}' ({cpus} CPUs).")
+
+        for n in processes:
+            for name, transform in [
+                ("records", None),
+                ("FastText lines", fasttext_line),
+            ]:
+                reader = partial(
+                    ParallelCSVReader,
+                    path,
+                    columns,
+                    processes=n,
+                    chunk_size=args.chunk_size_mb << 20,
+                    transform=transform,
+                )
+                measure(f"{n:3d} x {name}", reader, size, memory=False)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""Benchmark scoring with a binary (main edition) model: per-row tuples vs. predict_binary.
+
+Example calls:
+python benchmarks/bench_predict_binary.py
+python benchmarks/bench_predict_binary.py --texts 1000000
+"""
+
+import argparse
+import random
+import string
+import time
+from distutils.util import strtobool
+from tempfile import NamedTemporaryFile
+
+import fasttext
+import numpy as np
+
+from module_classifier.classification.binary_classifier import MainEditionClassifier
+
+
+def train_model(path: str, seed: int = 0):
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(5000)]
+    with NamedTemporaryFile("w") as f:
+        for _ in range(20000):
+            label = rng.random() < 0.1
+            f.write(f"__label__{label} {' '.join(rng.choices(words, k=20))}\n")
+        f.flush()
+        fasttext.train_supervised(
+            f.name, dim=20, epoch=1, thread=1, verbose=0
+        ).save_model(path)
+    return words
+
+
+def true_probs_from_tuples(classifier: MainEditionClassifier, texts):
+    """P(True) from the previous tuple API, which returned the winning label only."""
+    labels, probs = classifier.model.predict(texts, 1)
+    predictions = [
+        (bool(strtobool(label[0][len("__label__") :])), float(prob[0]))
+        for label, prob in zip(labels, probs)
+    ]
+    return np.array([p if label else 1 - p for label, p in predictions])
+
+
+def predict_binary(classifier: MainEditionClassifier, texts):
+    return classifier.predict_binary(texts)[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark binary predictions.")
+    parser.add_argument("--texts", type=int, default=200000)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        words = train_model(model_file.name)
+        classifier = MainEditionClassifier(model_file.name)
+
+    rng = random.Random(1)
+    texts = [" ".join(rng.choices(words, k=20)) for _ in range(args.texts)]
+    print(f"{len(texts)} texts")
+
+    for name, predict in [
+        ("tuples", true_probs_from_tuples),
+        ("predict_binary", predict_binary),
+    ]:
+        start = time.perf_counter()
+        predict(classifier, texts)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16}{elapsed:8.2f}s{len(texts) / elapsed:10.0f} texts/s")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""Benchmark dense label probability matrices: per-row Predictions vs. predict_proba.
+
+Trains a small model with 60 module labels on synthetic data, unless a model is given.
+
+Example calls:
+python benchmarks/bench_predict_proba.py
+python benchmarks/bench_predict_proba.py -m classifier.model.ftz --texts 100000
+"""
+
+import argparse
+import random
+import string
+import time
+from tempfile import NamedTemporaryFile
+
+import fasttext
+import numpy as np
+
+from module_classifier.classification import ModuleClassifier
+
+
+def train_model(path: str, seed: int = 0):
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(5000)]
+    labels = [f"S{s}_M{m}" for s in range(1, 7) for m in range(1, 11)]
+    with NamedTemporaryFile("w") as f:
+        for _ in range(20000):
+            f.write(
+                f"__label__{rng.choice(labels)} {' '.join(rng.choices(words, k=50))}\n"
+            )
+        f.flush()
+        fasttext.train_supervised(
+            f.name, dim=20, epoch=1, thread=1, verbose=0
+        ).save_model(path)
+    return words
+
+
+def prediction_probs(classifier: ModuleClassifier, texts, k: int) -> np.ndarray:
+    """The previous implementation of `Classifier.prediction_probs()`."""
+    rows = []
+    for p in classifier._predict(texts, k):
+        probs = []
+        for label in classifier.raw_labels:
+            probs.append(p.probs[p.labels.index(label)] if label in p.labels else 0.0)
+        rows.append(np.array(probs))
+    return np.array(rows)
+
+
+def fasttext_only(classifier: ModuleClassifier, texts, k: int):
+    return classifier.model.predict(texts, k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark predict_proba.")
+    parser.add_argument("--model", "-m", type=str, help="A module classifier model.")
+    parser.add_argument("--texts", type=int, default=20000)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        words = train_model(model_file.name)
+        classifier = ModuleClassifier(args.model or model_file.name)
+
+    rng = random.Random(1)
+    # already clean, to compare only the cost of prediction
+    texts = [" ".join(rng.choices(words, k=50)) for _ in range(args.texts)]
+    print(f"{len(texts)} texts, {len(classifier.raw_labels)} labels")
+
+    for k in (1, 5, -1):
+        for name, predict in [
+            ("FastText only", fasttext_only),
+            ("Predictions", prediction_probs),
+            ("predict_proba", ModuleClassifier._predict_proba),
+        ]:
+            start = time.perf_counter()
+            probs = predict(classifier, texts, k)
+            elapsed = time.perf_counter() - start
+            print(
+                f"k={k:<3}{name:<16}{elapsed:8.2f}s{len(texts) / elapsed:10.0f} texts/s"
+            )
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""Benchmark scoring a generator of texts: materialized predict_texts vs. predict_stream.
+
+Example calls:
+python benchmarks/bench_predict_stream.py
+python benchmarks/bench_predict_stream.py --texts 500000 --batch-size 5000 --prefetch 2
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from tempfile import NamedTemporaryFile
+
+from bench_predict_proba import train_model
+
+from module_classifier.classification import ModuleClassifier
+
+
+def predict_texts(classifier: ModuleClassifier, texts, args):
+    for prediction in classifier.predict_texts(list(texts)):
+        pass
+
+
+def predict_stream(classifier: ModuleClassifier, texts, args):
+    for prediction in classifier.predict_stream(
+        texts, batch_size=args.batch_size, prefetch=args.prefetch
+    ):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark predict_stream.")
+    parser.add_argument("--texts", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--prefetch", type=int, default=1)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        words = train_model(model_file.name)
+        classifier = ModuleClassifier(model_file.name)
+    print(f"{args.texts} texts, batch size {args.batch_size}, prefetch {args.prefetch}")
+
+    for name, predict in [
+        ("predict_texts", predict_texts),
+        ("predict_stream", predict_stream),
+    ]:
+        rng = random.Random(1)
+        texts = (" ".join(rng.choices(words, k=50)) for _ in range(args.texts))
+        tracemalloc.start()
+        start = time.perf_counter()
+        predict(classifier, texts, args)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:<16}{elapsed:8.2f}s{peak / 1e6:10.1f} MB peak")
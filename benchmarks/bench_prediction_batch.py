@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+"""Benchmark bulk scoring: lists of Predictions vs. an array-backed PredictionBatch.
+
+Also times the conversion of the batch to a data frame (if pandas is installed),
+copying the probabilities (the default) or not.
+
+Example calls:
+python benchmarks/bench_prediction_batch.py
+python benchmarks/bench_prediction_batch.py --texts 200000 -k 5
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from tempfile import NamedTemporaryFile
+
+from bench_predict_proba import train_model
+
+from module_classifier.classification import ModuleClassifier
+
+
+def predictions(classifier: ModuleClassifier, texts, k: int):
+    return [p.to_predictions() for p in classifier._predict(texts, k)]
+
+
+def batch(classifier: ModuleClassifier, texts, k: int):
+    return classifier._predict_batch(texts, k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PredictionBatch.")
+    parser.add_argument("--texts", type=int, default=50000)
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file:
+        words = train_model(model_file.name)
+        classifier = ModuleClassifier(model_file.name)
+
+    rng = random.Random(1)
+    # already clean, to compare only the cost of prediction
+    texts = [" ".join(rng.choices(words, k=50)) for _ in range(args.texts)]
+    print(f"{len(texts)} texts, k={args.k}")
+
+    for name, predict in [("Predictions", predictions), ("PredictionBatch", batch)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = predict(classifier, texts, args.k)
+        elapsed = time.perf_counter() - start
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name:<18}{elapsed:8.2f}s{retained / 1e6:10.1f} MB retained{peak / 1e6:10.1f} MB peak"
+        )
+        if name == "PredictionBatch":
+            prediction_batch = result
+        del result
+
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("pandas is not installed, skipping to_pandas()")
+    else:
+        for copy in (True, False):
+            start = time.perf_counter()
+            prediction_batch.to_pandas(copy=copy)
+            elapsed = time.perf_counter() - start
+            print(f"{f'to_pandas(copy={copy})':<24}{elapsed:8.4f}s")
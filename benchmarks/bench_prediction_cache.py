@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+"""Benchmark scoring texts with repetitions, without and with a PredictionCache.
+
+Example calls:
+python benchmarks/bench_prediction_cache.py
+python benchmarks/bench_prediction_cache.py --texts 200000 --unique 0.1
+"""
+
+import argparse
+import random
+import time
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+
+from bench_predict_proba import train_model
+
+from module_classifier.classification import ModuleClassifier, PredictionCache
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the prediction cache.")
+    parser.add_argument("--texts", type=int, default=100000)
+    parser.add_argument(
+        "--unique", type=float, default=0.3, help="The fraction of unique texts."
+    )
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    with NamedTemporaryFile(suffix=".bin") as model_file, TemporaryDirectory() as tmp:
+        words = train_model(model_file.name)
+        classifier = ModuleClassifier(model_file.name)
+
+        rng = random.Random(1)
+        unique = [
+            " ".join(rng.choices(words, k=50))
+            for _ in range(int(args.texts * args.unique))
+        ]
+        texts = rng.choices(unique, k=args.texts)
+        print(f"{len(texts)} texts, {len(unique)} unique, k={args.k}")
+
+        memory = PredictionCache(max_size=len(texts))
+        sqlite = PredictionCache(max_size=len(texts), path=f"{tmp}/cache.sqlite")
+        for name, cache, clear in [
+            ("no cache", None, False),
+            ("memory, cold", memory, False),
+            ("memory, warm", memory, False),
+            ("sqlite, cold", sqlite, False),
+            ("sqlite, from disk", sqlite, True),
+        ]:
+            classifier.set_cache(cache)
+            if clear:
+                cache.clear()
+            start = time.perf_counter()
+            classifier.predict_texts(texts, args.k)
+            elapsed = time.perf_counter() - start
+            hits = f"{cache.stats.hit_ratio:6.1%} hits" if cache else ""
+            print(
+                f"{name:<20}{elapsed:8.2f}s{len(texts) / elapsed:10.0f} texts/s  {hits}"
+            )
@@ -22,14 +22,18 @@ setuptools.setup(
         "src/scripts/train_module_classifier",
         "src/scripts/explain",
         "src/scripts/train_main_edition_classifier.py",
+        "src/scripts/classify",
+        "src/scripts/serve",
     ],
     python_requires=">=3.8",
     # conda install -c conda-forge fasttext
     install_requires=[
         "fasttext==0.9.2",
-        "pydantic>=1.8.0<1.9.0",
         "lime>=0.2.0,<0.3.0",
         "boto3>=1.20.0,<1.21.0",
     ],
-    extras_require={"testing": ["pytest>=6.2.5,<6.3.0", "pytest-mock==3.3.1"]},
+    extras_require={
+        "testing": ["pytest>=6.2.5,<6.3.0", "pytest-mock==3.3.1"],
+        "pandas": ["pandas>=1.3"],
+    },
 )
@@ -1,2 +1,12 @@
+from .batcher import AsyncBatcher
+from .cache import PredictionCache
 from .classifier import Classifier
-from .module_classifier import ModuleClassifier, Prediction, Predictions
+from .combined import CombinedClassifier, CombinedPrediction
+from .module_classifier import (
+    ModuleClassifier,
+    Prediction,
+    PredictionBatch,
+    Predictions,
+)
+from .parallel import ParallelClassifier
+from .registry import REGISTRY, ModelRegistry
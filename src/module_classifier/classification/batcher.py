@@ -0,0 +1,216 @@
+import asyncio
+import logging
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .classifier import Classifier
+from .module_classifier import ModuleClassifier
+from .settings import ASYNC_BATCH_SIZE, ASYNC_MAX_WAIT
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# A request by its text and number of predictions
+RequestKey = Tuple[str, int]
+
+
+@dataclass
+class BatcherStats:
+    """Counters and histograms of an AsyncBatcher.
+
+    Histograms map the upper bound of a bucket (0, 1, 2, 4, 8, ...) to the number
+    of observations in that bucket.
+    """
+
+    requests: int = 0
+    # requests answered by a prediction already queued or running for the same text
+    coalesced: int = 0
+    batches: int = 0
+    batch_sizes: Dict[int, int] = field(default_factory=Counter)
+    # the number of distinct texts queued or running when a request arrived
+    queue_depths: Dict[int, int] = field(default_factory=Counter)
+
+    @property
+    def mean_batch_size(self) -> float:
+        total: int = self.requests - self.coalesced
+        return total / self.batches if self.batches else 0.0
+
+
+class AsyncBatcher:
+    """Serve single-text predictions from coroutines in batches.
+
+    Concurrent `predict()` calls are queued until `max_batch_size` distinct texts
+    are waiting or the oldest has waited `max_wait` seconds. Each batch is predicted
+    with one call of the classifier in an executor, so the event loop is not
+    blocked, and while it runs the next batch is collected. Requests for a text
+    (and k) that is already queued or running share its result. If a batch fails,
+    its texts are retried one at a time, so an exception only reaches the callers
+    of the text that raised it.
+
+    The results are those of `classifier.predict_text()`. A batcher is bound to
+    the event loop of its first request; it should be closed with `close()`, or
+    used as an async context manager.
+    """
+
+    def __init__(
+        self,
+        classifier: Classifier,
+        max_batch_size: int = ASYNC_BATCH_SIZE,
+        max_wait: float = ASYNC_MAX_WAIT,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Args:
+            classifier: the classifier, e.g. a ModuleClassifier or MainEditionClassifier
+            max_batch_size: the maximum number of distinct texts per batch
+            max_wait: the maximum time in seconds a request waits for a batch to fill
+            executor: runs the predictions; defaults to a single thread, so that
+                batches are predicted one at a time.
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"Invalid batch size: {max_batch_size}.")
+        if max_wait < 0:
+            raise ValueError(f"Invalid maximum wait time: {max_wait}.")
+
+        self.classifier: Classifier = classifier
+        self.max_batch_size: int = max_batch_size
+        self.max_wait: float = max_wait
+        self._executor: Executor = executor or ThreadPoolExecutor(
+            1, thread_name_prefix="AsyncBatcher"
+        )
+        self._owns_executor: bool = executor is None
+        # the futures of the callers waiting for each text, queued or running
+        self._pending: Dict[RequestKey, List["asyncio.Future[Any]"]] = {}
+        self._running: Dict[RequestKey, List["asyncio.Future[Any]"]] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats: BatcherStats = BatcherStats()
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of distinct texts queued or being predicted."""
+        return len(self._pending) + len(self._running)
+
+    @property
+    def stats(self) -> BatcherStats:
+        """A snapshot of the counters and histograms."""
+        stats: BatcherStats = BatcherStats(**vars(self._stats))
+        stats.batch_sizes = Counter(stats.batch_sizes)
+        stats.queue_depths = Counter(stats.queue_depths)
+        return stats
+
+    async def predict(self, text: str, k: int = 1) -> Any:
+        """The predictions for a text, as returned by `classifier.predict_text()`."""
+        key: RequestKey = (text, k)
+        self._stats.requests += 1
+        self._stats.queue_depths[_bucket(self.queue_depth)] += 1
+
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        # one future per caller, so a cancelled caller does not cancel the others
+        future: "asyncio.Future[Any]" = loop.create_future()
+        waiters: Optional[List["asyncio.Future[Any]"]] = self._pending.get(key)
+        if waiters is None:
+            waiters = self._running.get(key)
+        if waiters is not None:
+            self._stats.coalesced += 1
+            waiters.append(future)
+        else:
+            self._pending[key] = [future]
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def close(self):
+        """Predict the queued texts, wait for all batches, and shut down the executor."""
+        self._flush()
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    async def __aenter__(self) -> "AsyncBatcher":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _flush(self):
+        """Start predicting the queued texts, in one batch per k."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batches: Dict[int, List[RequestKey]] = {}
+        for key in self._pending:
+            batches.setdefault(key[1], []).append(key)
+        self._running.update(self._pending)
+        self._pending = {}
+
+        for k, keys in batches.items():
+            task: "asyncio.Task[None]" = asyncio.get_running_loop().create_task(
+                self._run(keys, k)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: List[RequestKey], k: int):
+        self._stats.batches += 1
+        self._stats.batch_sizes[_bucket(len(keys))] += 1
+        try:
+            predictions: List[Any] = await self._predict([text for text, _ in keys], k)
+        except Exception as e:
+            if len(keys) == 1:
+                self._resolve(keys[0], exception=e)
+                return
+            # e.g. one invalid text fails the whole batch: retry the texts one at a
+            # time, so that only the requests for the failing texts get the error
+            LOGGER.debug(
+                f"Prediction of a batch of {len(keys)} texts failed, retrying them one at a time: {e}"
+            )
+            for key in keys:
+                try:
+                    (prediction,) = await self._predict([key[0]], k)
+                except Exception as e:
+                    self._resolve(key, exception=e)
+                else:
+                    self._resolve(key, prediction)
+        else:
+            for key, prediction in zip(keys, predictions):
+                self._resolve(key, prediction)
+
+    async def _predict(self, texts: List[str], k: int) -> List[Any]:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, _predict_batch, self.classifier, texts, k
+        )
+
+    def _resolve(
+        self,
+        key: RequestKey,
+        result: Any = None,
+        exception: Optional[BaseException] = None,
+    ):
+        """Pass the result or exception of a text to all its callers."""
+        for future in self._running.pop(key):
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+
+def _predict_batch(classifier: Classifier, texts: List[str], k: int) -> List[Any]:
+    """The predictions per text, as returned by `predict_text()`."""
+    if isinstance(classifier, ModuleClassifier):
+        return list(classifier.predict_batch(texts, k))
+    return classifier.predict_texts(texts, k)
+
+
+def _bucket(n: int) -> int:
+    """The smallest power of two not less than n, or 0 for 0."""
+    return 1 << (n - 1).bit_length() if n > 0 else 0
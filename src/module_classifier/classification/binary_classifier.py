@@ -1,5 +1,7 @@
 from distutils.util import strtobool
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
 
 from ..preprocessing.settings import (
     LABEL_PREFIX,
@@ -11,6 +13,7 @@ from .settings import (
     AWS_S3_MODELS_BUCKET,
     MAIN_EDITION_CLASSIFIER_MODEL_FILE_NAME,
     MAIN_EDITION_CLASSIFIER_MODEL_PATH,
+    PREDICTION_BATCH_SIZE,
 )
 
 
@@ -19,17 +22,81 @@ class BinaryClassifier(Classifier):
     def _deserialize_label(label: str) -> bool:
         return bool(strtobool(label[len(LABEL_PREFIX) :]))
 
+    def predict_binary(
+        self, texts: Sequence[str], batch_size: int = PREDICTION_BATCH_SIZE
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict the label and the probability of the True label for each text.
+
+        Args:
+            texts: the input texts, prepared as in `predict_texts()`
+            batch_size: the number of texts passed to the model at once
+
+        Returns:
+            a bool array of the predicted labels and a float32 array of the
+            probabilities of True, one entry per text.
+        """
+        predicted: np.ndarray = np.empty(len(texts), bool)
+        true_probs: np.ndarray = np.empty(len(texts), np.float32)
+        for start in range(0, len(texts), batch_size):
+            end: int = start + batch_size
+            predicted[start:end], true_probs[start:end], _ = self._predict_binary(
+                self._clean_texts(list(texts[start:end]))
+            )
+        return predicted, true_probs
+
+    def predict_binary_rows(
+        self, rows: List[Dict[str, str]], columns: Iterable[str] = ()
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict the label and the probability of True for rows, see `predict_binary()`.
+
+        Args:
+            rows: dictionaries holding (at least) the text fields
+            columns: the fields to extract text from, as in `predict_rows()`
+        """
+        predicted, true_probs, _ = self._predict_binary(
+            [self.fasttext_line(row, columns) for row in rows]
+        )
+        return predicted, true_probs
+
+    def _predict_binary(
+        self, texts: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Predict from the probabilities of both labels at once.
+
+        Returns:
+            the predicted labels, the probabilities of True and the probabilities of
+            the predicted labels
+        """
+        probs: np.ndarray = self._predict_proba(texts, -1)
+        winners: np.ndarray = probs.argmax(axis=1)
+        try:
+            true_index: int = self.label_table.index_of_value(True)
+        except KeyError:  # a model trained without positive examples
+            return (
+                np.zeros(len(texts), bool),
+                np.zeros(len(texts), np.float32),
+                probs.max(axis=1, initial=0),
+            )
+        return (
+            winners == true_index,
+            probs[:, true_index],
+            probs[np.arange(len(texts)), winners],
+        )
+
 
 class MainEditionClassifier(BinaryClassifier):
+    DEFAULT_TEXT_FIELDS: Iterable[str] = MAIN_EDITION_TEXT_FIELDS
+
     def predict_texts(self, texts: List[str], k: int = 1) -> List[Tuple[bool, float]]:
         return self._predict(texts, k)
 
     def _predict(self, texts: List[str], k: int) -> List[Tuple[bool, float]]:
-        labels, probs = self.model.predict(texts, k)
-        return [
-            (self._deserialize_label(label[0]), float(prob))
-            for label, prob in zip(labels, probs)
-        ]
+        """The predicted label and its probability per text; see `predict_binary()`.
+
+        Only the most probable label is returned, regardless of k.
+        """
+        predicted, _, probs = self._predict_binary(texts)
+        return list(zip(predicted.tolist(), probs.tolist()))
 
     @staticmethod
     def fasttext_line(
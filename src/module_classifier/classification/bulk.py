@@ -0,0 +1,192 @@
+import csv
+import logging
+import time
+from contextlib import ExitStack
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+from ..preprocessing.reader import CSVReader, Record
+from ..preprocessing.settings import MAIN_EDITION_TEXT_FIELDS, TEXT_FIELDS
+from .binary_classifier import MainEditionClassifier
+from .combined import CombinedClassifier
+from .module_classifier import ModuleClassifier, Prediction
+from .parallel import ParallelClassifier
+from .settings import PREDICTION_BATCH_SIZE
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+MAIN_EDITION_COLUMN: str = "main_edition"
+PROBABILITY_SUFFIX: str = "_prob"
+
+
+def module_columns(k: int) -> List[str]:
+    """The output columns for the top k modules and their probabilities."""
+    return [
+        column
+        for rank in range(1, k + 1)
+        for column in (f"module_{rank}", f"module_{rank}{PROBABILITY_SUFFIX}")
+    ]
+
+
+def classify_csv(
+    input_file: TextIO,
+    output_file: TextIO,
+    module_classifier: Optional[ModuleClassifier] = None,
+    main_edition_classifier: Optional[MainEditionClassifier] = None,
+    *,
+    k: int = 1,
+    text_fields: Iterable[str] = TEXT_FIELDS,
+    main_edition_text_fields: Iterable[str] = MAIN_EDITION_TEXT_FIELDS,
+    batch_size: int = PREDICTION_BATCH_SIZE,
+    processes: int = 1,
+    progress_interval: int = 100000,
+    **fmtparams,
+) -> int:
+    """Copy a CSV file, appending the predictions of a module and/or main edition classifier.
+
+    The input is read and written in batches of `batch_size` rows, so memory use
+    does not depend on the size of the file. Each batch is split across the worker
+    processes of a `ParallelClassifier`. With both classifiers, the rows are
+    predicted by a `CombinedClassifier`, which cleans the text fields only once.
+
+    Appended columns are 'module_1', 'module_1_prob', ... 'module_k_prob' for the
+    top k modules (empty where the model predicts fewer labels), and
+    'main_edition' and 'main_edition_prob', the probability of being a main edition.
+
+    Args:
+        input_file: the input CSV file with a header row, opened with newline=''
+        output_file: the output CSV file, opened with newline=''
+        module_classifier: the module classifier, if any
+        main_edition_classifier: the main edition classifier, if any
+        k: the number of modules per row
+        text_fields: the columns the module classifier reads
+        main_edition_text_fields: the columns the main edition classifier reads
+        batch_size: the number of rows read, classified and written at once
+        processes: the number of worker processes per classifier
+        progress_interval: the number of rows between progress messages
+        fmtparams: format parameters passed to `csv.reader()` and `csv.writer()`
+
+    Returns:
+        the number of rows classified
+    """
+    if module_classifier is None and main_edition_classifier is None:
+        raise ValueError("No classifier given.")
+    if k < 1:
+        raise ValueError(f"Invalid number of predictions per row: {k}.")
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size: {batch_size}.")
+
+    reader = CSVReader(input_file, **fmtparams)
+    text_fields = tuple(text_fields) if module_classifier else ()
+    main_edition_text_fields = (
+        tuple(main_edition_text_fields) if main_edition_classifier else ()
+    )
+    missing: List[str] = [
+        field
+        for field in dict.fromkeys(text_fields + main_edition_text_fields)
+        if field not in reader.columns
+    ]
+    if missing:
+        raise ValueError(f"Missing input field(s): {', '.join(missing)}.")
+
+    header: List[str] = list(reader.columns)
+    if module_classifier:
+        header += module_columns(k)
+    if main_edition_classifier:
+        header += [MAIN_EDITION_COLUMN, MAIN_EDITION_COLUMN + PROBABILITY_SUFFIX]
+    writer = csv.writer(output_file, **fmtparams)
+    writer.writerow(header)
+
+    chunk_size: int = -(-batch_size // processes)
+    rows: Iterator[Record] = iter(reader)
+    count: int = 0
+    start: float = time.perf_counter()
+    with ExitStack() as stack:
+        combined: Optional[ParallelClassifier] = None
+        modules: Optional[ParallelClassifier] = None
+        main_editions: Optional[ParallelClassifier] = None
+        if module_classifier and main_edition_classifier:
+            combined = stack.enter_context(
+                ParallelClassifier(
+                    CombinedClassifier(
+                        module_classifier,
+                        main_edition_classifier,
+                        text_fields,
+                        main_edition_text_fields,
+                    ),
+                    processes,
+                    chunk_size,
+                )
+            )
+        elif module_classifier:
+            modules = stack.enter_context(
+                ParallelClassifier(module_classifier, processes, chunk_size)
+            )
+        else:
+            main_editions = stack.enter_context(
+                ParallelClassifier(main_edition_classifier, processes, chunk_size)
+            )
+
+        while batch := list(islice(rows, batch_size)):
+            outputs: List[List[str]] = [
+                ["" if value is None else value for value in row.values()]
+                for row in batch
+            ]
+            if combined is not None:
+                for output, prediction in zip(
+                    outputs,
+                    combined.predict_rows(
+                        _text_rows(batch, combined.classifier.fields), k
+                    ),
+                ):
+                    output += _module_values(prediction.modules, k) + [
+                        str(prediction.main_edition),
+                        _format_prob(prediction.main_edition_prob),
+                    ]
+            if modules is not None:
+                predictions = modules.predict_rows(
+                    _text_rows(batch, text_fields), k, text_fields
+                )
+                for output, prediction in zip(outputs, predictions):
+                    output += _module_values(prediction.to_predictions(), k)
+            if main_editions is not None:
+                predicted, true_probs = main_editions.predict_binary_rows(
+                    _text_rows(batch, main_edition_text_fields),
+                    main_edition_text_fields,
+                )
+                for output, main_edition, true_prob in zip(
+                    outputs, predicted.tolist(), true_probs.tolist()
+                ):
+                    output += [str(main_edition), _format_prob(true_prob)]
+            writer.writerows(outputs)
+
+            previous: int = count
+            count += len(batch)
+            if count // progress_interval > previous // progress_interval:
+                _log_progress(count, start)
+    if not count or count % progress_interval:
+        _log_progress(count, start)
+    return count
+
+
+def _text_rows(batch: Sequence[Record], fields: Sequence[str]) -> List[Dict[str, str]]:
+    """The text fields of rows, to send only those to the worker processes."""
+    return [{field: row[field] or "" for field in fields} for row in batch]
+
+
+def _module_values(predictions: List[Prediction], k: int) -> List[str]:
+    values: List[str] = []
+    for prediction in predictions[:k]:
+        values += [str(prediction.module), _format_prob(prediction.prob)]
+    return values + [""] * (2 * k - len(values))
+
+
+def _format_prob(prob: float) -> str:
+    return f"{prob:.4f}"
+
+
+def _log_progress(count: int, start: float):
+    elapsed: float = time.perf_counter() - start
+    LOGGER.info(
+        f"Classified {count} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} rows/s)."
+    )
@@ -0,0 +1,298 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from .settings import PREDICTION_CACHE_SIZE
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# The labels and probabilities predicted for a text
+CachedPrediction = Tuple[List[str], np.ndarray]
+
+# Maximum number of keys per SQLite query
+_QUERY_SIZE: int = 500
+# The SQLite table; files written before probabilities kept their dtype hold a
+# "predictions" table without it, which is ignored
+_TABLE: str = "predictions_v2"
+
+
+@dataclass
+class CacheStats:
+    """Counters of a PredictionCache."""
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class PredictionCache:
+    """Cache model predictions in a bounded in-memory LRU and, optionally, an SQLite file.
+
+    Entries are keyed by a hash of the model's MD5 sum, the prediction engine, the
+    number of predictions, the probability threshold and the cleaned text, so a
+    cache can be shared by several models and engines, and persisted across runs. Entries found in the SQLite file are promoted to the in-memory
+    tier; entries evicted from memory remain in the file.
+
+    The cache is thread-safe. Each process opens its own SQLite connection, so
+    workers forked by a `ParallelClassifier` can share the file.
+    """
+
+    def __init__(
+        self,
+        max_size: int = PREDICTION_CACHE_SIZE,
+        path: Optional[Union[str, "os.PathLike[str]"]] = None,
+    ):
+        """
+        Args:
+            max_size: the maximum number of entries held in memory
+            path: the SQLite file of the persistent tier; if None, only cache in memory.
+        """
+        if max_size < 0:
+            raise ValueError(f"Invalid cache size: {max_size}.")
+        self.max_size: int = max_size
+        self.path: Optional[str] = None if path is None else os.fspath(path)
+        self._entries: "OrderedDict[bytes, CachedPrediction]" = OrderedDict()
+        self._stats: CacheStats = CacheStats()
+        self._lock: threading.Lock = threading.Lock()
+        self._connection: Optional["sqlite3.Connection"] = None
+        self._pid: Optional[int] = None
+
+    @staticmethod
+    def key(
+        model_id: str,
+        k: int,
+        text: str,
+        threshold: float = 0.0,
+        engine: str = "fasttext",
+    ) -> bytes:
+        """The cache key of a cleaned text, predicted by a model (e.g. its MD5 sum) with k labels.
+
+        The engine is part of the key, since the engines' probabilities only agree
+        up to rounding.
+        """
+        return hashlib.blake2b(
+            f"{model_id}\0{engine}\0{k}\0{threshold!r}\0{text}".encode(),
+            digest_size=16,
+        ).digest()
+
+    @property
+    def stats(self) -> CacheStats:
+        """A snapshot of the hit, miss and eviction counters."""
+        with self._lock:
+            return CacheStats(**vars(self._stats))
+
+    def __len__(self) -> int:
+        """The number of entries in memory."""
+        with self._lock:
+            return len(self._entries)
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[CachedPrediction]]:
+        """Look up entries, counting a hit or miss per key.
+
+        Returns:
+            the entry per key, or None if it is not cached.
+        """
+        with self._lock:
+            values: List[Optional[CachedPrediction]] = []
+            missing: List[int] = []
+            for i, key in enumerate(keys):
+                value: Optional[CachedPrediction] = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                else:
+                    missing.append(i)
+                values.append(value)
+            self._stats.hits += len(keys) - len(missing)
+
+            if missing and self.path is not None:
+                stored = self._select([keys[i] for i in missing])
+                still_missing: List[int] = []
+                for i in missing:
+                    value = stored.get(keys[i])
+                    if value is None:
+                        still_missing.append(i)
+                    else:
+                        values[i] = value
+                        self._insert(keys[i], value)
+                self._stats.disk_hits += len(missing) - len(still_missing)
+                self._stats.hits += len(missing) - len(still_missing)
+                missing = still_missing
+            self._stats.misses += len(missing)
+            return values
+
+    def put_many(self, items: Iterable[Tuple[bytes, CachedPrediction]]):
+        """Add entries to memory and to the SQLite file, if any."""
+        items = [(key, _freeze(value)) for key, value in items]
+        with self._lock:
+            for key, value in items:
+                self._insert(key, value)
+            if self.path is not None and items:
+                connection: "sqlite3.Connection" = self._connect()
+                with connection:
+                    connection.executemany(
+                        f"INSERT OR REPLACE INTO {_TABLE} VALUES (?, ?, ?, ?)",
+                        [
+                            (key, "\t".join(labels), probs.dtype.str, probs.tobytes())
+                            for key, (labels, probs) in items
+                        ],
+                    )
+
+    def clear(self):
+        """Remove all entries from memory; the SQLite file is kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        """Close the SQLite connection of this process."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> "PredictionCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _insert(self, key: bytes, value: CachedPrediction):
+        if not self.max_size:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _select(self, keys: List[bytes]) -> Dict[bytes, CachedPrediction]:
+        connection: "sqlite3.Connection" = self._connect()
+        stored: Dict[bytes, CachedPrediction] = {}
+        for start in range(0, len(keys), _QUERY_SIZE):
+            chunk: List[bytes] = keys[start : start + _QUERY_SIZE]
+            rows = connection.execute(
+                f"SELECT key, labels, dtype, probs FROM {_TABLE} WHERE key IN"
+                f" ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, labels, dtype, probs in rows:
+                stored[key] = _freeze(
+                    (
+                        labels.split("\t") if labels else [],
+                        np.frombuffer(probs, np.dtype(dtype)),
+                    )
+                )
+        return stored
+
+    def _connect(self) -> "sqlite3.Connection":
+        # connections must not be used across fork()
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {_TABLE}"
+                " (key BLOB PRIMARY KEY, labels TEXT, dtype TEXT, probs BLOB)"
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+
+def _freeze(value: CachedPrediction) -> CachedPrediction:
+    """Store probabilities as a read-only array (of the model's dtype), as it is shared by all hits."""
+    labels, probs = value
+    if not isinstance(probs, np.ndarray) or probs.flags.writeable:
+        probs = np.array(probs)
+        probs.flags.writeable = False
+    return list(labels), probs
+
+
+class CachedModel:
+    """A FastText model wrapper that looks up predictions in a PredictionCache.
+
+    Identical texts within a call are predicted once, and only texts that are not
+    cached are passed to the model. Other attributes are those of the model.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        cache: PredictionCache,
+        model_id: str,
+        engine: str = "fasttext",
+    ):
+        """
+        Args:
+            model: the FastText model
+            cache: the cache
+            model_id: identifies the model in cache keys, e.g. its MD5 sum.
+            engine: the prediction engine of the model, "fasttext" or "numpy"
+        """
+        self.model: Any = model
+        self.cache: PredictionCache = cache
+        self.model_id: str = model_id
+        self.engine: str = engine
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def predict(
+        self, texts: Union[str, List[str]], k: int = 1, threshold: float = 0.0
+    ) -> Tuple[List[List[str]], List[np.ndarray]]:
+        """Predict as the model's `predict()`, looking up the cache first.
+
+        Returns copies of the cached labels and probabilities, which callers may
+        modify.
+        """
+        if isinstance(texts, str):
+            labels, probs = self.predict([texts], k, threshold)
+            return labels[0], probs[0]
+
+        unique: List[str] = list(dict.fromkeys(texts))
+        keys: List[bytes] = [
+            PredictionCache.key(self.model_id, k, text, threshold, self.engine)
+            for text in unique
+        ]
+        cached: List[Optional[CachedPrediction]] = self.cache.get_many(keys)
+
+        misses: List[int] = [i for i, value in enumerate(cached) if value is None]
+        if misses:
+            labels, probs = self.model.predict(
+                [unique[i] for i in misses], k, threshold
+            )
+            predicted: List[CachedPrediction] = [
+                _freeze(value) for value in zip(labels, probs)
+            ]
+            self.cache.put_many(zip([keys[i] for i in misses], predicted))
+            for i, value in zip(misses, predicted):
+                cached[i] = value
+
+        predictions: Dict[str, CachedPrediction] = dict(zip(unique, cached))
+        return (
+            [list(predictions[text][0]) for text in texts],
+            [predictions[text][1].copy() for text in texts],
+        )
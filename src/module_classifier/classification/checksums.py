@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+from typing import Any, Dict, Optional
+
+from .settings import MD5_CHUNK_SIZE, MD5_SIDECAR_SUFFIX
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+def file_md5(path: str, chunk_size: int = MD5_CHUNK_SIZE) -> str:
+    """The MD5 sum of a file, hashed in chunks of a memory map.
+
+    Only the pages of the current chunk need to be in memory, rather than a copy of
+    the whole file.
+    """
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with memoryview(data) as view:
+                    for start in range(0, len(view), chunk_size):
+                        md5.update(view[start : start + chunk_size])
+    return md5.hexdigest()
+
+
+def verified_md5(path: str) -> str:
+    """The MD5 sum of a file, read from its sidecar file if the file is unchanged.
+
+    The sidecar file (the path plus MD5_SIDECAR_SUFFIX) records the size,
+    modification time and inode of the file when it was hashed. If they differ,
+    or the sidecar file is missing or invalid, the file is hashed and the sidecar
+    file rewritten. Sidecar files are skipped in directories that are not
+    writable, and when they cannot be written.
+    """
+    signature: Dict[str, int] = _signature(path)
+    recorded: Optional[Dict[str, Any]] = _read_sidecar(path + MD5_SIDECAR_SUFFIX)
+    if recorded is not None and all(
+        recorded.get(key) == value for key, value in signature.items()
+    ):
+        return recorded["md5"]
+
+    md5: str = file_md5(path)
+    _write_sidecar(path, {**signature, "md5": md5})
+    return md5
+
+
+def record_md5(path: str, md5: str):
+    """Record the MD5 sum of a file in its sidecar file, e.g. when verified while downloading."""
+    _write_sidecar(path, {**_signature(path), "md5": md5})
+
+
+def _signature(path: str) -> Dict[str, int]:
+    stat: os.stat_result = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "inode": stat.st_ino}
+
+
+def _write_sidecar(path: str, recorded: Dict[str, Any]):
+    sidecar: str = path + MD5_SIDECAR_SUFFIX
+    if not os.access(os.path.dirname(sidecar) or ".", os.W_OK):
+        LOGGER.debug(f"Skipping MD5 sidecar file '{sidecar}' in a read-only directory.")
+        return
+    temporary: str = f"{sidecar}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "w") as f:
+            json.dump(recorded, f)
+        os.replace(temporary, sidecar)
+    except OSError as e:
+        LOGGER.debug(f"Could not write MD5 sidecar file '{sidecar}': {e}")
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _read_sidecar(sidecar: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(sidecar) as f:
+            recorded: Any = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(recorded, dict) or not isinstance(recorded.get("md5"), str):
+        return None
+    return recorded
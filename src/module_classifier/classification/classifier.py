@@ -1,29 +1,129 @@
-import hashlib
 import logging
 import os
+import queue
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Iterable, List
+from functools import cached_property
+from itertools import chain, islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import boto3
-import fasttext
 import numpy as np
-from botocore import UNSIGNED
-from botocore.client import Config
 from fasttext.FastText import _FastText
 
-from ..preprocessing import clean
-from ..preprocessing.settings import CLASS_FIELD, LABEL_PREFIX, TEXT_FIELDS
+from ..preprocessing import clean, clean_column, column_values
+from ..preprocessing.settings import (
+    CLASS_FIELD,
+    FIELD_CHAR_BUDGETS,
+    FIELD_TOKEN_BUDGETS,
+    LABEL_PREFIX,
+    TEXT_FIELDS,
+)
+from . import download, registry
+from .cache import CachedModel, PredictionCache
+from .engine import ENGINE_REGISTRY, NumpyModel
+from .labels import LabelTable
+from .settings import PREDICTION_BATCH_SIZE, PREDICTION_ENGINE
+
+T = TypeVar("T")
 
 
 class Classifier(ABC):
-    model: _FastText
+    DEFAULT_TEXT_FIELDS: Iterable[str] = TEXT_FIELDS
+
+    model: Union[_FastText, NumpyModel]
+
+    def __init__(self, model_path: str, engine: str = PREDICTION_ENGINE):
+        """
+        Args:
+            model_path: the model file
+            engine: the implementation of predictions, "fasttext" or "numpy";
+                see `set_engine()`.
+        """
+        self.model_path: str = model_path
+        # shared by all classifiers of the same model file
+        self.model = _models(engine).get(model_path)
+
+    @property
+    def engine(self) -> str:
+        """The implementation of predictions, "fasttext" or "numpy"."""
+        model = self.model.model if isinstance(self.model, CachedModel) else self.model
+        return "numpy" if isinstance(model, NumpyModel) else "fasttext"
+
+    def set_engine(self, engine: str):
+        """Select the implementation of predictions.
+
+        "fasttext" predicts with the FastText library; "numpy" with a `NumpyModel`
+        built from the matrices of the same model file, which predicts batches in
+        vectorized NumPy code (with the same results, up to rounding). A prediction
+        cache set with `set_cache()` is kept.
+
+        Args:
+            engine: "fasttext" or "numpy"
+        """
+        model: Union[_FastText, NumpyModel] = _models(engine).get(self.model_path)
+        if isinstance(self.model, CachedModel):
+            self.model = CachedModel(
+                model, self.model.cache, self.model.model_id, engine
+            )
+        else:
+            self.model = model
 
-    def __init__(self, model_path: str):
-        self.model = fasttext.load_model(path=model_path)
+    @cached_property
+    def model_md5(self) -> str:
+        """The MD5 sum of the model file."""
+        return registry.REGISTRY.md5(self.model_path)
+
+    @property
+    def cache(self) -> Optional[PredictionCache]:
+        """The prediction cache, if enabled with `set_cache()`."""
+        return self.model.cache if isinstance(self.model, CachedModel) else None
+
+    def set_cache(
+        self, cache: Optional[PredictionCache], model_id: Optional[str] = None
+    ):
+        """Look up the model's predictions in a cache before calling the model.
+
+        Texts are looked up after cleaning, and identical texts within a batch are
+        only predicted once. Entries are also keyed by the engine, see `set_engine()`.
+
+        Args:
+            cache: the cache; if None, disable caching.
+            model_id: identifies the model in cache keys; defaults to `model_md5`.
+        """
+        model: Union[_FastText, NumpyModel] = (
+            self.model.model if isinstance(self.model, CachedModel) else self.model
+        )
+        if cache is None:
+            self.model = model
+        else:
+            self.model = CachedModel(
+                model, cache, model_id or self.model_md5, self.engine
+            )
+
+    @cached_property
+    def label_table(self) -> LabelTable:
+        """The model's labels, built once per loaded model."""
+        return LabelTable(self.model.get_labels(), self._deserialize_label)
+
+    @staticmethod
+    def _deserialize_label(label: str) -> Any:
+        return label[len(LABEL_PREFIX) :]
 
     @property
     def raw_labels(self) -> List[str]:
-        return self.model.get_labels()
+        return self.label_table.raw_labels
 
     @property
     def labels(self) -> List[str]:
@@ -37,13 +137,30 @@ class Classifier(ABC):
     def _predict(self, texts: List[str], k: int) -> List[Any]:
         return NotImplemented
 
+    def _clean_texts(self, texts: List[str]) -> List[str]:
+        """Prepare input texts for the model, as in `predict_texts()`."""
+        return texts
+
     @staticmethod
     def fasttext_line(
         row: Dict[str, str],
         text_fields: Iterable[str] = TEXT_FIELDS,
         class_field: str = CLASS_FIELD,
+        *,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
         **kwargs,
     ) -> str:
+        """Generate a FastText line from a row.
+
+        Args:
+            row: a dictionary
+            text_fields: the fields to extract text from;
+                if empty, uses all fields in the row.
+            class_field: the field containing the label; omitted if not in the row.
+            token_budgets: the maximum number of tokens to extract per field.
+            char_budgets: the maximum number of characters to scan per field.
+        """
         if text_fields:
             # validate that specified text fields are present
             for field in text_fields:
@@ -53,7 +170,61 @@ class Classifier(ABC):
             text_fields = row.keys()
 
         label: str = LABEL_PREFIX + row[class_field] if class_field in row else ""
-        return " ".join([label] + [clean(row[field]) for field in text_fields]).strip()
+        return " ".join(
+            [label]
+            + [
+                clean(
+                    row[field],
+                    max_tokens=token_budgets.get(field),
+                    max_chars=char_budgets.get(field),
+                )
+                for field in text_fields
+            ]
+        ).strip()
+
+    @staticmethod
+    def fasttext_lines(
+        columns: Mapping[str, Sequence[str]],
+        text_fields: Iterable[str] = TEXT_FIELDS,
+        *,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
+    ) -> List[str]:
+        """Generate (unlabelled) FastText lines from columnar input.
+
+        Each distinct value of a column is cleaned only once.
+
+        Args:
+            columns: a mapping of column names to sequences of equal length,
+                e.g. lists, NumPy arrays, pandas or pyarrow columns.
+            text_fields: the columns to extract text from;
+                if empty, uses all columns.
+            token_budgets: the maximum number of tokens to extract per field.
+            char_budgets: the maximum number of characters to scan per field.
+
+        Returns:
+            a list of FastText lines, one per row; identical to `fasttext_line()`
+            applied to each row.
+        """
+        if text_fields:
+            for field in text_fields:
+                if field not in columns:
+                    raise ValueError(f"Missing input field: '{field}'.")
+        else:
+            text_fields = columns.keys()
+
+        cleaned_columns: List[List[str]] = [
+            clean_column(
+                column_values(columns[field]),
+                max_tokens=token_budgets.get(field),
+                max_chars=char_budgets.get(field),
+            )
+            for field in text_fields
+        ]
+        if len({len(column) for column in cleaned_columns}) > 1:
+            raise ValueError("Input columns differ in length.")
+
+        return [" ".join(fields).strip() for fields in zip(*cleaned_columns)]
 
     def predict_text(self, text: str, k: int = 1) -> List[Any]:
         return self.predict_texts([text], k)[0]
@@ -68,18 +239,150 @@ class Classifier(ABC):
     ) -> List[Any]:
         return self.predict_rows([row], k)[0]
 
-    def prediction_probs(self, texts: List[str], k: int) -> np.ndarray:
-        predictions: List[Any] = self.predict_texts(texts, k)
-        all_probs: List[np.ndarray] = [
-            p.get_probabilities(self.raw_labels) for p in predictions
+    def predict_stream(
+        self,
+        inputs: Iterable[Union[str, Mapping[str, str]]],
+        k: int = 1,
+        batch_size: int = PREDICTION_BATCH_SIZE,
+        *,
+        text_fields: Optional[Iterable[str]] = None,
+        prefetch: int = 0,
+    ) -> Iterator[Any]:
+        """Predict labels for a stream of texts or rows in fixed-size batches.
+
+        Inputs are read lazily, so at most `(prefetch + 2) * batch_size` inputs
+        and their predictions are held in memory, however long the stream.
+
+        Args:
+            inputs: texts, prepared as in `predict_texts()`, or rows such as the
+                records of `Preprocessor.read_csv()`
+            k: the number of predictions to output per input
+            batch_size: the number of inputs passed to the model at once
+            text_fields: the fields of rows to extract text from;
+                defaults to the classifier's DEFAULT_TEXT_FIELDS.
+            prefetch: the number of batches read and prepared ahead in a background
+                thread; if 0, inputs are read in the calling thread.
+
+        Yields:
+            one prediction per input, in input order, as in `predict_texts()`.
+        """
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}.")
+        if prefetch < 0:
+            raise ValueError(f"Invalid prefetch depth: {prefetch}.")
+        if text_fields is None:
+            text_fields = self.DEFAULT_TEXT_FIELDS
+        text_fields = tuple(text_fields)
+
+        batches: Iterator[List[str]] = (
+            self._prepare_batch(batch, text_fields)
+            for batch in _batches(inputs, batch_size)
+        )
+        if prefetch:
+            batches = _prefetch(batches, prefetch)
+        for batch in batches:
+            yield from self._predict(batch, k)
+
+    def _prepare_batch(
+        self, batch: List[Union[str, Mapping[str, str]]], text_fields: Iterable[str]
+    ) -> List[str]:
+        """Clean texts and convert rows into (unlabelled) FastText lines."""
+        if all(isinstance(item, str) for item in batch):
+            return self._clean_texts(batch)
+        return [
+            (
+                self._clean_texts([item])[0]
+                if isinstance(item, str)
+                else self.fasttext_line(item, text_fields, None)
+            )
+            for item in batch
         ]
-        return np.array(all_probs)
+
+    def predict_columns(
+        self,
+        columns: Mapping[str, Sequence[str]],
+        k: int = 1,
+        text_fields: Optional[Iterable[str]] = None,
+    ) -> List[Any]:
+        """Predict labels for columnar input, see `fasttext_lines()`.
+
+        Args:
+            columns: a mapping of column names to sequences of equal length
+            k: the number of predictions to output per row
+            text_fields: the columns to extract text from;
+                defaults to the classifier's DEFAULT_TEXT_FIELDS.
+
+        Returns:
+            one prediction per row, as in `predict_rows()`.
+        """
+        if text_fields is None:
+            text_fields = self.DEFAULT_TEXT_FIELDS
+        return self._predict(self.fasttext_lines(columns, text_fields), k)
+
+    def predict_proba(self, texts: List[str], k: int = -1) -> np.ndarray:
+        """Predict the probabilities of all labels for a batch of texts.
+
+        Args:
+            texts: the input texts, prepared as in `predict_texts()`
+            k: the number of most probable labels per text to predict; all labels if -1.
+                The probabilities of the other labels are 0.
+
+        Returns:
+            an (n, L) float32 matrix with a row per text and a column per label,
+            in the order of `raw_labels`.
+        """
+        return self._predict_proba(self._clean_texts(texts), k)
+
+    def _predict_proba(self, texts: List[str], k: int) -> np.ndarray:
+        probs: np.ndarray = np.zeros((len(texts), len(self.label_table)), np.float32)
+        counts, label_ids, scores = self._predict_arrays(texts, k)
+        probs[np.repeat(np.arange(len(texts)), counts), label_ids] = scores
+        return probs
+
+    def _predict_arrays(
+        self, texts: List[str], k: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Predict labels for (cleaned) texts as flat arrays.
+
+        Returns:
+            the number of predicted labels per text, and the label indices (see
+            `label_table`) and probabilities of all predictions, in order.
+        """
+        if not texts:
+            return np.empty(0, np.intp), np.empty(0, np.intp), np.empty(0, np.float32)
+        if isinstance(self.model, NumpyModel):
+            # its label indices are those of `label_table`, in the order of get_labels()
+            return self.model.predict_arrays(texts, k)
+
+        labels: List[List[str]]
+        scores: List[np.ndarray]
+        labels, scores = self.model.predict(texts, k)
+        counts: np.ndarray = np.fromiter(map(len, labels), np.intp, len(labels))
+        label_ids: np.ndarray = self.label_table.indices(
+            chain.from_iterable(labels), counts.sum()
+        )
+        return counts, label_ids, np.concatenate(scores).astype(np.float32, copy=False)
+
+    def prediction_probs(self, texts: List[str], k: int) -> np.ndarray:
+        """The probabilities of all labels, see `predict_proba()`."""
+        return self.predict_proba(texts, k).astype(np.float64)
 
     @classmethod
     def from_s3(
         cls, bucket: str, object_name: str, local_path: str, check_md5: bool = False
     ) -> "Classifier":
+        """Load a model file, downloading it from S3 unless a (valid) copy exists.
+
+        See `download.download_model()`: the file is downloaded in concurrent parts
+        to a temporary file, resumed if interrupted, and only renamed into place
+        once complete. Processes sharing `local_path` download the file once.
 
+        Args:
+            bucket: the S3 bucket
+            object_name: the key of the model file
+            local_path: the local model file
+            check_md5: if True, the file must have the MD5 sum in its extension.
+        """
         if os.path.exists(local_path) and (
             not check_md5 or Classifier.validate_md5(local_path)
         ):
@@ -87,13 +390,13 @@ class Classifier(ABC):
                 f"Model file '{local_path}' already exists. Skipping download."
             )
         else:
-            logging.info(
-                f"Downloading model from 's3://{bucket}/{object_name}' to '{local_path}'."
+            download.download_model(
+                download.s3_client(),
+                bucket,
+                object_name,
+                local_path,
+                expected_md5=_md5_extension(local_path) if check_md5 else None,
             )
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            s3 = boto3.client("s3", config=Config(signature_version=UNSIGNED))
-
-            s3.download_file(bucket, object_name, local_path)
 
         return cls(local_path)
 
@@ -101,13 +404,75 @@ class Classifier(ABC):
     def validate_md5(filename: str) -> bool:
         if not os.path.isfile(filename):
             raise ValueError(f"'{filename}' does not exist or is not a file.")
+        return registry.REGISTRY.md5(filename) == _md5_extension(filename)
 
-        _, extension = os.path.splitext(filename)
-        extension = extension[1:]
-        if len(extension) != 32:
-            raise ValueError(
-                f"File '{filename}' does not have a valid MD5 sum extension ('{extension}')."
-            )
-        with open(filename, "rb") as f:
-            md5: str = hashlib.md5(f.read()).hexdigest()
-        return md5 == extension
+
+def _md5_extension(filename: str) -> str:
+    """The MD5 sum in the extension of a model file name."""
+    _, extension = os.path.splitext(filename)
+    extension = extension[1:]
+    if len(extension) != 32:
+        raise ValueError(
+            f"File '{filename}' does not have a valid MD5 sum extension ('{extension}')."
+        )
+    return extension
+
+
+def _models(engine: str) -> registry.ModelRegistry:
+    """The registry of the models of a prediction engine."""
+    if engine == "fasttext":
+        return registry.REGISTRY
+    if engine == "numpy":
+        return ENGINE_REGISTRY
+    raise ValueError(f"Invalid prediction engine: '{engine}'.")
+
+
+def _batches(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator: Iterator[T] = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+_END = object()
+
+
+def _prefetch(items: Iterator[T], depth: int) -> Iterator[T]:
+    """Iterate in a background thread, buffering up to `depth` items ahead.
+
+    Exceptions raised by the iterator are re-raised in the consuming thread. If the
+    consumer stops early, the background thread stops after its current item.
+    """
+    buffer: queue.Queue = queue.Queue(depth)
+    stopped = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except BaseException as e:
+            put((_END, e))
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _END:
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
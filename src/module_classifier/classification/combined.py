@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from ..preprocessing import clean_column, column_values
+from ..preprocessing.settings import (
+    FIELD_CHAR_BUDGETS,
+    FIELD_TOKEN_BUDGETS,
+    MAIN_EDITION_TEXT_FIELDS,
+    TEXT_FIELDS,
+)
+from .binary_classifier import MainEditionClassifier
+from .module_classifier import ModuleClassifier, Prediction, PredictionBatch
+
+
+@dataclass
+class CombinedPrediction:
+    """The predictions of both classifiers for a row."""
+
+    modules: List[Prediction]
+    main_edition: bool
+    # the probability of being a main edition, i.e. of the True label
+    main_edition_prob: float
+
+
+class CombinedClassifier:
+    """Predict the modules and the main edition label of rows at once.
+
+    The module and main edition classifiers read overlapping text fields. Here,
+    each field of the union is cleaned once per batch (each distinct value only
+    once, as in `Classifier.fasttext_lines()`), and the FastText lines of both
+    models are assembled from the cleaned fields. The lines are identical to those
+    of the classifiers' own `fasttext_line()`.
+    """
+
+    def __init__(
+        self,
+        module_classifier: ModuleClassifier,
+        main_edition_classifier: MainEditionClassifier,
+        text_fields: Iterable[str] = TEXT_FIELDS,
+        main_edition_text_fields: Iterable[str] = MAIN_EDITION_TEXT_FIELDS,
+        *,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
+    ):
+        """
+        Args:
+            module_classifier: the module classifier
+            main_edition_classifier: the main edition classifier
+            text_fields: the fields the module classifier reads
+            main_edition_text_fields: the fields the main edition classifier reads
+            token_budgets: the maximum number of tokens to extract per field.
+            char_budgets: the maximum number of characters to scan per field.
+        """
+        self.module_classifier: ModuleClassifier = module_classifier
+        self.main_edition_classifier: MainEditionClassifier = main_edition_classifier
+        self.text_fields: Tuple[str, ...] = tuple(text_fields)
+        self.main_edition_text_fields: Tuple[str, ...] = tuple(main_edition_text_fields)
+        if not self.text_fields or not self.main_edition_text_fields:
+            raise ValueError("Text fields must not be empty.")
+        self.token_budgets: Mapping[str, int] = token_budgets
+        self.char_budgets: Mapping[str, int] = char_budgets
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """The union of the text fields of both classifiers, in order."""
+        return tuple(dict.fromkeys(self.text_fields + self.main_edition_text_fields))
+
+    def __reduce__(self):
+        # pickled by model paths, e.g. for the spawned workers of a ParallelClassifier
+        return _load, (
+            self.module_classifier.model_path,
+            self.main_edition_classifier.model_path,
+            self.module_classifier.engine,
+            self.main_edition_classifier.engine,
+            self.text_fields,
+            self.main_edition_text_fields,
+            dict(self.token_budgets),
+            dict(self.char_budgets),
+        )
+
+    def fasttext_lines(
+        self, columns: Mapping[str, Sequence[str]]
+    ) -> Tuple[List[str], List[str]]:
+        """Generate the (unlabelled) FastText lines of both classifiers.
+
+        Args:
+            columns: a mapping of column names to sequences of equal length,
+                as in `Classifier.fasttext_lines()`
+
+        Returns:
+            the lines of the module classifier and those of the main edition
+            classifier, one per row.
+        """
+        for field in self.fields:
+            if field not in columns:
+                raise ValueError(f"Missing input field: '{field}'.")
+
+        cleaned: Dict[str, List[str]] = {
+            field: clean_column(
+                column_values(columns[field]),
+                max_tokens=self.token_budgets.get(field),
+                max_chars=self.char_budgets.get(field),
+            )
+            for field in self.fields
+        }
+        if len({len(column) for column in cleaned.values()}) > 1:
+            raise ValueError("Input columns differ in length.")
+
+        return _join(cleaned, self.text_fields), _join(
+            cleaned, self.main_edition_text_fields
+        )
+
+    def predict_columns(
+        self, columns: Mapping[str, Sequence[str]], k: int = 1
+    ) -> List[CombinedPrediction]:
+        """Predict the modules and the main edition label for columnar input.
+
+        Args:
+            columns: a mapping of column names to sequences of equal length
+            k: the number of modules to predict per row
+
+        Returns:
+            one prediction per row.
+        """
+        module_lines, main_edition_lines = self.fasttext_lines(columns)
+        modules: PredictionBatch = self.module_classifier._predict_batch(
+            module_lines, k
+        )
+        main_editions, true_probs, _ = self.main_edition_classifier._predict_binary(
+            main_edition_lines
+        )
+        return [
+            CombinedPrediction(predictions, main_edition, true_prob)
+            for predictions, main_edition, true_prob in zip(
+                modules, main_editions.tolist(), true_probs.tolist()
+            )
+        ]
+
+    def predict_rows(
+        self, rows: List[Dict[str, str]], k: int = 1, columns: Iterable[str] = ()
+    ) -> List[CombinedPrediction]:
+        """Predict the modules and the main edition label for rows.
+
+        Args:
+            rows: dictionaries holding (at least) the text fields
+            k: the number of modules to predict per row
+            columns: ignored, the text fields are given to the constructor;
+                for compatibility with `ParallelClassifier`.
+
+        Returns:
+            one prediction per row.
+        """
+        for row in rows:
+            for field in self.fields:
+                if field not in row:
+                    raise ValueError(f"Missing input field: '{field}'.")
+        return self.predict_columns(
+            {field: [row[field] for row in rows] for field in self.fields}, k
+        )
+
+    def predict_row(self, row: Dict[str, str], k: int = 1) -> CombinedPrediction:
+        return self.predict_rows([row], k)[0]
+
+
+def _join(cleaned: Mapping[str, List[str]], fields: Sequence[str]) -> List[str]:
+    return [" ".join(values).strip() for values in zip(*(cleaned[f] for f in fields))]
+
+
+def _load(
+    module_model_path: str,
+    main_edition_model_path: str,
+    module_engine: str,
+    main_edition_engine: str,
+    text_fields: Tuple[str, ...],
+    main_edition_text_fields: Tuple[str, ...],
+    token_budgets: Mapping[str, int],
+    char_budgets: Mapping[str, int],
+) -> CombinedClassifier:
+    return CombinedClassifier(
+        ModuleClassifier(module_model_path, module_engine),
+        MainEditionClassifier(main_edition_model_path, main_edition_engine),
+        text_fields,
+        main_edition_text_fields,
+        token_budgets=token_budgets,
+        char_budgets=char_budgets,
+    )
@@ -0,0 +1,281 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .checksums import record_md5, verified_md5
+from .settings import S3_MAX_CONCURRENCY, S3_PART_SIZE, S3_RETRIES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# Suffixes of the partially downloaded file, its download state and the lock file
+PART_SUFFIX: str = ".part"
+STATE_SUFFIX: str = ".part.json"
+LOCK_SUFFIX: str = ".lock"
+
+_MD5_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# The first and last byte of a part
+Part = Tuple[int, int]
+
+
+def s3_client() -> Any:
+    """An anonymous S3 client."""
+    # imported here, as boto3 takes longer to import than the rest of the package
+    import boto3
+    from botocore import UNSIGNED
+    from botocore.client import Config
+
+    return boto3.client(
+        "s3",
+        config=Config(
+            signature_version=UNSIGNED, max_pool_connections=S3_MAX_CONCURRENCY
+        ),
+    )
+
+
+def download_model(
+    client: Any,
+    bucket: str,
+    object_name: str,
+    local_path: str,
+    *,
+    expected_md5: Optional[str] = None,
+    part_size: int = S3_PART_SIZE,
+    max_concurrency: int = S3_MAX_CONCURRENCY,
+    retries: int = S3_RETRIES,
+) -> str:
+    """Download an S3 object to a local file, unless a valid copy exists.
+
+    The object is fetched in ranged parts by `max_concurrency` threads and written
+    to `local_path + PART_SUFFIX`; the parts written so far are recorded in
+    `local_path + STATE_SUFFIX`, so an interrupted download resumes where it
+    stopped, unless the object has changed in the meantime. The MD5 sum is computed
+    while the parts are written in order, and the file is only renamed to
+    `local_path` if it matches, so `local_path` is never a truncated file.
+
+    Processes downloading to the same path hold a lock on `local_path + LOCK_SUFFIX`:
+    one of them downloads the file, the others wait and then use it.
+
+    Args:
+        client: an S3 client, e.g. from `s3_client()`
+        bucket: the S3 bucket
+        object_name: the key of the object
+        local_path: the target file
+        expected_md5: the MD5 sum the file must have. If None, the ETag of the
+            object is used if it is an MD5 sum, i.e. not a multipart upload.
+        part_size: the size of the ranged parts in bytes
+        max_concurrency: the number of parts downloaded at once
+        retries: the number of times a failed part is retried
+
+    Returns:
+        the MD5 sum of the file
+
+    Raises:
+        ValueError: if the downloaded file does not have the expected MD5 sum
+    """
+    if part_size < 1:
+        raise ValueError(f"Invalid part size: {part_size}.")
+    if max_concurrency < 1:
+        raise ValueError(f"Invalid concurrency: {max_concurrency}.")
+
+    directory: str = os.path.dirname(local_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with _file_lock(local_path + LOCK_SUFFIX):
+        if os.path.isfile(local_path):
+            md5: str = verified_md5(local_path)
+            if expected_md5 is None or md5 == expected_md5:
+                LOGGER.info(f"Model file '{local_path}' already exists.")
+                return md5
+            LOGGER.warning(
+                f"Model file '{local_path}' has MD5 sum {md5} instead of {expected_md5}."
+            )
+
+        head: Dict[str, Any] = client.head_object(Bucket=bucket, Key=object_name)
+        size: int = head["ContentLength"]
+        etag: str = head.get("ETag", "").strip('"')
+        if expected_md5 is None and _MD5_PATTERN.fullmatch(etag):
+            expected_md5 = etag
+
+        LOGGER.info(
+            f"Downloading 's3://{bucket}/{object_name}' ({size} bytes) to '{local_path}'."
+        )
+        md5 = _download_parts(
+            client,
+            bucket,
+            object_name,
+            local_path,
+            size=size,
+            etag=etag,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            retries=retries,
+        )
+
+        part_path: str = local_path + PART_SUFFIX
+        if expected_md5 is not None and md5 != expected_md5:
+            _remove(part_path, local_path + STATE_SUFFIX)
+            raise ValueError(
+                f"Downloaded 's3://{bucket}/{object_name}' has MD5 sum {md5}"
+                f" instead of {expected_md5}."
+            )
+        os.replace(part_path, local_path)
+        record_md5(local_path, md5)
+        _remove(local_path + STATE_SUFFIX)
+        return md5
+
+
+def _download_parts(
+    client: Any,
+    bucket: str,
+    object_name: str,
+    local_path: str,
+    *,
+    size: int,
+    etag: str,
+    part_size: int,
+    max_concurrency: int,
+    retries: int,
+) -> str:
+    """Download the missing parts to the part file, and hash the whole file in order."""
+    part_path: str = local_path + PART_SUFFIX
+    state_path: str = local_path + STATE_SUFFIX
+    state: Dict[str, Any] = {"size": size, "etag": etag, "part_size": part_size}
+
+    recorded: Optional[Dict[str, Any]] = _read_state(state_path)
+    done: List[int] = []
+    if (
+        recorded is not None
+        and all(recorded.get(key) == value for key, value in state.items())
+        and os.path.isfile(part_path)
+        and os.path.getsize(part_path) == size
+    ):
+        done = recorded.get("done", [])
+        LOGGER.info(f"Resuming download with {len(done)} part(s) on disk.")
+    state["done"] = done
+    if not done:
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+        _write_state(state_path, state)
+
+    parts: List[Part] = [
+        (start, min(start + part_size, size) - 1) for start in range(0, size, part_size)
+    ]
+    on_disk: Set[int] = set(done)
+    missing: Iterator[int] = (i for i in range(len(parts)) if i not in on_disk)
+    window: int = 2 * max_concurrency
+    md5 = hashlib.md5()
+
+    executor = ThreadPoolExecutor(max_concurrency)
+    futures: "OrderedDict[int, Future[bytes]]" = OrderedDict()
+    try:
+        with open(part_path, "r+b") as f:
+            for i, (first, last) in enumerate(parts):
+                # keep up to `window` parts in flight, ahead of the part being written
+                while len(futures) < window:
+                    j: Optional[int] = next(missing, None)
+                    if j is None:
+                        break
+                    futures[j] = executor.submit(
+                        _get_part, client, bucket, object_name, parts[j], retries
+                    )
+
+                f.seek(first)
+                if i in futures:
+                    data: bytes = futures.pop(i).result()
+                    if len(data) != last - first + 1:
+                        raise IOError(
+                            f"Received {len(data)} bytes for range {first}-{last}."
+                        )
+                    f.write(data)
+                    # the state must not record parts that are not written yet
+                    f.flush()
+                    done.append(i)
+                    _write_state(state_path, state)
+                else:
+                    data = f.read(last - first + 1)
+                md5.update(data)
+    finally:
+        # as shutdown(cancel_futures=True), which requires Python 3.9
+        for future in futures.values():
+            future.cancel()
+        executor.shutdown(wait=True)
+    return md5.hexdigest()
+
+
+def _get_part(
+    client: Any, bucket: str, object_name: str, part: Part, retries: int
+) -> bytes:
+    first, last = part
+    attempt: int = 0
+    while True:
+        try:
+            response: Dict[str, Any] = client.get_object(
+                Bucket=bucket, Key=object_name, Range=f"bytes={first}-{last}"
+            )
+            return response["Body"].read()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            attempt += 1
+            LOGGER.warning(f"Download of range {first}-{last} failed ({e}), retrying.")
+
+
+def _read_state(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            state: Any = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def _write_state(path: str, state: Dict[str, Any]):
+    temporary: str = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+
+def _remove(*paths: str):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on a file, shared between threads and processes."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
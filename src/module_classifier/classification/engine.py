@@ -0,0 +1,599 @@
+import mmap
+import re
+import struct
+import threading
+from itertools import chain
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..preprocessing.settings import LABEL_PREFIX
+from .registry import ModelRegistry
+from .settings import ENGINE_CHUNK_TOKENS, ENGINE_TOKEN_CACHE_SIZE
+
+# The binary model format of fastText 0.9.2 (see its args.cc, dictionary.cc,
+# densematrix.cc, quantmatrix.cc and productquantizer.cc)
+_MAGIC: int = 793712314
+_VERSION: int = 12
+_EOS: str = "</s>"
+_BOW: str = "<"
+_EOW: str = ">"
+# The number of centroids per sub-quantizer of a quantized matrix
+_KSUB: int = 256
+_WORD_NGRAM_FACTOR: np.uint64 = np.uint64(116049371)
+_FNV_OFFSET: np.uint32 = np.uint32(2166136261)
+_FNV_PRIME: np.uint32 = np.uint32(16777619)
+# fastText returns exp(log(p + _LOG_EPSILON)) as the probability p
+_LOG_EPSILON: float = 1e-5
+# fastText's sigmoid lookup table for the one-vs-all and negative sampling losses
+_SIGMOID_TABLE_SIZE: int = 512
+_MAX_SIGMOID: float = 8.0
+
+# The loss functions and models of fastText's Args
+_HIERARCHICAL_SOFTMAX, _NEGATIVE_SAMPLING, _SOFTMAX, _ONE_VS_ALL = 1, 2, 3, 4
+_SUPERVISED: int = 3
+
+# The number of new tokens whose subwords are hashed and summed at once
+_NEW_TOKENS_BATCH: int = 4096
+# _segment_sum() adds rows by rank if the longest segment holds at most this
+# fraction of the rows, i.e. for batches of many segments
+_RANK_SUM_FRACTION: int = 32
+
+# Tokens are separated by the same characters as in fastText's Dictionary::readWord()
+_TOKEN_PATTERN: re.Pattern = re.compile(r"[^ \n\r\t\v\f\0]+")
+
+
+class _Args(NamedTuple):
+    """The training arguments stored in a model file."""
+
+    dim: int
+    ws: int
+    epoch: int
+    min_count: int
+    neg: int
+    word_ngrams: int
+    loss: int
+    model: int
+    bucket: int
+    minn: int
+    maxn: int
+    lr_update_rate: int
+    t: float
+
+
+class _DenseMatrix:
+    def __init__(self, data: np.ndarray):
+        self.data: np.ndarray = data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def rows(self, ids: np.ndarray) -> np.ndarray:
+        return self.data[ids]
+
+
+class _QuantizedMatrix:
+    """A product-quantized matrix, dequantized row by row.
+
+    Each row is split into sub-vectors of `dsub` columns (the last one possibly
+    shorter), each encoded by the index of one of 256 centroids; rows may be
+    scaled by a quantized norm.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        centroids: np.ndarray,
+        dim: int,
+        norm_codes: Optional[np.ndarray] = None,
+        norms: Optional[np.ndarray] = None,
+    ):
+        """
+        Args:
+            codes: an (m, nsubq) array of centroid indices
+            centroids: an (nsubq, 256, dsub) array of centroids, the last
+                sub-quantizer's padded with zeros
+            dim: the number of columns
+            norm_codes: the index of the norm per row, if rows are scaled
+            norms: the 256 norms
+        """
+        self.codes: np.ndarray = codes
+        self.centroids: np.ndarray = centroids
+        self.dim: int = dim
+        self.norm_codes: Optional[np.ndarray] = norm_codes
+        self.norms: Optional[np.ndarray] = norms
+        self._subquantizers: np.ndarray = np.arange(len(centroids))
+        # the number of columns, including the padding of the last sub-quantizer
+        self._width: int = centroids.shape[0] * centroids.shape[2]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def rows(self, ids: np.ndarray) -> np.ndarray:
+        rows: np.ndarray = self.centroids[self._subquantizers, self.codes[ids]]
+        rows = rows.reshape(len(ids), self._width)[:, : self.dim]
+        if self.norm_codes is not None:
+            rows *= self.norms[self.norm_codes[ids]][:, np.newaxis]
+        return rows
+
+
+class _Reader:
+    """Reads the fields of a model file from a buffer."""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        self.buffer: Union[bytes, mmap.mmap] = buffer
+        self.offset: int = 0
+
+    def unpack(self, fmt: str) -> Tuple:
+        values: Tuple = struct.unpack_from("<" + fmt, self.buffer, self.offset)
+        self.offset += struct.calcsize("<" + fmt)
+        return values
+
+    def array(self, dtype: type, count: int) -> np.ndarray:
+        array: np.ndarray = np.frombuffer(self.buffer, dtype, count, self.offset)
+        self.offset += array.nbytes
+        return array
+
+    def string(self) -> str:
+        end: int = self.buffer.find(b"\0", self.offset)
+        if end < 0:
+            raise ValueError("Invalid model file: unterminated word.")
+        value: str = self.buffer[self.offset : end].decode("utf-8", "replace")
+        self.offset = end + 1
+        return value
+
+    def matrix(self, quantized: bool) -> Union[_DenseMatrix, _QuantizedMatrix]:
+        if not quantized:
+            m, n = self.unpack("qq")
+            return _DenseMatrix(self.array(np.float32, m * n).reshape(m, n))
+
+        qnorm, m, n, code_size = self.unpack("?qqi")
+        codes: np.ndarray = self.array(np.uint8, code_size).reshape(m, -1)
+        centroids: np.ndarray = self.centroids()
+        if not qnorm:
+            return _QuantizedMatrix(codes, centroids, n)
+        norm_codes: np.ndarray = self.array(np.uint8, m)
+        return _QuantizedMatrix(
+            codes, centroids, n, norm_codes, self.centroids().ravel()
+        )
+
+    def centroids(self) -> np.ndarray:
+        """The centroids of a product quantizer, as an (nsubq, 256, dsub) array."""
+        dim, nsubq, dsub, last_dsub = self.unpack("iiii")
+        data: np.ndarray = self.array(np.float32, dim * _KSUB)
+        centroids: np.ndarray = np.zeros((nsubq, _KSUB, dsub), np.float32)
+        split: int = (nsubq - 1) * _KSUB * dsub
+        centroids[:-1] = data[:split].reshape(nsubq - 1, _KSUB, dsub)
+        centroids[-1, :, :last_dsub] = data[split:].reshape(_KSUB, last_dsub)
+        return centroids
+
+
+class NumpyModel:
+    """A supervised fastText model, predicting batches with NumPy.
+
+    The matrices, dictionary and arguments are read from the model file, which is
+    memory-mapped, so that they are shared by processes; quantized (.ftz) matrices
+    are dequantized row by row as needed. Texts are tokenized and hashed into
+    input rows (words, character n-grams and word n-grams) as by fastText.
+
+    The input vectors of a text's tokens are summed once per distinct token and
+    kept in a cache of `ENGINE_TOKEN_CACHE_SIZE` tokens, so that a batch is
+    predicted by gathering token vectors, averaging them per text, and one matrix
+    product with the output matrix, followed by a vectorized softmax (or sigmoid)
+    and top k selection.
+
+    Predictions match those of fastText's `predict()` within floating point
+    tolerance. The hierarchical softmax loss is not supported.
+    """
+
+    def __init__(
+        self,
+        args: _Args,
+        words: Dict[str, int],
+        labels: List[str],
+        input_matrix: Union[_DenseMatrix, _QuantizedMatrix],
+        output_matrix: np.ndarray,
+        pruned_ids: Optional[np.ndarray] = None,
+    ):
+        """
+        Args:
+            args: the model's training arguments
+            words: the index of each word of the dictionary
+            labels: the labels, in the order of the output matrix
+            input_matrix: the input matrix, a row per word and n-gram bucket
+            output_matrix: the (labels, dim) output matrix
+            pruned_ids: an (n, 2) array mapping the n-gram buckets kept by
+                quantization to input rows, if the dictionary was pruned (and
+                kept any n-grams)
+        """
+        if args.model != _SUPERVISED:
+            raise ValueError("Only supervised models are supported.")
+        if args.loss not in (_SOFTMAX, _ONE_VS_ALL, _NEGATIVE_SAMPLING):
+            raise ValueError(f"Unsupported loss function ({args.loss}).")
+
+        self.args: _Args = args
+        self.words: Dict[str, int] = words
+        self.labels: List[str] = labels
+        self.input_matrix: Union[_DenseMatrix, _QuantizedMatrix] = input_matrix
+        self.output_matrix: np.ndarray = output_matrix
+        self._pruned_ids: Optional[np.ndarray] = None
+        if pruned_ids is not None:
+            self._pruned_ids = pruned_ids[np.argsort(pruned_ids[:, 0])]
+
+        self._lock: threading.Lock = threading.Lock()
+        self._token_index: Dict[str, int] = {}
+        self._token_vectors: np.ndarray = np.empty((0, args.dim), np.float32)
+        self._token_counts: np.ndarray = np.empty(0, np.int64)
+        self._token_hashes: np.ndarray = np.empty(0, np.uint64)
+        self._buffer: Optional[mmap.mmap] = None
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyModel":
+        """Load a model file saved by fastText."""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        reader = _Reader(buffer)
+
+        magic, version = reader.unpack("ii")
+        if magic != _MAGIC or version > _VERSION:
+            raise ValueError(f"'{path}' is not a supported fastText model file.")
+        args = _Args(*reader.unpack("iiiiiiiiiiiid"))
+        if version == 11 and args.model == _SUPERVISED:
+            args = args._replace(maxn=0)
+
+        size, n_words, _, _, pruned_size = reader.unpack("iiiqq")
+        words: Dict[str, int] = {}
+        labels: List[str] = []
+        for i in range(size):
+            word: str = reader.string()
+            _, entry_type = reader.unpack("qb")
+            if entry_type == 0:
+                words[word] = i
+            else:
+                labels.append(word)
+        pruned_ids: Optional[np.ndarray] = None
+        if pruned_size > 0:
+            pruned_ids = reader.array(np.int32, 2 * pruned_size).reshape(-1, 2)
+        elif pruned_size == 0:
+            # pruned to no n-grams at all: fastText then skips every bucket
+            args = args._replace(bucket=0)
+
+        (quantized,) = reader.unpack("?")
+        input_matrix = reader.matrix(quantized)
+        (quantized_output,) = reader.unpack("?")
+        output_matrix = reader.matrix(quantized and quantized_output)
+        if len(words) != n_words or len(output_matrix) != len(labels):
+            raise ValueError(f"'{path}' is not a valid fastText model file.")
+
+        model = cls(
+            args,
+            words,
+            labels,
+            input_matrix,
+            # small, so held in (aligned) memory
+            output_matrix.rows(np.arange(len(labels))).copy(),
+            pruned_ids,
+        )
+        model._buffer = buffer
+        return model
+
+    def get_labels(self) -> List[str]:
+        return list(self.labels)
+
+    def predict(
+        self, texts: Union[str, List[str]], k: int = 1, threshold: float = 0.0
+    ) -> Tuple[List[List[str]], List[np.ndarray]]:
+        """Predict labels as fastText's `predict()`.
+
+        Returns:
+            the labels and their probabilities per text, most probable first; for a
+            single text, the labels and probabilities of that text.
+        """
+        if isinstance(texts, str):
+            labels, probs = self.predict([texts], k, threshold)
+            return labels[0], probs[0]
+
+        counts, label_ids, probs = self.predict_arrays(texts, k, threshold)
+        ends: List[int] = np.cumsum(counts).tolist()
+        return (
+            [
+                [self.labels[i] for i in label_ids[start:end].tolist()]
+                for start, end in zip([0] + ends, ends)
+            ],
+            np.split(probs, ends[:-1]),
+        )
+
+    def predict_arrays(
+        self, texts: Sequence[str], k: int = 1, threshold: float = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Predict labels for a batch of texts as flat arrays.
+
+        Args:
+            texts: the texts
+            k: the number of labels per text; all labels if -1.
+            threshold: the minimum probability of a predicted label
+
+        Returns:
+            the number of predicted labels per text, and the label indices (in the
+            order of `labels`) and probabilities of all predictions, in order.
+        """
+        if k == -1 or k > len(self.labels):
+            k = len(self.labels)
+        elif k <= 0:
+            raise ValueError(f"Invalid number of predictions: {k}.")
+
+        tokens: List[List[str]] = [self._tokens(text) for text in texts]
+        hidden: np.ndarray = np.zeros((len(texts), self.args.dim), np.float32)
+        counts: np.ndarray = np.zeros(len(texts), np.int64)
+        for start, end in _chunks(list(map(len, tokens)), ENGINE_CHUNK_TOKENS):
+            hidden[start:end], counts[start:end] = self._sum_inputs(tokens[start:end])
+        hidden /= np.maximum(counts, 1)[:, np.newaxis]
+
+        probs: np.ndarray = self._output(hidden @ self.output_matrix.T)
+        if k < len(self.labels):
+            label_ids: np.ndarray = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+            probs = np.take_along_axis(probs, label_ids, axis=1)
+        else:
+            label_ids = np.broadcast_to(np.arange(k), probs.shape)
+        order: np.ndarray = np.argsort(-probs, axis=1, kind="stable")
+        label_ids = np.take_along_axis(label_ids, order, axis=1)
+        probs = np.take_along_axis(probs, order, axis=1)
+
+        # fastText predicts nothing for texts without any input rows
+        valid: np.ndarray = (probs >= threshold) & (counts > 0)[:, np.newaxis]
+        return (
+            valid.sum(axis=1),
+            label_ids[valid].astype(np.intp, copy=False),
+            probs[valid] + np.float32(_LOG_EPSILON),
+        )
+
+    def _tokens(self, text: str) -> List[str]:
+        if "\n" in text:
+            raise ValueError("predict processes one line at a time (remove '\\n')")
+        tokens: List[str] = _TOKEN_PATTERN.findall(text)
+        if LABEL_PREFIX in text:
+            tokens = [token for token in tokens if not token.startswith(LABEL_PREFIX)]
+        tokens.append(_EOS)
+        return tokens
+
+    def _sum_inputs(self, texts: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """The sum of the input rows of each tokenized text, and their number."""
+        tokens: List[str] = list(chain.from_iterable(texts))
+        text_ids: np.ndarray = np.repeat(
+            np.arange(len(texts)), np.fromiter(map(len, texts), np.intp, len(texts))
+        )
+        with self._lock:
+            rows: np.ndarray = self._token_rows(tokens)
+            sums: np.ndarray = _segment_sum(
+                self._token_vectors[rows], text_ids, len(texts)
+            )
+            counts: np.ndarray = np.bincount(
+                text_ids, self._token_counts[rows], len(texts)
+            ).astype(np.int64)
+            hashes: np.ndarray = self._token_hashes[rows]
+
+        # word n-grams, hashed from the hashes of consecutive words
+        ngram_hashes: np.ndarray = hashes
+        for span in range(1, self.args.word_ngrams):
+            if len(hashes) <= span:
+                break
+            ngram_hashes = ngram_hashes[:-1] * _WORD_NGRAM_FACTOR + hashes[span:]
+            within: np.ndarray = text_ids[span:] == text_ids[:-span]
+            ids, kept = self._bucket_rows(ngram_hashes[within])
+            ngram_text_ids: np.ndarray = text_ids[:-span][within][kept]
+            sums += _segment_sum(
+                self.input_matrix.rows(ids), ngram_text_ids, len(texts)
+            )
+            counts += np.bincount(ngram_text_ids, minlength=len(texts))
+        return sums, counts
+
+    def _token_rows(self, tokens: List[str]) -> np.ndarray:
+        """The rows of tokens in the token cache, adding missing tokens."""
+        index: Dict[str, int] = self._token_index
+        missing: List[str] = [
+            token for token in dict.fromkeys(tokens) if token not in index
+        ]
+        if missing:
+            if len(index) + len(missing) > ENGINE_TOKEN_CACHE_SIZE:
+                index.clear()
+                missing = list(dict.fromkeys(tokens))
+            for start in range(0, len(missing), _NEW_TOKENS_BATCH):
+                self._add_tokens(missing[start : start + _NEW_TOKENS_BATCH])
+        return np.fromiter(map(index.__getitem__, tokens), np.intp, len(tokens))
+
+    def _add_tokens(self, tokens: List[str]):
+        ids, owners = self._subword_rows(tokens)
+        order: np.ndarray = np.argsort(owners, kind="stable")
+        vectors: np.ndarray = _segment_sum(
+            self.input_matrix.rows(ids[order]), owners[order], len(tokens)
+        )
+        # fastText's word hashes are int32, sign-extended into 64 bits
+        hashes: np.ndarray = _fnv1a(tokens).view(np.int32).astype(np.uint64)
+
+        start: int = len(self._token_index)
+        end: int = start + len(tokens)
+        if end > len(self._token_vectors):
+            capacity: int = max(end, 2 * len(self._token_vectors))
+            self._token_vectors = _resize(self._token_vectors, capacity)
+            self._token_counts = _resize(self._token_counts, capacity)
+            self._token_hashes = _resize(self._token_hashes, capacity)
+        self._token_vectors[start:end] = vectors
+        self._token_counts[start:end] = np.bincount(owners, minlength=len(tokens))
+        self._token_hashes[start:end] = hashes
+        self._token_index.update(zip(tokens, range(start, end)))
+
+    def _subword_rows(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """The input rows of tokens (their word and character n-grams).
+
+        Returns:
+            the rows and, for each, the index of its token
+        """
+        word_ids: np.ndarray = np.fromiter(
+            (self.words.get(token, -1) for token in tokens), np.int64, len(tokens)
+        )
+        in_vocabulary: np.ndarray = word_ids >= 0
+        ids: List[np.ndarray] = [word_ids[in_vocabulary]]
+        owners: List[np.ndarray] = [np.flatnonzero(in_vocabulary)]
+
+        if self.args.maxn > 0:
+            ngrams: List[List[str]] = [
+                (
+                    _char_ngrams(_BOW + token + _EOW, self.args.minn, self.args.maxn)
+                    if token != _EOS
+                    else []
+                )
+                for token in tokens
+            ]
+            flat: List[str] = list(chain.from_iterable(ngrams))
+            ngram_ids, kept = self._bucket_rows(_fnv1a(flat))
+            ids.append(ngram_ids)
+            owners.append(
+                np.repeat(
+                    np.arange(len(tokens)),
+                    np.fromiter(map(len, ngrams), np.intp, len(tokens)),
+                )[kept]
+            )
+        return np.concatenate(ids), np.concatenate(owners)
+
+    def _bucket_rows(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """The input rows of n-gram hashes, as fastText's Dictionary::pushHash().
+
+        Returns:
+            the rows, and the indices of the hashes whose bucket was kept when the
+            dictionary was pruned
+        """
+        kept: np.ndarray = np.arange(len(hashes))
+        if not self.args.bucket:
+            return np.empty(0, np.int64), kept[:0]
+        buckets: np.ndarray = (hashes % np.uint64(self.args.bucket)).astype(np.int64)
+        if self._pruned_ids is not None:
+            positions: np.ndarray = np.searchsorted(self._pruned_ids[:, 0], buckets)
+            positions = np.minimum(positions, len(self._pruned_ids) - 1)
+            found: np.ndarray = self._pruned_ids[positions, 0] == buckets
+            kept = kept[found]
+            buckets = self._pruned_ids[positions[found], 1].astype(np.int64)
+        return len(self.words) + buckets, kept
+
+    def _output(self, scores: np.ndarray) -> np.ndarray:
+        """The probabilities of the labels from the output scores."""
+        if self.args.loss == _SOFTMAX:
+            scores -= scores.max(axis=1, keepdims=True)
+            np.exp(scores, out=scores)
+            scores /= scores.sum(axis=1, keepdims=True)
+            return scores
+
+        # fastText's sigmoid is looked up in a table
+        table: np.ndarray = 1 / (
+            1
+            + np.exp(
+                -(
+                    np.arange(_SIGMOID_TABLE_SIZE + 1)
+                    * 2
+                    * _MAX_SIGMOID
+                    / _SIGMOID_TABLE_SIZE
+                    - _MAX_SIGMOID
+                )
+            )
+        )
+        clipped: np.ndarray = np.clip(scores, -_MAX_SIGMOID, _MAX_SIGMOID)
+        probs: np.ndarray = table[
+            ((clipped + _MAX_SIGMOID) * _SIGMOID_TABLE_SIZE / _MAX_SIGMOID / 2).astype(
+                np.int64
+            )
+        ].astype(np.float32)
+        probs[scores < -_MAX_SIGMOID] = 0
+        probs[scores > _MAX_SIGMOID] = 1
+        return probs
+
+
+def _char_ngrams(word: str, minn: int, maxn: int) -> List[str]:
+    """The character n-grams of a word, as fastText's Dictionary::computeSubwords()."""
+    length: int = len(word)
+    return [
+        word[i:j]
+        for i in range(length)
+        for j in range(i + max(minn, 1), min(i + maxn, length) + 1)
+        # single characters at the word boundaries are the markers
+        if not (j - i == 1 and (i == 0 or j == length))
+    ]
+
+
+def _fnv1a(strings: List[str]) -> np.ndarray:
+    """The 32-bit FNV-1a hashes of strings' UTF-8 bytes, as fastText's Dictionary::hash().
+
+    Bytes are sign-extended, as fastText hashes (signed) chars.
+    """
+    data: List[bytes] = [s.encode("utf-8") for s in strings]
+    lengths: np.ndarray = np.fromiter(map(len, data), np.intp, len(data))
+    buffer: np.ndarray = np.frombuffer(b"".join(data), np.int8).astype(np.uint32)
+    starts: np.ndarray = np.cumsum(lengths) - lengths
+
+    # longest first, so that the strings with a j-th byte are a prefix
+    order: np.ndarray = np.argsort(-lengths, kind="stable")
+    starts = starts[order]
+    remaining: np.ndarray = lengths[order][::-1]
+    hashes: np.ndarray = np.full(len(data), _FNV_OFFSET, np.uint32)
+    for j in range(int(lengths.max()) if len(data) else 0):
+        active: int = len(data) - int(np.searchsorted(remaining, j, side="right"))
+        hashes[:active] ^= buffer[starts[:active] + j]
+        hashes[:active] *= _FNV_PRIME
+
+    result: np.ndarray = np.empty_like(hashes)
+    result[order] = hashes
+    return result
+
+
+def _segment_sum(values: np.ndarray, segments: np.ndarray, n: int) -> np.ndarray:
+    """The sums of rows by segment, for sorted segment indices in [0, n).
+
+    For many segments, adds the j-th rows of all segments at once, for each j up to
+    the longest segment (with segments ordered longest first, those with a j-th row
+    are a prefix), which is several times faster than `np.add.reduceat()` on rows.
+    """
+    lengths: np.ndarray = np.bincount(segments, minlength=n)
+    starts: np.ndarray = np.cumsum(lengths) - lengths
+    longest: int = int(lengths.max()) if n else 0
+    if longest * _RANK_SUM_FRACTION > len(values):
+        sums: np.ndarray = np.zeros((n, values.shape[1]), np.float32)
+        non_empty: np.ndarray = lengths > 0
+        if len(values):
+            sums[non_empty] = np.add.reduceat(values, starts[non_empty], axis=0)
+        return sums
+
+    order: np.ndarray = np.argsort(-lengths, kind="stable")
+    starts = starts[order]
+    remaining: np.ndarray = lengths[order][::-1]
+    sums = np.zeros((n, values.shape[1]), np.float32)
+    for j in range(longest):
+        active: int = n - int(np.searchsorted(remaining, j, side="right"))
+        sums[:active] += values[starts[:active] + j]
+
+    result: np.ndarray = np.empty_like(sums)
+    result[order] = sums
+    return result
+
+
+def _resize(array: np.ndarray, size: int) -> np.ndarray:
+    resized: np.ndarray = np.zeros((size, *array.shape[1:]), array.dtype)
+    resized[: len(array)] = array
+    return resized
+
+
+def _chunks(lengths: List[int], budget: int) -> Iterator[Tuple[int, int]]:
+    """Split consecutive items into ranges of at most `budget` total length.
+
+    An item longer than the budget forms a range of its own.
+    """
+    start: int = 0
+    size: int = 0
+    for i, length in enumerate(lengths):
+        if size and size + length > budget:
+            yield start, i
+            start, size = i, 0
+        size += length
+    if start < len(lengths):
+        yield start, len(lengths)
+
+
+# The NumPy models used by classifiers, see `Classifier.set_engine()`
+ENGINE_REGISTRY: ModelRegistry = ModelRegistry(loader=NumpyModel.load)
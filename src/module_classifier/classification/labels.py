@@ -0,0 +1,55 @@
+from typing import Callable, Dict, Generic, Iterable, List, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+class LabelTable(Generic[T]):
+    """Bidirectional mapping between a model's raw labels, label indices and label values.
+
+    Built once per loaded model, so that prediction does not parse any labels.
+    """
+
+    __slots__ = ("raw_labels", "values", "_index_by_label", "_index_by_value")
+
+    def __init__(self, raw_labels: Sequence[str], deserialize: Callable[[str], T]):
+        """
+        Args:
+            raw_labels: the labels as returned by the model, e.g. '__label__S1_M1'
+            deserialize: a function converting a raw label into a label value
+        """
+        self.raw_labels: List[str] = list(raw_labels)
+        self.values: List[T] = [deserialize(label) for label in self.raw_labels]
+        self._index_by_label: Dict[str, int] = {
+            label: i for i, label in enumerate(self.raw_labels)
+        }
+        self._index_by_value: Dict[T, int] = {
+            value: i for i, value in enumerate(self.values)
+        }
+
+    def __len__(self) -> int:
+        return len(self.raw_labels)
+
+    def index(self, label: str) -> int:
+        return self._index_by_label[label]
+
+    def indices(self, labels: Iterable[str], count: int = -1) -> np.ndarray:
+        """The indices of a sequence of raw labels, as an integer array.
+
+        Args:
+            labels: raw labels
+            count: the number of labels, if known, to allocate the array at once.
+        """
+        return np.fromiter(
+            map(self._index_by_label.__getitem__, labels), np.intp, count
+        )
+
+    def index_of_value(self, value: T) -> int:
+        return self._index_by_value[value]
+
+    def value(self, label: str) -> T:
+        return self.values[self._index_by_label[label]]
+
+    def __contains__(self, label: str) -> bool:
+        return label in self._index_by_label
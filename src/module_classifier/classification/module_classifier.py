@@ -1,21 +1,26 @@
-from dataclasses import dataclass
-from typing import Dict, Iterable, List
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
 import numpy as np
 
-from ..preprocessing import Module, clean
+from ..preprocessing import Module, clean_many
+from ..preprocessing.models import normalize_module_label
 from ..preprocessing.settings import (
     CLASS_FIELD,
     DEFAULT_MODULE_DELIMITER,
+    FIELD_CHAR_BUDGETS,
+    FIELD_TOKEN_BUDGETS,
     LABEL_PREFIX,
     MODULE_DELIMITERS,
     TEXT_FIELDS,
 )
 from .classifier import Classifier
+from .labels import LabelTable
 from .settings import (
     AWS_S3_MODELS_BUCKET,
     MODULE_CLASSIFIER_DEFAULT_MODEL_PATH,
     MODULE_CLASSIFIER_MODEL_FILE,
+    PREDICTION_ENGINE,
 )
 
 
@@ -27,8 +32,18 @@ class Prediction:
     prob: float
 
     @classmethod
-    def from_label(cls, label: str, prob: float) -> "Prediction":
-        return cls(Module.from_string(label, label_prefix=LABEL_PREFIX), prob)
+    def from_label(
+        cls,
+        label: str,
+        prob: float,
+        label_table: Optional[LabelTable[Module]] = None,
+    ) -> "Prediction":
+        module: Module = (
+            label_table.value(label)
+            if label_table is not None
+            else Module.from_string(label, label_prefix=LABEL_PREFIX)
+        )
+        return cls(module, prob)
 
 
 @dataclass
@@ -37,35 +52,182 @@ class Predictions:
 
     labels: List[str]
     probs: np.ndarray
+    label_table: Optional[LabelTable[Module]] = field(
+        default=None, compare=False, repr=False
+    )
 
     def to_predictions(self) -> List[Prediction]:
         return [
-            Prediction.from_label(label, prob)
+            Prediction.from_label(label, prob, self.label_table)
             for label, prob in zip(self.labels, self.probs)
         ]
 
     def get_probabilities(self, labels: List[str]) -> np.ndarray:
-        probs: List[float] = []
-        for label in labels:
-            probs.append(
-                self.probs[self.labels.index(label)] if label in self.labels else 0.0
-            )
-        return np.array(probs)
+        probs: Dict[str, float] = dict(zip(self.labels, self.probs))
+        return np.array([probs.get(label, 0.0) for label in labels])
 
     @staticmethod
     def from_fasttext_predictions(
-        labels: List[List[str]], probs: List[np.ndarray]
+        labels: List[List[str]],
+        probs: List[np.ndarray],
+        label_table: Optional[LabelTable[Module]] = None,
     ) -> List["Predictions"]:
-        return [Predictions(_labels, _probs) for _labels, _probs in zip(labels, probs)]
+        return [
+            Predictions(_labels, _probs, label_table)
+            for _labels, _probs in zip(labels, probs)
+        ]
+
+
+class PredictionBatch:
+    """k predictions for each of a batch of inputs, backed by arrays.
+
+    Holds an (n, k) array of label indices into `label_table` and an (n, k) array
+    of probabilities; `Prediction` objects are only created when a row is
+    accessed. Rows with fewer than k predictions are padded with label index -1
+    and probability 0.
+    """
+
+    __slots__ = ("label_ids", "probs", "label_table")
+
+    def __init__(
+        self,
+        label_ids: np.ndarray,
+        probs: np.ndarray,
+        label_table: LabelTable[Module],
+    ):
+        """
+        Args:
+            label_ids: an (n, k) integer array of label indices
+            probs: an (n, k) float array of probabilities
+            label_table: the labels of the model
+        """
+        if label_ids.ndim != 2 or label_ids.shape != probs.shape:
+            raise ValueError(
+                f"Label and probability arrays differ in shape: {label_ids.shape} != {probs.shape}."
+            )
+        self.label_ids: np.ndarray = label_ids
+        self.probs: np.ndarray = probs
+        self.label_table: LabelTable[Module] = label_table
+
+    @classmethod
+    def from_arrays(
+        cls,
+        counts: np.ndarray,
+        label_ids: np.ndarray,
+        probs: np.ndarray,
+        label_table: LabelTable[Module],
+    ) -> "PredictionBatch":
+        """Create a batch from flat arrays, see `Classifier._predict_arrays()`.
+
+        Args:
+            counts: the number of predictions per input
+            label_ids: the label indices of all predictions, in order
+            probs: the probabilities of all predictions, in order
+            label_table: the labels of the model
+        """
+        n: int = len(counts)
+        k: int = int(counts.max()) if n else 0
+        if n * k == len(label_ids):  # the same number of predictions for all inputs
+            return cls(
+                label_ids.astype(np.int32, copy=False).reshape(n, k),
+                probs.astype(np.float32, copy=False).reshape(n, k),
+                label_table,
+            )
+
+        rows: np.ndarray = np.repeat(np.arange(n), counts)
+        columns: np.ndarray = np.arange(len(label_ids)) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        padded_ids: np.ndarray = np.full((n, k), -1, np.int32)
+        padded_ids[rows, columns] = label_ids
+        padded_probs: np.ndarray = np.zeros((n, k), np.float32)
+        padded_probs[rows, columns] = probs
+        return cls(padded_ids, padded_probs, label_table)
+
+    @property
+    def k(self) -> int:
+        return self.label_ids.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.label_ids)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[List[Prediction], "PredictionBatch"]:
+        """The predictions for an input, or a batch view on a slice of the inputs."""
+        if isinstance(index, slice):
+            return PredictionBatch(
+                self.label_ids[index], self.probs[index], self.label_table
+            )
+        modules: List[Module] = self.label_table.values
+        return [
+            Prediction(modules[label_id], prob)
+            for label_id, prob in zip(
+                self.label_ids[index].tolist(), self.probs[index].tolist()
+            )
+            if label_id >= 0
+        ]
+
+    def __iter__(self) -> Iterator[List[Prediction]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def predictions(self, index: int) -> Predictions:
+        """The predictions for an input as a `Predictions` object."""
+        label_ids: np.ndarray = self.label_ids[index]
+        valid: np.ndarray = label_ids >= 0
+        raw_labels: List[str] = self.label_table.raw_labels
+        return Predictions(
+            [raw_labels[label_id] for label_id in label_ids[valid].tolist()],
+            self.probs[index][valid],
+            self.label_table,
+        )
+
+    def to_numpy(self) -> Tuple[np.ndarray, np.ndarray]:
+        """The (n, k) arrays of label indices and probabilities (not copied)."""
+        return self.label_ids, self.probs
+
+    def to_pandas(self, copy: bool = True) -> "pandas.DataFrame":
+        """A data frame with a label and a probability column per rank.
+
+        The labels are categorical columns with the model's raw labels as
+        categories. Requires pandas.
+
+        Args:
+            copy: if True, copy the probabilities, so the frame is independent of
+                the batch. If False, the probability columns are built without
+                copying and may share memory with the batch (depending on the
+                pandas version), so that writes to either may show in the other.
+        """
+        try:
+            import pandas
+        except ImportError as e:
+            raise ImportError("PredictionBatch.to_pandas() requires pandas.") from e
+
+        columns: Dict[str, Any] = {}
+        for rank in range(self.k):
+            columns[f"label_{rank}"] = pandas.Categorical.from_codes(
+                self.label_ids[:, rank], self.label_table.raw_labels
+            )
+            columns[f"prob_{rank}"] = self.probs[:, rank]
+        return pandas.DataFrame(columns, copy=copy)
 
 
 class ModuleClassifier(Classifier):
-    def __init__(self, model_path: str = MODULE_CLASSIFIER_DEFAULT_MODEL_PATH):
-        return super().__init__(model_path)
+    def __init__(
+        self,
+        model_path: str = MODULE_CLASSIFIER_DEFAULT_MODEL_PATH,
+        engine: str = PREDICTION_ENGINE,
+    ):
+        return super().__init__(model_path, engine)
+
+    @staticmethod
+    def _deserialize_label(label: str) -> Module:
+        return Module.from_string(label, label_prefix=LABEL_PREFIX)
 
     @property
     def modules(self) -> List[Module]:
-        return [Module.from_string(label) for label in self.labels]
+        return list(self.label_table.values)
 
     def predict_row(
         self,
@@ -88,16 +250,36 @@ class ModuleClassifier(Classifier):
                 plus the model confidence for that label.
 
         """
-        return self._predict([self.fasttext_line(row, columns)], k)[0].to_predictions()
+        return self._predict_batch([self.fasttext_line(row, columns)], k)[0]
 
     def predict_text(self, text: str, k: int = 1) -> List[Prediction]:
-        return self.predict_texts([text], k)[0].to_predictions()
+        return self.predict_batch([text], k)[0]
+
+    def predict_batch(self, texts: List[str], k: int = 1) -> PredictionBatch:
+        """Predict the k most probable labels for each of a batch of texts.
+
+        Args:
+            texts: the input texts, cleaned as in `predict_texts()`.
+            k: the number of predictions per text; all labels if -1.
+
+        Returns:
+            a PredictionBatch with a row per text.
+        """
+        return self._predict_batch(self._clean_texts(texts), k)
+
+    def _predict_batch(self, texts: List[str], k: int) -> PredictionBatch:
+        return PredictionBatch.from_arrays(
+            *self._predict_arrays(texts, k), self.label_table
+        )
 
     # TODO: return List[List[Prediction]]?
     def predict_texts(self, texts: List[str], k: int = 1) -> List[Predictions]:
         if not texts:
             raise ValueError("No input text provided.")
-        return self._predict([clean(text) for text in texts], k)
+        return self._predict(self._clean_texts(texts), k)
+
+    def _clean_texts(self, texts: List[str]) -> List[str]:
+        return clean_many(texts)
 
     def _predict(self, texts: List[str], k: int) -> List[Predictions]:
         """Predict labels and probabilities for a list of texts.
@@ -114,7 +296,7 @@ class ModuleClassifier(Classifier):
         labels: List[List[str]]
         probs: List[np.ndarray]
         labels, probs = self.model.predict(texts, k)
-        return Predictions.from_fasttext_predictions(labels, probs)
+        return Predictions.from_fasttext_predictions(labels, probs, self.label_table)
 
     @staticmethod
     def fasttext_line(
@@ -123,16 +305,23 @@ class ModuleClassifier(Classifier):
         class_field: str = CLASS_FIELD,
         *,
         module_delimiter: str = DEFAULT_MODULE_DELIMITER,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
         **kwargs,
     ) -> str:
 
         if class_field in row:
-            module: Module = Module.from_string(
-                row[class_field], delimiters=MODULE_DELIMITERS
+            row[class_field] = normalize_module_label(
+                row[class_field], module_delimiter, tuple(MODULE_DELIMITERS)
             )
-            row[class_field] = module.to_string(delimiter=module_delimiter)
 
-        return Classifier.fasttext_line(row, text_fields, class_field)
+        return Classifier.fasttext_line(
+            row,
+            text_fields,
+            class_field,
+            token_budgets=token_budgets,
+            char_budgets=char_budgets,
+        )
 
     @classmethod
     def from_s3(
@@ -0,0 +1,252 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from .binary_classifier import BinaryClassifier
+from .classifier import Classifier, _batches
+from .combined import CombinedClassifier
+from .settings import PARALLEL_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# The classifier of a worker process, set by `_init_worker()`
+_CLASSIFIER: Optional[Union[Classifier, CombinedClassifier]] = None
+
+
+class ParallelClassifier:
+    """Run the predictions of a classifier in a pool of worker processes.
+
+    Where processes are forked (the default on Linux), the workers inherit the
+    model loaded by the parent, so its memory is shared copy-on-write rather than
+    loaded per worker. Otherwise, e.g. with the 'spawn' start method, each worker
+    loads the model from the classifier's `model_path` once.
+
+    Inputs are split into chunks of `chunk_size` items, at most `2 * processes` of
+    which are in flight at once; results are returned in input order. If a worker
+    dies (e.g. killed for running out of memory), the pool is restarted and the
+    pending chunks are resubmitted up to `retries` times. Exceptions raised by the
+    classifier, such as a ValueError for a missing field, are re-raised as is.
+
+    The pool is started on first use and kept until `close()` is called, so the
+    ParallelClassifier should be used as a context manager.
+    """
+
+    def __init__(
+        self,
+        classifier: Union[Classifier, CombinedClassifier],
+        processes: Optional[int] = None,
+        chunk_size: int = PARALLEL_CHUNK_SIZE,
+        *,
+        retries: int = 1,
+        start_method: Optional[str] = None,
+    ):
+        """
+        Args:
+            classifier: the classifier, e.g. a ModuleClassifier, MainEditionClassifier
+                or CombinedClassifier (which only supports `predict_rows()`)
+            processes: the number of worker processes;
+                defaults to the number of CPUs available on the system.
+            chunk_size: the number of inputs per task
+            retries: the number of times the pool is restarted after a worker died
+            start_method: the multiprocessing start method;
+                defaults to 'fork' where available, else 'spawn'.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}.")
+        if start_method is None:
+            import multiprocessing
+
+            start_method = (
+                "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+            )
+
+        self.classifier: Union[Classifier, CombinedClassifier] = classifier
+        self.processes: int = processes or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        self.retries: int = retries
+        self.start_method: str = start_method
+        self._executor: Optional["ProcessPoolExecutor"] = None
+        # the submitted tasks that are not done, cancelled by `close()`
+        self._futures: Set[Future] = set()
+
+    def __enter__(self) -> "ParallelClassifier":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            # as shutdown(cancel_futures=True), which requires Python 3.9
+            for future in list(self._futures):
+                future.cancel()
+            self._futures.clear()
+            self._executor.shutdown()
+            self._executor = None
+
+    def predict_texts(self, texts: List[str], k: int = 1) -> List[Any]:
+        """Predict labels for texts, as `Classifier.predict_texts()`."""
+        if self.processes == 1 or len(texts) <= self.chunk_size:
+            return self.classifier.predict_texts(texts, k)
+        return self._map("predict_texts", _batches(texts, self.chunk_size), k)
+
+    def predict_rows(
+        self, rows: List[Dict[str, str]], k: int = 1, columns: Iterable[str] = ()
+    ) -> List[Any]:
+        """Predict labels for rows, as `Classifier.predict_rows()`."""
+        columns = tuple(columns)
+        if self.processes == 1 or len(rows) <= self.chunk_size:
+            return self.classifier.predict_rows(rows, k, columns)
+        return self._map("predict_rows", _batches(rows, self.chunk_size), k, columns)
+
+    def predict_binary_rows(
+        self, rows: List[Dict[str, str]], columns: Iterable[str] = ()
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict labels and probabilities of True for rows, as
+        `BinaryClassifier.predict_binary_rows()`."""
+        classifier: BinaryClassifier = self.classifier
+        columns = tuple(columns)
+        if self.processes == 1 or len(rows) <= self.chunk_size:
+            return classifier.predict_binary_rows(rows, columns)
+        results: List[Tuple[np.ndarray, np.ndarray]] = list(
+            self._imap("predict_binary_rows", _batches(rows, self.chunk_size), columns)
+        )
+        return (
+            np.concatenate([predicted for predicted, _ in results]),
+            np.concatenate([true_probs for _, true_probs in results]),
+        )
+
+    def predict_stream(
+        self,
+        inputs: Iterable[Union[str, Mapping[str, str]]],
+        k: int = 1,
+        *,
+        text_fields: Optional[Iterable[str]] = None,
+    ) -> Iterator[Any]:
+        """Predict labels for a stream of texts or rows, as `Classifier.predict_stream()`.
+
+        Inputs are read lazily in the calling process, so at most
+        `2 * processes` chunks are held in memory.
+        """
+        if text_fields is not None:
+            text_fields = tuple(text_fields)
+        for results in self._imap(
+            "predict_stream", _batches(inputs, self.chunk_size), k, text_fields
+        ):
+            yield from results
+
+    def _map(self, method: str, chunks: Iterator[List[Any]], *args) -> List[Any]:
+        return [
+            result
+            for results in self._imap(method, chunks, *args)
+            for result in results
+        ]
+
+    def _imap(
+        self, method: str, chunks: Iterator[List[Any]], *args
+    ) -> Iterator[List[Any]]:
+        """Apply a classifier method to chunks in the worker processes, in order."""
+        from concurrent.futures.process import BrokenProcessPool
+
+        window: int = 2 * self.processes
+        retries: int = self.retries
+        pending: Deque[Tuple[List[Any], Future]] = deque()
+        while True:
+            while len(pending) < window:
+                chunk: Optional[List[Any]] = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append((chunk, self._submit(method, chunk, args)))
+            if not pending:
+                return
+
+            chunk, future = pending[0]
+            try:
+                results: List[Any] = future.result()
+            except BrokenProcessPool:
+                if not retries:
+                    raise
+                retries -= 1
+                logging.warning(
+                    f"A worker process died, restarting the pool and resubmitting {len(pending)} chunks."
+                )
+                self.close()
+                pending = deque(
+                    (chunk, self._submit(method, chunk, args)) for chunk, _ in pending
+                )
+                continue
+            pending.popleft()
+            yield results
+
+    def _submit(self, method: str, chunk: List[Any], args: Tuple[Any, ...]) -> Future:
+        if self._executor is None:
+            self._executor = self._start()
+        future: Future = self._executor.submit(_predict_chunk, method, chunk, *args)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    def _start(self) -> "ProcessPoolExecutor":
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        classifier: Union[Classifier, CombinedClassifier, Callable[[], Classifier]] = (
+            self.classifier
+        )
+        # the arguments of forked processes are inherited, not pickled; a
+        # CombinedClassifier is pickled by its model paths
+        if self.start_method != "fork" and isinstance(classifier, Classifier):
+            classifier = partial(
+                type(self.classifier),
+                self.classifier.model_path,
+                engine=self.classifier.engine,
+            )
+        return ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(classifier,),
+        )
+
+
+def _init_worker(
+    classifier: Union[Classifier, CombinedClassifier, Callable[[], Classifier]],
+):
+    global _CLASSIFIER
+    _CLASSIFIER = (
+        classifier
+        if isinstance(classifier, (Classifier, CombinedClassifier))
+        else classifier()
+    )
+
+
+def _predict_chunk(method: str, chunk: List[Any], *args) -> Any:
+    if method == "predict_stream":
+        k, text_fields = args
+        return list(
+            _CLASSIFIER.predict_stream(
+                chunk, k, batch_size=len(chunk), text_fields=text_fields
+            )
+        )
+    return getattr(_CLASSIFIER, method)(chunk, *args)
@@ -0,0 +1,200 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import fasttext
+
+from .checksums import verified_md5
+from .settings import MODEL_MEMORY_BUDGET
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# The size, modification time (in nanoseconds) and inode of a file
+Signature = Tuple[int, int, int]
+# A model file by its real path and signature
+ModelKey = Tuple[str, Signature]
+
+
+@dataclass
+class ModelInfo:
+    """A model held by a ModelRegistry."""
+
+    path: str
+    signature: Signature
+    # the size of the model file in bytes, as an estimate of its memory use
+    size: int
+    loaded_at: float
+    # the last time a classifier requested the model, and the number of requests
+    last_used: float
+    uses: int = 0
+
+
+class ModelRegistry:
+    """Load each model file once per process, and share it between classifiers.
+
+    Models are keyed by the real path and the size, modification time and inode
+    of their file, so a file that is replaced on disk is loaded anew, and the
+    previous version is dropped. Files are not hashed to be loaded: MD5 sums are
+    only computed by `md5()`, e.g. to validate a download, and recomputed only
+    when the file changes, see `verified_md5()`.
+
+    Models are loaded lazily on first use; concurrent requests for the same model
+    wait for a single load, while different models can load in parallel. When the
+    total size of the loaded models exceeds the memory budget, the least recently
+    used models are evicted. Evicting a model only drops the registry's reference:
+    classifiers that use it keep it, and its memory is released with them.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = MODEL_MEMORY_BUDGET,
+        loader: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        Args:
+            memory_budget: the maximum total size of the models in bytes;
+                if None, models are never evicted.
+            loader: a function loading a model from a path;
+                defaults to `fasttext.load_model()`.
+        """
+        self.memory_budget: Optional[int] = memory_budget
+        self._loader: Callable[[str], Any] = loader or _load_fasttext_model
+        self._models: "OrderedDict[ModelKey, Tuple[Any, ModelInfo]]" = OrderedDict()
+        self._md5s: Dict[str, Tuple[Signature, str]] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+
+    def get(self, path: str) -> Any:
+        """The model loaded from a file, loading it if it is not in the registry."""
+        key: ModelKey = self.key(path)
+        model: Any = self._get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock: threading.Lock = self._load_locks.setdefault(
+                key, threading.Lock()
+            )
+        try:
+            with load_lock:
+                model = self._get(key)
+                if model is not None:
+                    return model
+
+                LOGGER.info(f"Loading model '{key[0]}'.")
+                model = self._loader(key[0])
+                now: float = time.time()
+                info = ModelInfo(key[0], key[1], key[1][0], now, now, 1)
+                with self._lock:
+                    # drop earlier versions of the file
+                    for old in [old for old in self._models if old[0] == key[0]]:
+                        del self._models[old]
+                    self._models[key] = (model, info)
+                    self._evict(keep=key)
+                return model
+        finally:
+            # threads already waiting for the lock hold a reference to it
+            with self._lock:
+                if self._load_locks.get(key) is load_lock:
+                    del self._load_locks[key]
+
+    def key(self, path: str) -> ModelKey:
+        """The real path and the size, modification time and inode of a model file."""
+        path = _real_file_path(path)
+        return path, _signature(path)
+
+    def md5(self, path: str) -> str:
+        """The MD5 sum of a file, recomputed only if the file has changed."""
+        path = _real_file_path(path)
+        signature: Signature = _signature(path)
+        with self._lock:
+            known: Optional[Tuple[Signature, str]] = self._md5s.get(path)
+        if known is not None and known[0] == signature:
+            return known[1]
+        md5: str = verified_md5(path)
+        with self._lock:
+            self._md5s[path] = (signature, md5)
+        return md5
+
+    def models(self) -> List[ModelInfo]:
+        """The loaded models, from least to most recently used."""
+        with self._lock:
+            return [ModelInfo(**vars(info)) for _, info in self._models.values()]
+
+    @property
+    def memory_used(self) -> int:
+        """The total size of the loaded models in bytes."""
+        with self._lock:
+            return sum(info.size for _, info in self._models.values())
+
+    def evict(self, path: str) -> bool:
+        """Remove all versions of a model file from the registry.
+
+        Returns:
+            True if a model was removed.
+        """
+        path = os.path.realpath(path)
+        with self._lock:
+            keys: List[ModelKey] = [key for key in self._models if key[0] == path]
+            for key in keys:
+                del self._models[key]
+        return bool(keys)
+
+    def clear(self):
+        """Remove all models from the registry."""
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+    def _get(self, key: ModelKey) -> Any:
+        with self._lock:
+            entry: Optional[Tuple[Any, ModelInfo]] = self._models.get(key)
+            if entry is None:
+                return None
+            self._models.move_to_end(key)
+            model, info = entry
+            info.last_used = time.time()
+            info.uses += 1
+            return model
+
+    def _evict(self, keep: ModelKey):
+        """Evict least recently used models until the budget is met, except one."""
+        if self.memory_budget is None:
+            return
+        used: int = sum(info.size for _, info in self._models.values())
+        for key in list(self._models):
+            if used <= self.memory_budget:
+                break
+            if key == keep:
+                continue
+            _, info = self._models.pop(key)
+            used -= info.size
+            LOGGER.info(
+                f"Evicted model '{info.path}' ({info.size} bytes) from the registry."
+            )
+
+
+def _real_file_path(path: str) -> str:
+    if path is None or not os.path.isfile(path):
+        raise ValueError(f"'{path}' does not exist or is not a file.")
+    return os.path.realpath(path)
+
+
+def _signature(path: str) -> Signature:
+    stat: os.stat_result = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def _load_fasttext_model(path: str) -> Any:
+    return fasttext.load_model(path=path)
+
+
+# The registry used by all classifiers
+REGISTRY: ModelRegistry = ModelRegistry()
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 CWD: Path = Path(__file__).parent
 DATA_DIR: Path = CWD.parent / "data"
@@ -19,3 +20,39 @@ MODULE_CLASSIFIER_DEFAULT_MODEL_PATH: str = str(DATA_DIR / MODULE_CLASSIFIER_MOD
 
 
 AWS_S3_MODELS_BUCKET: str = "ts-shared-models"
+
+# Number of texts passed to the model at once when scoring large inputs
+PREDICTION_BATCH_SIZE: int = 10000
+
+# Number of inputs sent to a worker process at once by a ParallelClassifier
+PARALLEL_CHUNK_SIZE: int = 2000
+
+# Number of predictions held in memory by a PredictionCache
+PREDICTION_CACHE_SIZE: int = 100000
+
+# Maximum total size in bytes of the models shared by classifiers; None for no limit
+MODEL_MEMORY_BUDGET: Optional[int] = None
+
+# Number of bytes hashed at once when computing the MD5 sum of a model file
+MD5_CHUNK_SIZE: int = 8 * 1024 * 1024
+# Suffix of the file recording the verified MD5 sum of a model file
+MD5_SIDECAR_SUFFIX: str = ".md5.json"
+
+# Size in bytes of the ranged parts of a model download from S3
+S3_PART_SIZE: int = 8 * 1024 * 1024
+# Number of parts of a model download fetched at once
+S3_MAX_CONCURRENCY: int = 8
+# Number of times a failed part of a model download is retried
+S3_RETRIES: int = 3
+
+# Maximum number of texts per batch predicted by an AsyncBatcher
+ASYNC_BATCH_SIZE: int = 256
+# Maximum time in seconds an AsyncBatcher waits for a batch to fill
+ASYNC_MAX_WAIT: float = 0.005
+
+# Implementation of classifier predictions: "fasttext" or "numpy" (see engine.NumpyModel)
+PREDICTION_ENGINE: str = "fasttext"
+# Number of distinct tokens whose summed input vectors a NumpyModel keeps
+ENGINE_TOKEN_CACHE_SIZE: int = 100000
+# Number of tokens whose vectors a NumpyModel gathers at once
+ENGINE_CHUNK_TOKENS: int = 65536
@@ -1,14 +1,17 @@
-from typing import Any, Dict, List
-
-from lime.explanation import Explanation
-from lime.lime_text import LimeTextExplainer
+from typing import TYPE_CHECKING, Any, Dict, List
 
 from ..classification import Classifier
 from ..preprocessing import clean
 
+if TYPE_CHECKING:
+    from lime.explanation import Explanation
+
 
 class Explainer:
     def __init__(self, classifier: Classifier) -> None:
+        # imported here, as LIME pulls in scikit-learn and scipy
+        from lime.lime_text import LimeTextExplainer
+
         self._classifier: Classifier = classifier
         self._explainer: LimeTextExplainer = LimeTextExplainer(
             split_expression=lambda x: clean(x).split(),
@@ -16,10 +19,10 @@ class Explainer:
             class_names=classifier.raw_labels,
         )
 
-    def explain(self, input: str, k: int, **kwargs) -> Explanation:
+    def explain(self, input: str, k: int, **kwargs) -> "Explanation":
         return self._explainer.explain_instance(
             clean(input),
-            classifier_fn=lambda x: self._classifier.prediction_probs(x, k=k),
+            classifier_fn=lambda x: self._classifier.predict_proba(x, k=k),
             top_labels=k,
             **kwargs
         )
@@ -1,2 +1,2 @@
-from .preprocessing import clean
-from .models import Module
\ No newline at end of file
+from .preprocessing import Normalizer, clean, clean_column, clean_many, column_values
+from .models import Module
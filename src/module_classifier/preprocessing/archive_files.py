@@ -1,19 +1,76 @@
 import csv
-from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Set, TextIO
-from .settings import MAIN_EDITION_ID_FIELD, MAIN_EDITION_MERGED_LABEL_FIELD
+from contextlib import nullcontext
+from typing import (
+    IO,
+    Any,
+    ContextManager,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Union,
+)
+
+from .archive_index import ArchiveIndex
+from .compression import detect_compression, open_file
+from .parallel_reader import ParallelCSVReader
+from .reader import CSVReader, Record
+from .settings import ID_FIELD, MAIN_EDITION_ID_FIELD, MAIN_EDITION_MERGED_LABEL_FIELD
 
 
 class ArchiveFile:
-    ID_FIELD: str = "id"
+    """An archive CSV file with an integer ID column.
+
+    Uncompressed files given by their path are streamed when iterating, so their
+    rows are not held in memory; they are indexed by ID (see `ArchiveIndex`) when
+    IDs are first looked up. Other files (streams, compressed files) are read
+    into memory.
+    """
+
+    ID_FIELD: str = ID_FIELD
 
-    def __init__(self, archive_file: TextIO):
-        self._read_file(archive_file)
+    def __init__(
+        self,
+        archive_file: Union[str, TextIO],
+        columns: Optional[Iterable[str]] = None,
+        processes: int = 1,
+    ):
+        """
+        Args:
+            archive_file: the archive CSV file, or its path
+            columns: if given, only read these columns (plus the ID column)
+            processes: the number of processes for parsing a file given by its path
+        """
+        self._read_file(archive_file, columns, processes)
 
-    def _read_file(self, archive_file: TextIO):
-        reader = csv.DictReader(archive_file)
-        self._fieldnames: Optional[Sequence[str]] = reader.fieldnames
-        self._rows: List[Dict[str, Any]] = [row for row in reader]
-        self._ids: Set[int] = {int(row[self.ID_FIELD]) for row in self._rows}
+    def _read_file(
+        self,
+        archive_file: Union[str, TextIO],
+        columns: Optional[Iterable[str]] = None,
+        processes: int = 1,
+    ):
+        if columns is not None:
+            columns = [self.ID_FIELD, *columns]
+        self._columns: Optional[List[str]] = columns
+        self._processes: int = processes
+        self._rows: Optional[List[Record]] = None
+        self._index: Optional[ArchiveIndex] = None
+        self._ids: Optional[Set[int]] = None
+
+        if isinstance(archive_file, str) and detect_compression(archive_file) is None:
+            self._path: str = archive_file
+            with ParallelCSVReader(archive_file, columns, processes=1) as reader:
+                self._fieldnames: Optional[Sequence[str]] = reader.columns
+        else:
+            with _open(archive_file) as f:
+                reader = CSVReader(f, columns)
+                self._fieldnames = reader.columns
+                self._rows = list(reader)
+            self._ids = {int(row[self.ID_FIELD]) for row in self._rows}
 
     @property
     def fieldnames(self) -> Sequence[str]:
@@ -21,28 +78,69 @@ class ArchiveFile:
             raise RuntimeError("Archive file has not been read yet.")
         return self._fieldnames
 
+    @property
+    def index(self) -> ArchiveIndex:
+        """The ID index of a file given by its path, built on first access."""
+        if self._index is None:
+            if self._rows is not None:
+                raise RuntimeError("Only uncompressed files given by path are indexed.")
+            self._index = ArchiveIndex(self._path, self.ID_FIELD, self._columns)
+        return self._index
+
     @property
     def all_ids(self) -> Set[int]:
+        if self._ids is None:
+            self._ids = set(self.index)
         return self._ids
 
-    def __iter__(self) -> Iterator[Dict[str, Any]]:
-        return iter(self._rows)
+    def __contains__(self, key) -> bool:
+        if self._rows is not None:
+            return key in self._ids
+        return key in self.index
+
+    def __iter__(self) -> Iterator[Mapping[str, Any]]:
+        if self._rows is not None:
+            return iter(self._rows)
+        return iter(
+            ParallelCSVReader(self._path, self._columns, processes=self._processes)
+        )
 
 
 class MainEditionFile:
-    def __init__(self, main_edition_file: TextIO) -> None:
+    """The main edition items, of which only the IDs are used.
+
+    Uncompressed files given by their path are indexed by ID (see `ArchiveIndex`),
+    other files are read into memory.
+    """
+
+    def __init__(self, main_edition_file: Union[str, TextIO]) -> None:
         self._read_file(main_edition_file)
 
-    def _read_file(self, file: TextIO, id_field: str = MAIN_EDITION_ID_FIELD):
-        reader = csv.DictReader(file)
-        self._fieldnames: Optional[Sequence[str]] = reader.fieldnames
-        self._rows: List[Dict[str, Any]] = [row for row in reader]
-        self._ids: Set[int] = {int(row[id_field]) for row in self._rows}
+    def _read_file(
+        self, file: Union[str, TextIO], id_field: str = MAIN_EDITION_ID_FIELD
+    ):
+        self._index: Optional[ArchiveIndex] = None
+
+        if isinstance(file, str) and detect_compression(file) is None:
+            self._index = ArchiveIndex(file, id_field, [id_field])
+            self._fieldnames: Optional[Sequence[str]] = self._index.fieldnames
+        else:
+            with _open(file) as f:
+                reader = CSVReader(f, [id_field])
+                self._fieldnames = reader.fieldnames
+                self._ids: Set[int] = {int(row[id_field]) for row in reader}
 
     def __contains__(self, key):
+        if self._index is not None:
+            return key in self._index
         return key in self._ids
 
 
+def _open(file: Union[str, TextIO]) -> ContextManager[TextIO]:
+    """Open a file given by its path; a file object is returned as is, without closing it."""
+    return open_file(file, newline="") if isinstance(file, str) else nullcontext(file)
+
+
 def merge_data(
     archive_file: ArchiveFile,
     main_edition_file: MainEditionFile,
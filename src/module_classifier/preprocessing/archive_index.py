@@ -0,0 +1,291 @@
+import csv
+import io
+import locale
+import logging
+import mmap
+import operator
+import os
+import struct
+from array import array
+from collections.abc import Mapping
+from tempfile import NamedTemporaryFile
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .compression import detect_compression
+from .parallel_reader import next_record_start, scan_quotechar
+from .reader import CSVReader, Record, set_field_size_limit
+from .settings import ARCHIVE_INDEX_SUFFIX
+
+# magic bytes, size and modification time of the CSV file, number of IDs and slots
+HEADER: struct.Struct = struct.Struct("<8sqqqq")
+MAGIC: bytes = b"MCIDX001"
+
+_HASH_MULTIPLIER: int = 0x9E3779B97F4A7C15
+_MASK: int = (1 << 64) - 1
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class ArchiveIndex(Mapping):
+    """An on-disk index of the records of a CSV file by an integer ID column.
+
+    The index stores the byte offset and length of the first record of each ID,
+    in file order, and an open-addressing hash table over the IDs. It is built
+    in a single pass over the file and cached in a file next to it, which is
+    rebuilt when the CSV file has changed. The cached index is memory-mapped, so
+    neither rows nor IDs are held in memory as Python objects.
+
+    Looking up an ID reads and parses only that record from the CSV file;
+    iterating yields the IDs in file order. Compressed files cannot be indexed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        id_field: str,
+        columns: Optional[Iterable[str]] = None,
+        *,
+        index_path: Optional[str] = None,
+        encoding: Optional[str] = None,
+        **fmtparams,
+    ):
+        """
+        Args:
+            path: the (uncompressed) CSV file
+            id_field: the column containing the integer IDs
+            columns: the columns of the records returned by lookups;
+                if None, all columns.
+            index_path: the index file; defaults to the CSV file path followed
+                by the ID field and '.idx'.
+            encoding: the text encoding of the CSV file
+            fmtparams: format parameters passed to `csv.reader()`
+        """
+        if detect_compression(path) is not None:
+            raise ValueError(f"Cannot index compressed file '{path}'.")
+
+        self.path: str = path
+        self.id_field: str = id_field
+        self.index_path: str = index_path or f"{path}.{id_field}{ARCHIVE_INDEX_SUFFIX}"
+        self.encoding: str = encoding or locale.getpreferredencoding(False)
+        self._fmtparams: Dict[str, Any] = fmtparams
+        self._quotechar: Optional[bytes] = scan_quotechar(self.encoding, **fmtparams)
+
+        with open(path, "rb") as f:
+            self._header_end: int = next_record_start(f, 0, False, self._quotechar)
+            f.seek(0)
+            header: bytes = f.read(self._header_end)
+        reader = CSVReader(
+            io.StringIO(header.decode(self.encoding), newline=""),
+            columns,
+            **fmtparams,
+        )
+        if id_field not in reader.fieldnames:
+            raise ValueError(f"'{path}' does not contain column '{id_field}'.")
+        self.fieldnames: List[str] = reader.fieldnames
+        self.columns: List[str] = reader.columns
+        self._positions: List[int] = reader._positions
+        self._index: Dict[str, int] = reader._index
+
+        self._file: Optional[BinaryIO] = None
+        self._load()
+
+    def _load(self):
+        stat: os.stat_result = os.stat(self.path)
+        buffer: Union[bytes, mmap.mmap, None] = None
+        try:
+            with open(self.index_path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass  # missing or empty index file
+
+        if buffer is None or not _is_valid(buffer, stat):
+            buffer = self._build(stat)
+
+        _, _, _, n_ids, n_slots = HEADER.unpack_from(buffer)
+        data: memoryview = memoryview(buffer)[HEADER.size :].cast("q")
+        self._buffer: Union[bytes, mmap.mmap] = buffer
+        self._ids: memoryview = data[:n_ids]
+        self._offsets: memoryview = data[n_ids : 2 * n_ids]
+        self._lengths: memoryview = data[2 * n_ids : 3 * n_ids]
+        self._slots: memoryview = data[3 * n_ids : 3 * n_ids + n_slots]
+        self._bits: int = n_slots.bit_length() - 1
+
+    def _build(self, stat: os.stat_result) -> bytes:
+        """Scan the CSV file for the IDs and byte ranges of its records, and cache the index."""
+        LOGGER.info(f"Indexing '{self.path}' by '{self.id_field}'...")
+        set_field_size_limit()
+        id_position: int = self.fieldnames.index(self.id_field)
+
+        ids: array = array("q")
+        offsets: array = array("q")
+        lengths: array = array("q")
+        seen: Set[int] = set()
+
+        with open(self.path, "rb") as f:
+            f.seek(self._header_end)
+            for start, record in _records(f, self._header_end, self._quotechar):
+                row: List[str] = next(
+                    csv.reader(
+                        io.StringIO(record.decode(self.encoding), newline=""),
+                        **self._fmtparams,
+                    ),
+                    [],
+                )
+                if not row:
+                    continue
+                try:
+                    id_: int = int(row[id_position])
+                except (IndexError, ValueError) as e:
+                    raise ValueError(
+                        f"Invalid value for '{self.id_field}' at byte {start} of '{self.path}'."
+                    ) from e
+                if id_ not in seen:
+                    seen.add(id_)
+                    ids.append(id_)
+                    offsets.append(start)
+                    lengths.append(len(record))
+
+        # a power of two with a load factor of at most 0.5
+        n_slots: int = 1 << (2 * len(ids)).bit_length()
+        bits: int = n_slots.bit_length() - 1
+        slots: array = array("q", bytes(8 * n_slots))
+        for position, id_ in enumerate(ids):
+            slot: int = _hash(id_, bits)
+            while slots[slot]:
+                slot = (slot + 1) & (n_slots - 1)
+            slots[slot] = position + 1
+
+        buffer: bytes = b"".join(
+            [
+                HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, len(ids), n_slots),
+                ids.tobytes(),
+                offsets.tobytes(),
+                lengths.tobytes(),
+                slots.tobytes(),
+            ]
+        )
+        try:
+            with NamedTemporaryFile(
+                "wb", dir=os.path.dirname(self.index_path) or ".", delete=False
+            ) as f:
+                f.write(buffer)
+            os.replace(f.name, self.index_path)
+        except OSError as e:
+            LOGGER.warning(f"Cannot cache index in '{self.index_path}': {e}")
+        return buffer
+
+    def _position(self, key: Any) -> Optional[int]:
+        try:
+            key = operator.index(key)
+        except TypeError:
+            return None
+        slots: memoryview = self._slots
+        mask: int = len(slots) - 1
+        slot: int = _hash(key, self._bits)
+        while slots[slot]:
+            position: int = slots[slot] - 1
+            if self._ids[position] == key:
+                return position
+            slot = (slot + 1) & mask
+        return None
+
+    def offset(self, key: int) -> Optional[int]:
+        """The byte offset of the first record with the given ID, if any."""
+        position: Optional[int] = self._position(key)
+        return None if position is None else self._offsets[position]
+
+    def __getitem__(self, key: int) -> Record:
+        position: Optional[int] = self._position(key)
+        if position is None:
+            raise KeyError(key)
+
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        self._file.seek(self._offsets[position])
+        record: bytes = self._file.read(self._lengths[position])
+
+        set_field_size_limit()
+        row: List[str] = next(
+            csv.reader(
+                io.StringIO(record.decode(self.encoding), newline=""),
+                **self._fmtparams,
+            )
+        )
+        if len(row) < len(self.fieldnames):
+            row += [None] * (len(self.fieldnames) - len(row))
+        return Record(self._index, [row[i] for i in self._positions])
+
+    def __contains__(self, key: object) -> bool:
+        return self._position(key) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def close(self):
+        """Close the CSV file, if it has been opened for lookups."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "ArchiveIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _is_valid(buffer: Union[bytes, mmap.mmap], stat: os.stat_result) -> bool:
+    """Check that an index is complete and up to date with the CSV file."""
+    if len(buffer) < HEADER.size:
+        return False
+    magic, size, mtime_ns, n_ids, n_slots = HEADER.unpack_from(buffer)
+    return (magic, size, mtime_ns) == (
+        MAGIC,
+        stat.st_size,
+        stat.st_mtime_ns,
+    ) and len(
+        buffer
+    ) == HEADER.size + 8 * (3 * n_ids + n_slots)
+
+
+def _hash(key: int, bits: int) -> int:
+    """Fibonacci hashing of a (64 bit) integer to the given number of bits."""
+    return ((key * _HASH_MULTIPLIER) & _MASK) >> (64 - bits) if bits else 0
+
+
+def _records(
+    f: BinaryIO, offset: int, quotechar: Optional[bytes]
+) -> Iterator[Tuple[int, bytes]]:
+    """Iterate over the records of a file, starting at the given offset.
+
+    Yields:
+        the byte offset and the bytes of each record, including the line break.
+    """
+    in_quotes: bool = False
+    start: int = offset
+    lines: List[bytes] = []
+    for line in f:
+        lines.append(line)
+        offset += len(line)
+        if quotechar is not None and line.count(quotechar) % 2 == 1:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            yield start, b"".join(lines)
+            lines = []
+            start = offset
+    if lines:
+        yield start, b"".join(lines)
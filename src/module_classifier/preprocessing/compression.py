@@ -0,0 +1,76 @@
+import bz2
+import gzip
+import lzma
+import os
+import sys
+from typing import IO, Callable, Dict, Optional, Tuple, Union
+
+Path = Union[str, "os.PathLike[str]"]
+
+OPENERS: Dict[str, Callable[..., IO]] = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+}
+EXTENSIONS: Dict[str, str] = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+MAGIC_BYTES: Tuple[Tuple[bytes, str], ...] = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+STDIO: str = "-"
+
+
+def detect_compression(path: Path, mode: str = "r") -> Optional[str]:
+    """Detect the compression format of a file.
+
+    Existing files that are opened for reading are detected by their magic bytes,
+    otherwise by their extension.
+
+    Returns:
+        'gzip', 'bz2', 'xz', or None for uncompressed files.
+    """
+    if "r" in mode and os.path.isfile(path):
+        with open(path, "rb") as f:
+            head: bytes = f.read(6)
+        for magic, compression in MAGIC_BYTES:
+            if head.startswith(magic):
+                return compression
+        return None
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def open_file(
+    path: Path,
+    mode: str = "r",
+    *,
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+) -> IO[str]:
+    """Open a text file, transparently (de-)compressing gzip, bz2 and xz files.
+
+    Args:
+        path: the file path; '-' refers to stdin/stdout (uncompressed).
+        mode: 'r', 'w', 'a' or 'x', optionally with 't'.
+        encoding: the text encoding
+        newline: as in `open()`; use '' for CSV files.
+
+    Returns:
+        a text stream that decompresses when reading and compresses when writing.
+    """
+    mode = mode.replace("t", "")
+    if mode not in ("r", "w", "a", "x"):
+        raise ValueError(f"Invalid mode '{mode}', must be a text mode.")
+
+    if path == STDIO:
+        # closing the returned stream must not close stdin/stdout
+        stream: IO[str] = sys.stdin if mode == "r" else sys.stdout
+        stream.flush()
+        return open(
+            stream.fileno(), mode, encoding=encoding, newline=newline, closefd=False
+        )
+
+    compression: Optional[str] = detect_compression(path, mode)
+    if compression is None:
+        return open(path, mode, encoding=encoding, newline=newline)
+    return OPENERS[compression](path, mode + "t", encoding=encoding, newline=newline)
@@ -0,0 +1,420 @@
+import json
+import logging
+import os
+import shutil
+from array import array
+from collections import defaultdict
+from functools import partial
+from typing import (
+    IO,
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from .parallel_reader import ParallelCSVReader
+from .preprocessing import clean
+from .reader import Record
+from .settings import (
+    CLASS_FIELD,
+    CORPUS_SUFFIX,
+    FIELD_CHAR_BUDGETS,
+    FIELD_TOKEN_BUDGETS,
+    ID_FIELD,
+    MIN_TOKEN_LENGTH,
+    PUNCTUATION_CHARACTERS,
+    TEXT_FIELDS,
+)
+
+FORMAT_VERSION: int = 1
+ARRAYS: Tuple[str, ...] = ("token_ids", "offsets", "label_ids", "row_ids")
+METADATA_FILE: str = "corpus.json"
+VOCABULARY_FILE: str = "vocabulary.txt"
+
+# Number of rows joined into FastText lines at once
+LINE_BATCH_SIZE: int = 10000
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class Corpus:
+    """A cleaned, tokenized archive, stored in a directory of NumPy arrays.
+
+    The tokens of all rows are stored as ids into a vocabulary in a single
+    array; the tokens of row i are `token_ids[offsets[i]:offsets[i + 1]]`.
+    Each row also has a label id (-1 if no label), indexing `labels`, and a row
+    id read from the ID column.
+
+    Loaded corpora are memory-mapped, and slicing (`corpus[start:stop]`) returns
+    a corpus sharing the same arrays without copying them.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Sequence[str],
+        labels: Sequence[str],
+        token_ids: np.ndarray,
+        offsets: np.ndarray,
+        label_ids: np.ndarray,
+        row_ids: np.ndarray,
+        settings: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            vocabulary: the distinct tokens
+            labels: the distinct labels
+            token_ids: the token ids of all rows, concatenated
+            offsets: the start of each row in token_ids, followed by the end
+                of the last row.
+            label_ids: the label id of each row; -1 for no label
+            row_ids: the ID of each row; -1 if its ID is empty or not an integer
+            settings: the settings the corpus has been built with
+        """
+        if not len(offsets) == len(label_ids) + 1 == len(row_ids) + 1:
+            raise ValueError("Corpus arrays differ in length.")
+
+        self.vocabulary: Sequence[str] = vocabulary
+        self.labels: Sequence[str] = labels
+        self.token_ids: np.ndarray = token_ids
+        self.offsets: np.ndarray = offsets
+        self.label_ids: np.ndarray = label_ids
+        self.row_ids: np.ndarray = row_ids
+        self.settings: Dict[str, Any] = settings or {}
+
+    def __len__(self) -> int:
+        return len(self.label_ids)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[np.ndarray, "Corpus"]:
+        """The token ids of a row, or a corpus view of a range of rows."""
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Corpus slices must be contiguous.")
+            stop = max(start, stop)
+            return Corpus(
+                self.vocabulary,
+                self.labels,
+                self.token_ids,
+                self.offsets[start : stop + 1],
+                self.label_ids[start:stop],
+                self.row_ids[start:stop],
+                self.settings,
+            )
+        return self.token_ids[self.offsets[key] : self.offsets[key + 1]]
+
+    def tokens(self, i: int) -> List[str]:
+        vocabulary: Sequence[str] = self.vocabulary
+        return [vocabulary[token_id] for token_id in self[i].tolist()]
+
+    def texts(self) -> Iterator[str]:
+        """Generate the cleaned text of each row."""
+        vocabulary: np.ndarray = np.array(self.vocabulary, dtype=object)
+        for start in range(0, len(self), LINE_BATCH_SIZE):
+            offsets: List[int] = self.offsets[
+                start : start + LINE_BATCH_SIZE + 1
+            ].tolist()
+            tokens: List[str] = vocabulary[
+                self.token_ids[offsets[0] : offsets[-1]]
+            ].tolist()
+            base: int = offsets[0]
+            for begin, end in zip(offsets, offsets[1:]):
+                yield " ".join(tokens[begin - base : end - base])
+
+    def row_labels(self, format_label: Callable[[str], str]) -> np.ndarray:
+        """Map the label of each row, converting each distinct label only once.
+
+        Raises:
+            ValueError: if a row has no label.
+        """
+        if len(self) and self.label_ids.min() < 0:
+            raise ValueError("Corpus contains rows without label.")
+        return np.array(
+            [format_label(label) for label in self.labels] or [""], dtype=object
+        )[self.label_ids]
+
+    def fasttext_lines(
+        self, row_labels: Optional[Sequence[str]] = None
+    ) -> Iterator[str]:
+        """Generate a FastText line per row.
+
+        Args:
+            row_labels: the FastText label (e.g. '__label__S1_M1') of each row;
+                if None, lines are unlabelled.
+
+        Returns:
+            the lines, equal to the ones generated by `Classifier.fasttext_line()`
+            up to repeated whitespace.
+        """
+        if row_labels is None:
+            return self.texts()
+        return (
+            f"{label} {text}".strip() for label, text in zip(row_labels, self.texts())
+        )
+
+    def write_fasttext(
+        self, target_file: IO[str], row_labels: Optional[Sequence[str]] = None
+    ):
+        for line in self.fasttext_lines(row_labels):
+            target_file.write(line)
+            target_file.write(os.linesep)
+        target_file.flush()
+
+    @classmethod
+    def build(
+        cls,
+        csv_file: str,
+        *,
+        text_fields: Iterable[str] = TEXT_FIELDS,
+        class_field: Optional[str] = CLASS_FIELD,
+        id_field: str = ID_FIELD,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
+        processes: int = 1,
+    ) -> "Corpus":
+        """Read and clean a CSV file.
+
+        Args:
+            csv_file: the CSV file, optionally compressed.
+            text_fields: the columns to extract text from
+            class_field: the column containing the labels, if any
+            id_field: the column containing the integer row ids; if not in the
+                file, rows are numbered from 0. Rows with an empty or non-integer
+                ID get the ID -1, rather than failing the build.
+            token_budgets: the maximum number of tokens to extract per field.
+            char_budgets: the maximum number of characters to scan per field.
+            processes: the number of processes for parsing and cleaning
+        """
+        settings: Dict[str, Any] = corpus_settings(
+            text_fields, class_field, id_field, token_budgets, char_budgets
+        )
+        if not settings["text_fields"]:
+            raise ValueError("No text fields given.")
+        LOGGER.info(f"Building corpus from '{csv_file}'...")
+
+        # assigns the next token id to unseen tokens, so that tokens are mapped
+        # to ids in C, by `map(vocabulary.__getitem__, tokens)`
+        vocabulary: DefaultDict[str, int] = defaultdict()
+        vocabulary.default_factory = vocabulary.__len__
+        labels: Dict[str, int] = {}
+        token_ids: array = array("i")
+        offsets: array = array("q", [0])
+        label_ids: array = array("i")
+        row_ids: array = array("q")
+
+        with ParallelCSVReader(
+            csv_file,
+            [
+                id_field,
+                *settings["text_fields"],
+                *([class_field] if class_field else []),
+            ],
+            processes=processes,
+            transform=partial(_clean_row, settings=settings),
+        ) as reader:
+            missing: List[str] = [
+                field
+                for field in settings["text_fields"]
+                if field not in reader.columns
+            ]
+            if missing:
+                raise ValueError(f"Missing input field(s): {missing}.")
+
+            for row_number, (row_id, label, tokens) in enumerate(reader):
+                token_ids.extend(map(vocabulary.__getitem__, tokens))
+                offsets.append(len(token_ids))
+                label_ids.append(
+                    -1 if label is None else labels.setdefault(label, len(labels))
+                )
+                row_ids.append(row_number if row_id is None else row_id)
+
+        return cls(
+            list(vocabulary),
+            list(labels),
+            np.frombuffer(token_ids, dtype=np.int32),
+            np.frombuffer(offsets, dtype=np.int64),
+            np.frombuffer(label_ids, dtype=np.int32),
+            np.frombuffer(row_ids, dtype=np.int64),
+            settings,
+        )
+
+    def save(self, path: str, source: Optional[str] = None):
+        """Save the corpus to a directory.
+
+        Args:
+            path: the directory; existing corpus files are overwritten.
+            source: the CSV file the corpus has been built from, if any, for
+                detecting when it changes.
+        """
+        os.makedirs(path, exist_ok=True)
+        metadata_file: str = os.path.join(path, METADATA_FILE)
+        if os.path.exists(metadata_file):
+            os.remove(metadata_file)  # invalidate while writing
+
+        for name in ARRAYS:
+            np.save(os.path.join(path, name + ".npy"), getattr(self, name))
+        with open(os.path.join(path, VOCABULARY_FILE), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.vocabulary))
+
+        metadata: Dict[str, Any] = {
+            "version": FORMAT_VERSION,
+            "settings": self.settings,
+            "source": _source_info(source) if source else None,
+            "labels": list(self.labels),
+            "rows": len(self),
+        }
+        with open(metadata_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(metadata_file + ".tmp", metadata_file)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "Corpus":
+        """Load a corpus from a directory, memory-mapping its arrays by default."""
+        metadata: Dict[str, Any] = _read_metadata(path)
+        if metadata.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported corpus format in '{path}'.")
+
+        arrays: List[np.ndarray] = [
+            np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+            for name in ARRAYS
+        ]
+        with open(os.path.join(path, VOCABULARY_FILE), encoding="utf-8") as f:
+            text: str = f.read()
+        vocabulary: List[str] = text.split("\n") if text else []
+
+        return cls(vocabulary, metadata["labels"], *arrays, metadata["settings"])
+
+    @classmethod
+    def from_csv(
+        cls,
+        csv_file: str,
+        corpus_path: Optional[str] = None,
+        *,
+        text_fields: Iterable[str] = TEXT_FIELDS,
+        class_field: Optional[str] = CLASS_FIELD,
+        id_field: str = ID_FIELD,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
+        processes: int = 1,
+    ) -> "Corpus":
+        """Load the cached corpus of a CSV file, building it if needed.
+
+        The corpus is rebuilt if the CSV file or any of the settings (including
+        the text cleaning settings) have changed.
+
+        Args:
+            csv_file: the CSV file, optionally compressed.
+            corpus_path: the corpus directory; defaults to the CSV file path
+                followed by '.corpus'.
+            For the other arguments, see `build()`.
+        """
+        corpus_path = corpus_path or csv_file + CORPUS_SUFFIX
+        settings: Dict[str, Any] = corpus_settings(
+            text_fields, class_field, id_field, token_budgets, char_budgets
+        )
+        try:
+            metadata: Dict[str, Any] = _read_metadata(corpus_path)
+        except (OSError, ValueError):
+            metadata = {}
+
+        if (
+            metadata.get("version") == FORMAT_VERSION
+            and metadata.get("settings") == settings
+            and metadata.get("source") == _source_info(csv_file)
+        ):
+            return cls.load(corpus_path)
+
+        corpus: Corpus = cls.build(
+            csv_file,
+            text_fields=text_fields,
+            class_field=class_field,
+            id_field=id_field,
+            token_budgets=token_budgets,
+            char_budgets=char_budgets,
+            processes=processes,
+        )
+        try:
+            corpus.save(corpus_path, source=csv_file)
+        except OSError as e:
+            LOGGER.warning(f"Cannot cache corpus in '{corpus_path}': {e}")
+            shutil.rmtree(corpus_path, ignore_errors=True)
+            return corpus
+        return cls.load(corpus_path)
+
+
+def corpus_settings(
+    text_fields: Iterable[str],
+    class_field: Optional[str],
+    id_field: str,
+    token_budgets: Mapping[str, int],
+    char_budgets: Mapping[str, int],
+) -> Dict[str, Any]:
+    """The settings that determine the contents of a corpus, as stored in its metadata."""
+    text_fields = list(text_fields)
+    return {
+        "text_fields": text_fields,
+        "class_field": class_field,
+        "id_field": id_field,
+        "token_budgets": {
+            f: token_budgets[f] for f in text_fields if f in token_budgets
+        },
+        "char_budgets": {f: char_budgets[f] for f in text_fields if f in char_budgets},
+        "punctuation": PUNCTUATION_CHARACTERS,
+        "min_token_length": MIN_TOKEN_LENGTH,
+    }
+
+
+def _clean_row(
+    row: Record, settings: Dict[str, Any]
+) -> Tuple[Optional[int], Optional[str], List[str]]:
+    """Extract the row id, label and cleaned tokens of a row."""
+    token_budgets: Dict[str, int] = settings["token_budgets"]
+    char_budgets: Dict[str, int] = settings["char_budgets"]
+    tokens: List[str] = " ".join(
+        clean(
+            row[field],
+            max_tokens=token_budgets.get(field),
+            max_chars=char_budgets.get(field),
+        )
+        for field in settings["text_fields"]
+    ).split()
+
+    row_id: Optional[str] = row.get(settings["id_field"])
+    label: Optional[str] = (
+        row.get(settings["class_field"]) if settings["class_field"] else None
+    )
+    return _row_id(row_id), label, tokens
+
+
+def _row_id(value: Optional[str]) -> Optional[int]:
+    """The integer ID of a row, None if there is no ID column, or -1 if invalid."""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return -1
+
+
+def _source_info(csv_file: str) -> Dict[str, Any]:
+    stat: os.stat_result = os.stat(csv_file)
+    return {
+        "path": os.path.abspath(csv_file),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _read_metadata(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, METADATA_FILE), encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,324 @@
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+
+from .settings import (
+    DEDUP_BANDS,
+    DEDUP_CHUNK_SIZE,
+    DEDUP_PERMUTATIONS,
+    DEDUP_SHINGLE_BLOCK,
+    DEDUP_SHINGLE_SIZE,
+    LABEL_PREFIX,
+)
+
+BandKeys = Tuple[int, ...]
+T = TypeVar("T")
+
+# polynomial hashing of the bytes of a token
+_BYTE_MULTIPLIER: int = 0x100000001B3
+_BYTE_MULTIPLIER_INVERSE: int = pow(_BYTE_MULTIPLIER, -1, 1 << 64)
+# combines the hashes of consecutive tokens into a shingle hash
+_SHINGLE_MULTIPLIER: np.uint64 = np.uint64(0x9E3779B97F4A7C15)
+
+_POWERS: Dict[int, np.ndarray] = {}
+
+
+class MinHasher:
+    """Compute MinHash signatures of texts and their locality-sensitive hashing (LSH) band keys.
+
+    A text is represented by the set of its shingles, i.e. runs of consecutive
+    tokens. The fraction of equal signature values of two texts estimates the
+    Jaccard similarity of their shingle sets. Each band key is a hash over a
+    slice of the signature, so texts with a similarity above `threshold` share at
+    least one band key with high probability.
+
+    A MinHasher only holds its (seeded) hash parameters, so it can be pickled and
+    used in worker processes; equal seeds give equal keys across processes.
+    """
+
+    def __init__(
+        self,
+        permutations: int = DEDUP_PERMUTATIONS,
+        bands: int = DEDUP_BANDS,
+        shingle_size: int = DEDUP_SHINGLE_SIZE,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            permutations: the size of the signatures
+            bands: the number of band keys per text; must divide `permutations`.
+            shingle_size: the number of tokens per shingle
+            seed: the random seed for the hash functions
+        """
+        if bands < 1 or permutations % bands:
+            raise ValueError(
+                f"Number of bands ({bands}) must divide the number of permutations ({permutations})."
+            )
+        if shingle_size < 1:
+            raise ValueError(f"Invalid shingle size: {shingle_size}.")
+
+        self.permutations: int = permutations
+        self.bands: int = bands
+        self.shingle_size: int = shingle_size
+
+        rng: np.random.Generator = np.random.default_rng(seed)
+        high: np.uint64 = np.iinfo(np.uint64).max
+        # multiply-shift hashing: ((a * x + b) mod 2^64) >> 32, with odd a
+        self._multipliers: np.ndarray = rng.integers(
+            1, high, permutations, dtype=np.uint64, endpoint=True
+        ) | np.uint64(1)
+        self._increments: np.ndarray = rng.integers(
+            0, high, permutations, dtype=np.uint64, endpoint=True
+        )
+        self._band_multipliers: np.ndarray = rng.integers(
+            1, high, permutations // bands, dtype=np.uint64, endpoint=True
+        ) | np.uint64(1)
+
+    @property
+    def threshold(self) -> float:
+        """The approximate Jaccard similarity above which texts become candidate duplicates."""
+        return (1 / self.bands) ** (self.bands / self.permutations)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Hash the shingles of a text of tokens separated by (ASCII) whitespace.
+
+        Texts with fewer tokens than the shingle size are a single shingle.
+        """
+        tokens: np.ndarray = _token_hashes(text)
+        n: int = max(len(tokens) - self.shingle_size + 1, min(len(tokens), 1))
+        shingles: np.ndarray = tokens[:n].copy()
+        for i in range(1, min(self.shingle_size, len(tokens))):
+            shingles *= _SHINGLE_MULTIPLIER
+            shingles += tokens[i : i + n]
+        return _mix(shingles)
+
+    def signature(self, text: str) -> np.ndarray:
+        """The MinHash signature of a text.
+
+        Shingles are hashed in blocks of DEDUP_SHINGLE_BLOCK, so that long texts
+        need no more memory than a block.
+
+        Returns:
+            an array of `permutations` unsigned integers; all-ones if there are no tokens.
+        """
+        shingles: np.ndarray = self.shingles(text)
+        minimum: np.ndarray = np.full(
+            self.permutations, np.iinfo(np.uint64).max, np.uint64
+        )
+        if not len(shingles):
+            return minimum
+        for start in range(0, len(shingles), DEDUP_SHINGLE_BLOCK):
+            values: np.ndarray = np.multiply.outer(
+                self._multipliers, shingles[start : start + DEDUP_SHINGLE_BLOCK]
+            )
+            values += self._increments[:, None]
+            np.minimum(minimum, values.min(axis=1), out=minimum)
+        # the shift is monotonic, so it can be applied after taking the minimum
+        return minimum >> np.uint64(32)
+
+    def band_keys(self, text: str) -> BandKeys:
+        """The LSH band keys of a text; empty if there are no tokens."""
+        if not text or text.isspace():
+            return ()
+        bands: np.ndarray = self.signature(text).reshape(self.bands, -1)
+        return tuple((bands * self._band_multipliers).sum(axis=1).tolist())
+
+    def line_band_keys(self, line: str) -> BandKeys:
+        """The LSH band keys of the text of a FastText line, ignoring its leading labels."""
+        line = line.lstrip()
+        while line.startswith(LABEL_PREFIX):
+            line = line.partition(" ")[2].lstrip()
+        return self.band_keys(line)
+
+
+class DuplicateIndex:
+    """Group items that share an LSH band key, i.e. near-duplicates, as they are added.
+
+    Items are numbered in the order they are added; each group is identified by
+    its first item. The index holds one integer per band key and item, not the
+    texts or signatures, so it can be fed from a stream.
+    """
+
+    def __init__(self, bands: int = DEDUP_BANDS):
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(bands)]
+        self._parents: array = array("q")
+        self.duplicates: int = 0
+
+    def add(self, keys: BandKeys) -> bool:
+        """Add an item by its band keys.
+
+        Items without keys (empty texts) are never duplicates.
+
+        Returns:
+            True if the item is a near-duplicate of an item added before.
+        """
+        if keys and len(keys) != len(self._buckets):
+            raise ValueError(
+                f"Expected {len(self._buckets)} band keys, got {len(keys)}."
+            )
+        item: int = len(self._parents)
+        self._parents.append(item)
+
+        duplicate: bool = False
+        for bucket, key in zip(self._buckets, keys):
+            other: int = bucket.setdefault(key, item)
+            if other != item:
+                self._union(other, item)
+                duplicate = True
+        self.duplicates += duplicate
+        return duplicate
+
+    def drop_duplicates(self, keyed_items: Iterable[Tuple[T, BandKeys]]) -> Iterator[T]:
+        """Add items with their band keys, yielding only those that are not near-duplicates."""
+        for item, keys in keyed_items:
+            if not self.add(keys):
+                yield item
+
+    def group(self, item: int) -> int:
+        """The first item of the group of near-duplicates containing an item."""
+        parents: array = self._parents
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    def groups(self) -> List[int]:
+        """The group of each item."""
+        return [self.group(item) for item in range(len(self))]
+
+    @property
+    def ratio(self) -> float:
+        """The fraction of items that are near-duplicates of earlier items."""
+        return self.duplicates / len(self) if len(self) else 0.0
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def _union(self, first: int, second: int):
+        first, second = self.group(first), self.group(second)
+        if first != second:
+            first, second = min(first, second), max(first, second)
+            self._parents[second] = first
+
+
+def _token_hashes(text: str) -> np.ndarray:
+    """Hash the tokens of a text, separated by ASCII whitespace (or control characters).
+
+    Computes polynomial hashes of the UTF-8 bytes of all tokens at once from the
+    prefix sums of the text, rather than hashing each token separately.
+    """
+    data: np.ndarray = np.frombuffer(text.encode(), np.uint8)
+    in_token: np.ndarray = np.zeros(len(data) + 2, np.int8)
+    in_token[1:-1] = data > 32
+    edges: np.ndarray = np.diff(in_token)
+    starts: np.ndarray = np.flatnonzero(edges == 1)
+    ends: np.ndarray = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return np.empty(0, np.uint64)
+
+    powers: np.ndarray = _powers(_BYTE_MULTIPLIER, len(data))[: len(data)]
+    prefix_sums: np.ndarray = np.zeros(len(data) + 1, np.uint64)
+    np.cumsum(data * powers, out=prefix_sums[1:])
+    # divide by the power at the start of each token, so that equal tokens have equal hashes
+    return (prefix_sums[ends] - prefix_sums[starts]) * _powers(
+        _BYTE_MULTIPLIER_INVERSE, starts[-1] + 1
+    )[starts]
+
+
+def _powers(base: int, n: int) -> np.ndarray:
+    """The first (at least) n powers of a number, modulo 2^64; cached per process."""
+    powers: Optional[np.ndarray] = _POWERS.get(base)
+    if powers is None or len(powers) < n:
+        size: int = max(n, 2 * len(powers) if powers is not None else 4096)
+        powers = np.full(size, base, np.uint64)
+        powers[0] = 1
+        _POWERS[base] = powers = np.cumprod(powers, out=powers)
+    return powers
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    """Scramble the bits of 64 bit hashes (the SplitMix64 finalizer), in place."""
+    hashes ^= hashes >> np.uint64(30)
+    hashes *= np.uint64(0xBF58476D1CE4E5B9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94D049BB133111EB)
+    hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+
+def keyed_line(
+    row: T, transform: Callable[[T], Optional[str]], hasher: MinHasher
+) -> Optional[Tuple[str, BandKeys]]:
+    """Transform a row into a FastText line, paired with its band keys.
+
+    Intended as the `transform` of a `ParallelCSVReader`, so that lines are hashed
+    in the worker processes.
+    """
+    line: Optional[str] = transform(row)
+    return None if line is None else (line, hasher.line_band_keys(line))
+
+
+def keyed_lines(
+    lines: Iterable[str], hasher: Optional[MinHasher] = None
+) -> Iterator[Tuple[str, BandKeys]]:
+    """Pair FastText lines with their band keys."""
+    hasher = hasher or MinHasher()
+    return ((line, hasher.line_band_keys(line)) for line in lines)
+
+
+def find_duplicates(
+    texts: Iterable[str], hasher: Optional[MinHasher] = None, processes: int = 1
+) -> DuplicateIndex:
+    """Group near-duplicate texts.
+
+    With several processes, chunks of DEDUP_CHUNK_SIZE texts are hashed in the
+    workers, and at most two chunks per process are read ahead of the index, so
+    the texts can be streamed.
+
+    Args:
+        texts: texts of whitespace-separated tokens, e.g. from `Classifier.fasttext_lines()`
+        hasher: the MinHasher; defaults to one with the default settings.
+        processes: the number of processes hashing the texts
+
+    Returns:
+        a DuplicateIndex with an item per text
+    """
+    hasher = hasher or MinHasher()
+    index = DuplicateIndex(hasher.bands)
+    if processes > 1:
+        texts = iter(texts)
+        window: int = 2 * processes
+        pending: Deque[Future] = deque()
+        with ProcessPoolExecutor(processes) as executor:
+            while True:
+                while len(pending) < window:
+                    chunk: List[str] = list(islice(texts, DEDUP_CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    pending.append(executor.submit(_band_keys, hasher, chunk))
+                if not pending:
+                    break
+                for keys in pending.popleft().result():
+                    index.add(keys)
+    else:
+        for keys in map(hasher.band_keys, texts):
+            index.add(keys)
+    return index
+
+
+def _band_keys(hasher: MinHasher, texts: List[str]) -> List[BandKeys]:
+    return [hasher.band_keys(text) for text in texts]
@@ -1,35 +1,78 @@
 import re
-from typing import Iterable, Match, Optional, Pattern
-
-from pydantic import BaseModel, PositiveInt
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Match, Optional, Pattern, Tuple
 
 from .settings import DEFAULT_MODULE_DELIMITER, MODULE_DELIMITERS
 
 
-class Module(BaseModel):
-    """Representation of the 'module' as defined in the taxonomy."""
+class Module:
+    """Representation of the 'module' as defined in the taxonomy.
+
+    Instances are interned and immutable: constructing the same module twice
+    returns the same object, so equality and hashing are identity-based.
+    """
+
+    __slots__ = ("section", "module", "__weakref__")
+
+    section: int
+    module: int
+
+    _instances: Dict[Tuple[int, int], "Module"] = {}
+
+    def __new__(cls, section: int, module: int) -> "Module":
+        key: Tuple[int, int] = (section, module)
+        instance: Optional[Module] = cls._instances.get(key)
+        if instance is None:
+            instance = object.__new__(cls)
+            object.__setattr__(instance, "section", cls.__validate("section", section))
+            object.__setattr__(instance, "module", cls.__validate("module", module))
+            instance = cls._instances.setdefault(
+                (instance.section, instance.module), instance
+            )
+            cls._instances[key] = instance
+        return instance
+
+    @staticmethod
+    def __validate(field: str, value: Any) -> int:
+        try:
+            value = int(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid value for '{field}': {value!r}") from e
+        if value <= 0:
+            raise ValueError(f"'{field}' must be a positive integer, got {value}.")
+        return value
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"'{self.__class__.__name__}' object is immutable.")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"'{self.__class__.__name__}' object is immutable.")
 
-    section: PositiveInt
-    module: PositiveInt
+    def __reduce__(self):
+        return self.__class__, (self.section, self.module)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(section={self.section}, module={self.module})"
+        )
 
     def __str__(self):
         return self.to_string()
 
-    def __field_to_str(self, field: str):
-        if field not in self.__annotations__:
-            raise ValueError(f"Field '{field}' is not defined in the model.")
-        return field[0].upper() + str(getattr(self, field))
-
-    def __fields_to_str(self, fields: Iterable[str], delimiter: str):
-        return delimiter.join((self.__field_to_str(field) for field in fields))
+    def to_string(self, delimiter: Optional[str] = DEFAULT_MODULE_DELIMITER) -> str:
+        """Generate a string representation suitable for a FastText line.
 
-    def to_string(self, delimiter: str = DEFAULT_MODULE_DELIMITER) -> str:
-        """Generate a string representation suitable for a FastText line."""
-        return self.__fields_to_str(Module.all_fields(), delimiter)
+        Args:
+            delimiter: the delimiter between section and module;
+                DEFAULT_MODULE_DELIMITER if None.
+        """
+        if delimiter is None:
+            delimiter = DEFAULT_MODULE_DELIMITER
+        return f"S{self.section}{delimiter}M{self.module}"
 
     @staticmethod
     def all_fields() -> Iterable[str]:
-        return Module.__annotations__.keys()
+        return ("section", "module")
 
     @classmethod
     def from_string(
@@ -38,15 +81,12 @@ class Module(BaseModel):
         *,
         label_prefix: str = "",
         delimiters: Iterable[str] = MODULE_DELIMITERS,
-    ):
+    ) -> "Module":
         """Parse a string representation of a module, optionally with a prefix (e.g. '__label__')."""
 
-        delimiters_pattern: str = "|".join(delimiters)
-        pattern: Pattern = re.compile(
-            rf"^{label_prefix}(?:S|s)(?P<section>\d\d?)({delimiters_pattern})(?:M|m)(?P<module>\d\d?)$"
-        )
-
-        match: Optional[Match] = pattern.fullmatch(s)
+        match: Optional[Match] = _module_pattern(
+            label_prefix, tuple(delimiters)
+        ).fullmatch(s)
 
         if match is None:
             raise ValueError(f"Invalid module string: {s}")
@@ -55,3 +95,26 @@ class Module(BaseModel):
                 section=int(match.group("section")),
                 module=int(match.group("module")),
             )
+
+
+@lru_cache(maxsize=None)
+def _module_pattern(label_prefix: str, delimiters: Tuple[str, ...]) -> Pattern:
+    delimiters_pattern: str = "|".join(delimiters)
+    return re.compile(
+        rf"^{label_prefix}(?:S|s)(?P<section>\d\d?)({delimiters_pattern})(?:M|m)(?P<module>\d\d?)$"
+    )
+
+
+@lru_cache(maxsize=4096)
+def normalize_module_label(
+    s: str,
+    delimiter: Optional[str] = DEFAULT_MODULE_DELIMITER,
+    delimiters: Tuple[str, ...] = tuple(MODULE_DELIMITERS),
+) -> str:
+    """Normalize a module string (e.g. 's1.m1') to its canonical form (e.g. 'S1_M1').
+
+    The delimiter defaults to DEFAULT_MODULE_DELIMITER, also if None.
+
+    Results are cached, because the same few labels occur in every row of the training data.
+    """
+    return Module.from_string(s, delimiters=delimiters).to_string(delimiter=delimiter)
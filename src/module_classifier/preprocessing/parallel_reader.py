@@ -0,0 +1,350 @@
+import csv
+import io
+import locale
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .compression import STDIO, detect_compression, open_file
+from .reader import CSVReader, Record, project_rows, set_field_size_limit
+from .settings import CSV_CHUNK_SIZE
+
+# Size of the blocks read when scanning for quotes and record boundaries
+BLOCK_SIZE: int = 1024 * 1024
+
+
+class _Chunk(NamedTuple):
+    """A byte range of a CSV file that starts and ends at record boundaries."""
+
+    path: str
+    start: int
+    end: int
+    encoding: str
+    index: Dict[str, int]
+    positions: Sequence[int]
+    n_fields: int
+    transform: Optional[Callable[[Record], Any]]
+    fmtparams: Dict[str, Any]
+
+
+class ParallelCSVReader:
+    """Read a CSV file with a header row in a pool of processes, keeping only the given columns.
+
+    The file is split into byte ranges of roughly `chunk_size` bytes. Each range
+    is moved to the next record boundary, i.e. the next line break that is not
+    inside a quoted field, and parsed by a worker process. Quoted fields are
+    detected by the parity of the number of quote characters preceding a line
+    break, which is counted in parallel, too. This requires that every field
+    containing the quote character is quoted, as written by `csv.writer()`.
+
+    Iterating yields a `Record` per (non-empty) row like `CSVReader`, or the
+    results of `transform` if given. Compressed files, stdin, files smaller than a
+    chunk, and a single process fall back to reading the file sequentially with
+    `CSVReader`; these can only be iterated once, and should be closed (e.g. by
+    using the reader as a context manager) if they are not exhausted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: Optional[Iterable[str]] = None,
+        *,
+        processes: Optional[int] = None,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        ordered: bool = True,
+        transform: Optional[Callable[[Record], Any]] = None,
+        encoding: Optional[str] = None,
+        **fmtparams,
+    ):
+        """
+        Args:
+            path: the CSV file path; '-' for stdin.
+            columns: the columns to read; if None, read all columns.
+            processes: the number of worker processes;
+                defaults to the number of CPUs available on the system.
+            chunk_size: the approximate number of bytes parsed per task
+            ordered: if False, yield the records of each chunk as soon as it has
+                been parsed, regardless of their order in the file.
+            transform: a picklable function applied to each record in the worker
+                processes, e.g. to extract a FastText line. Records for which it
+                returns None are skipped.
+            encoding: the text encoding; must encode line breaks and the quote
+                character as single ASCII bytes (e.g. UTF-8, not UTF-16).
+            fmtparams: format parameters passed to `csv.reader()`
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}.")
+
+        self.path: str = path
+        self.processes: int = processes or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        self.ordered: bool = ordered
+        self.transform: Optional[Callable[[Record], Any]] = transform
+        self.encoding: str = encoding or locale.getpreferredencoding(False)
+        self._fmtparams: Dict[str, Any] = fmtparams
+        self._quotechar: Optional[bytes] = scan_quotechar(self.encoding, **fmtparams)
+
+        self._file: Optional[io.TextIOBase] = None
+        if self._is_parallel():
+            with open(path, "rb") as f:
+                self._header_end: int = next_record_start(f, 0, False, self._quotechar)
+                f.seek(0)
+                header: str = f.read(self._header_end).decode(self.encoding)
+            self._reader: CSVReader = CSVReader(
+                io.StringIO(header, newline=""), columns, **fmtparams
+            )
+        else:
+            self._file = open_file(path, encoding=encoding, newline="")
+            self._reader = CSVReader(self._file, columns, **fmtparams)
+
+        self.fieldnames: List[str] = self._reader.fieldnames
+        self.columns: List[str] = self._reader.columns
+
+    def __enter__(self) -> "ParallelCSVReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the file if it is read sequentially."""
+        if self._file is not None:
+            self._file.close()
+
+    def _is_parallel(self) -> bool:
+        return (
+            self.processes > 1
+            and self.path != STDIO
+            and detect_compression(self.path) is None
+            and os.path.getsize(self.path) > self.chunk_size
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._file is None:
+            for results in self._parse_chunks():
+                yield from results
+        else:
+            yield from self._read_sequentially()
+
+    def _read_sequentially(self) -> Iterator[Any]:
+        try:
+            if self.transform is None:
+                yield from self._reader
+            else:
+                for record in self._reader:
+                    result: Any = self.transform(record)
+                    if result is not None:
+                        yield result
+        finally:
+            self.close()
+
+    def _parse_chunks(self) -> Iterator[List[Any]]:
+        with ProcessPoolExecutor(self.processes) as executor:
+            chunks: Iterator[_Chunk] = iter(self._chunks(executor))
+            # limit the number of parsed chunks held in memory
+            window: int = 2 * self.processes
+
+            if self.ordered:
+                pending: Deque[Future] = deque(
+                    executor.submit(_parse_chunk, chunk)
+                    for chunk in _take(chunks, window)
+                )
+                while pending:
+                    results: List[Any] = pending.popleft().result()
+                    for chunk in _take(chunks, 1):
+                        pending.append(executor.submit(_parse_chunk, chunk))
+                    yield self._records(results)
+            else:
+                running: Set[Future] = {
+                    executor.submit(_parse_chunk, chunk)
+                    for chunk in _take(chunks, window)
+                }
+                while running:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for chunk in _take(chunks, len(done)):
+                        running.add(executor.submit(_parse_chunk, chunk))
+                    for future in done:
+                        yield self._records(future.result())
+
+    def _records(self, results: List[Any]) -> List[Any]:
+        if self.transform is not None:
+            return results
+        index: Dict[str, int] = self._reader._index
+        return [Record(index, values) for values in results]
+
+    def _chunks(self, executor: ProcessPoolExecutor) -> List[_Chunk]:
+        """Split the file into byte ranges that start and end at record boundaries."""
+        size: int = os.path.getsize(self.path)
+        offsets: List[int] = list(range(self._header_end, size, self.chunk_size))
+        ranges: List[Tuple[int, int]] = list(zip(offsets, offsets[1:] + [size]))
+
+        # the number of quotes before each range determines whether it starts
+        # inside a quoted field; the last range is not needed
+        if self._quotechar is None:
+            quote_counts: List[int] = [0] * (len(ranges) - 1)
+        else:
+            quote_counts = list(
+                executor.map(
+                    _count_quotes,
+                    [self.path] * (len(ranges) - 1),
+                    [start for start, _ in ranges[:-1]],
+                    [end for _, end in ranges[:-1]],
+                    [self._quotechar] * (len(ranges) - 1),
+                )
+            )
+
+        boundaries: List[int] = [self._header_end]
+        in_quotes: bool = False
+        with open(self.path, "rb") as f:
+            for (start, _), count in zip(ranges[1:], quote_counts):
+                in_quotes = in_quotes != (count % 2 == 1)
+                boundaries.append(
+                    next_record_start(f, start, in_quotes, self._quotechar)
+                )
+        boundaries.append(size)
+
+        return [
+            _Chunk(
+                self.path,
+                start,
+                end,
+                self.encoding,
+                self._reader._index,
+                self._reader._positions,
+                len(self.fieldnames),
+                self.transform,
+                self._fmtparams,
+            )
+            for start, end in zip(boundaries, boundaries[1:])
+            if start < end
+        ]
+
+
+def _take(iterator: Iterator[Any], n: int) -> List[Any]:
+    return [item for _, item in zip(range(n), iterator)]
+
+
+def _count_quotes(path: str, start: int, end: int, quotechar: bytes) -> int:
+    """Count the quote characters in a byte range of a file."""
+    count: int = 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        while start < end:
+            block: bytes = f.read(min(BLOCK_SIZE, end - start))
+            if not block:
+                break
+            count += block.count(quotechar)
+            start += len(block)
+    return count
+
+
+def scan_quotechar(encoding: str, **fmtparams) -> Optional[bytes]:
+    """Check that record boundaries can be found by counting quote characters.
+
+    Args:
+        encoding: the text encoding of the file
+        fmtparams: format parameters passed to `csv.reader()`
+
+    Returns:
+        the encoded quote character, or None if fields are never quoted.
+    """
+    dialect = csv.reader([], **fmtparams).dialect
+    if dialect.quoting == csv.QUOTE_NONE or dialect.quotechar is None:
+        quotechar: Optional[bytes] = None
+    elif dialect.doublequote and dialect.escapechar is None:
+        quotechar = dialect.quotechar.encode(encoding)
+    else:
+        raise ValueError(
+            "Finding record boundaries requires doubled quote characters without an escape character."
+        )
+    if "\n".encode(encoding) != b"\n" or (
+        quotechar is not None and len(quotechar) != 1
+    ):
+        raise ValueError(
+            f"Unsupported encoding for finding record boundaries: '{encoding}'."
+        )
+    return quotechar
+
+
+def next_record_start(
+    f: BinaryIO, offset: int, in_quotes: bool, quotechar: Optional[bytes]
+) -> int:
+    """Find the first line break at or after the offset that is not inside a quoted field.
+
+    Args:
+        f: the file, opened in binary mode
+        offset: the position to start searching from
+        in_quotes: whether the offset is inside a quoted field
+        quotechar: the quote character, or None if fields are never quoted.
+
+    Returns:
+        the position after the line break, or the end of the file.
+    """
+    f.seek(offset)
+    position: int = offset
+    while True:
+        block: bytes = f.read(BLOCK_SIZE)
+        if not block:
+            return position
+        start: int = 0
+        while True:
+            newline: int = block.find(b"\n", start)
+            end: int = len(block) if newline < 0 else newline
+            if quotechar is not None and block.count(quotechar, start, end) % 2 == 1:
+                in_quotes = not in_quotes
+            if newline < 0:
+                break
+            if not in_quotes:
+                return position + newline + 1
+            start = newline + 1
+        position += len(block)
+
+
+def _parse_chunk(chunk: _Chunk) -> List[Any]:
+    """Parse the records in a byte range of a CSV file.
+
+    Returns:
+        the selected values of each record, or the (non-None) results of the
+        chunk's transform function.
+    """
+    with open(chunk.path, "rb") as f:
+        f.seek(chunk.start)
+        text: str = f.read(chunk.end - chunk.start).decode(chunk.encoding)
+
+    set_field_size_limit()
+    rows: Iterator[List[Optional[str]]] = project_rows(
+        csv.reader(io.StringIO(text, newline=""), **chunk.fmtparams),
+        chunk.positions,
+        chunk.n_fields,
+    )
+    if chunk.transform is None:
+        return list(rows)
+
+    results: List[Any] = []
+    for values in rows:
+        result: Any = chunk.transform(Record(chunk.index, values))
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def read_csv_parallel(
+    path: str, columns: Optional[Iterable[str]] = None, **kwargs
+) -> Iterator[Any]:
+    """Iterate over the rows of a CSV file parsed in parallel, see `ParallelCSVReader`."""
+    return iter(ParallelCSVReader(path, columns, **kwargs))
@@ -1,21 +1,186 @@
-import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from .settings import MIN_TOKEN_LENGTH, PUNCTUATION_CHARACTERS
 
+DIGITS: str = "0123456789"
 
-def clean(s: str) -> str:
-    for c in PUNCTUATION_CHARACTERS:
-        s = s.replace(c, " ")
+# Estimated number of input characters per output token, used for sizing chunks
+CHARS_PER_TOKEN: int = 8
 
-    # Replace all numbers with 0
-    for n in "0123456789":
-        s = s.replace(n, "0")
 
-    # Remove linebreaks, lowercase, remove short tokens
-    return " ".join(
-        (
-            token
-            for token in s.strip().replace(os.linesep, " ").lower().split()
-            if len(token) >= MIN_TOKEN_LENGTH
-        )
+class Normalizer:
+    """Text normalizer built once from the punctuation characters and minimum token length.
+
+    ASCII strings are normalized in a single `str.translate()` pass over a
+    precomputed table.
+    In other strings, the non-ASCII punctuation characters (e.g. typographic
+    quotes) are replaced first, which often leaves an ASCII string;
+    CPython has no fast path for translating non-ASCII strings.
+    """
+
+    __slots__ = (
+        "_ascii_table",
+        "_ascii_replacements",
+        "_non_ascii_replacements",
+        "_min_token_length",
     )
+
+    def __init__(
+        self,
+        punctuation: str = PUNCTUATION_CHARACTERS,
+        min_token_length: int = MIN_TOKEN_LENGTH,
+    ):
+        # punctuation takes precedence over digits
+        replacements: List[Tuple[str, str]] = [(c, " ") for c in punctuation] + [
+            (n, "0") for n in DIGITS if n != "0" and n not in punctuation
+        ]
+
+        ascii_table: List[str] = [chr(i) for i in range(128)]
+        for c, replacement in replacements:
+            if c.isascii():
+                ascii_table[ord(c)] = replacement
+
+        self._ascii_table: List[str] = ascii_table
+        self._ascii_replacements: Tuple[Tuple[str, str], ...] = tuple(
+            (c, replacement) for c, replacement in replacements if c.isascii()
+        )
+        self._non_ascii_replacements: Tuple[Tuple[str, str], ...] = tuple(
+            (c, replacement) for c, replacement in replacements if not c.isascii()
+        )
+        self._min_token_length: int = min_token_length
+
+    def clean(
+        self,
+        s: str,
+        max_tokens: Optional[int] = None,
+        max_chars: Optional[int] = None,
+    ) -> str:
+        """Replace punctuation and numbers, lowercase, and remove short tokens.
+
+        Args:
+            s: the input string
+            max_tokens: if given, return at most this many tokens. Long inputs
+                are scanned in chunks until enough tokens have been found, the
+                rest of the input is not processed.
+            max_chars: if given, only the first max_chars characters of the
+                input are scanned.
+
+        Returns:
+            the cleaned string; identical to truncating the fully cleaned
+            (character-limited) input after max_tokens tokens.
+        """
+        if max_chars is not None:
+            s = s[:max_chars]
+
+        if max_tokens is None:
+            return " ".join(self._tokens(s))
+        if len(s) <= max_tokens * CHARS_PER_TOKEN:
+            return " ".join(self._tokens(s)[:max_tokens])
+
+        tokens: List[str] = []
+        start: int = 0
+        while start < len(s) and len(tokens) < max_tokens:
+            end: int = start + (max_tokens - len(tokens)) * CHARS_PER_TOKEN
+            if end < len(s):
+                # cut at a whitespace so that no token is split across chunks
+                end = s.find(" ", end)
+                if end < 0:
+                    end = len(s)
+            tokens.extend(self._tokens(s[start:end]))
+            start = end
+        return " ".join(tokens[:max_tokens])
+
+    def clean_many(
+        self,
+        strings: Iterable[str],
+        max_tokens: Optional[int] = None,
+        max_chars: Optional[int] = None,
+    ) -> List[str]:
+        """Clean all strings in the input, see `clean()`."""
+        if max_tokens is None and max_chars is None:
+            return [" ".join(self._tokens(s)) for s in strings]
+        return [self.clean(s, max_tokens, max_chars) for s in strings]
+
+    def clean_column(
+        self,
+        values: Sequence[str],
+        max_tokens: Optional[int] = None,
+        max_chars: Optional[int] = None,
+    ) -> List[str]:
+        """Clean all values of a column, cleaning each distinct value only once."""
+        distinct: Dict[str, None] = dict.fromkeys(values)
+        cleaned: Dict[str, str] = dict(
+            zip(distinct, self.clean_many(distinct, max_tokens, max_chars))
+        )
+        return [cleaned[value] for value in values]
+
+    def _tokens(self, s: str) -> List[str]:
+        if not s.isascii():
+            for c, replacement in self._non_ascii_replacements:
+                s = s.replace(c, replacement)
+        if s.isascii():
+            s = s.translate(self._ascii_table)
+        else:
+            for c, replacement in self._ascii_replacements:
+                s = s.replace(c, replacement)
+
+        min_length: int = self._min_token_length
+        return [token for token in s.lower().split() if len(token) >= min_length]
+
+
+def column_values(column: Any) -> List[str]:
+    """Convert a column (list, NumPy array, pandas Series, pyarrow array) to a list of strings.
+
+    Missing values (None, NaN, NaT and pandas' NA, as in `pandas.isna()`) are
+    converted to empty strings, and bytes are decoded as UTF-8.
+    """
+    if hasattr(column, "to_pylist"):  # pyarrow
+        values = column.to_pylist()
+    elif hasattr(column, "tolist"):  # NumPy, pandas
+        values = column.tolist()
+    else:
+        values = list(column)
+    return [_column_value(value) for value in values]
+
+
+def _column_value(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    if value is None or value is _pandas_na():
+        return ""
+    # NaN and NaT are not equal to themselves
+    return "" if value != value else str(value)
+
+
+def _pandas_na() -> Any:
+    """pandas.NA, if pandas is imported (it cannot occur otherwise)."""
+    pandas: Any = sys.modules.get("pandas")
+    return getattr(pandas, "NA", None)
+
+
+DEFAULT_NORMALIZER: Normalizer = Normalizer()
+
+
+def clean(
+    s: str, max_tokens: Optional[int] = None, max_chars: Optional[int] = None
+) -> str:
+    return DEFAULT_NORMALIZER.clean(s, max_tokens, max_chars)
+
+
+def clean_many(
+    strings: Iterable[str],
+    max_tokens: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> List[str]:
+    return DEFAULT_NORMALIZER.clean_many(strings, max_tokens, max_chars)
+
+
+def clean_column(
+    values: Sequence[str],
+    max_tokens: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> List[str]:
+    return DEFAULT_NORMALIZER.clean_column(values, max_tokens, max_chars)
@@ -0,0 +1,123 @@
+import csv
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+from .settings import CSV_FIELD_SIZE_LIMIT
+
+
+def set_field_size_limit(limit: int = CSV_FIELD_SIZE_LIMIT) -> int:
+    """Set the CSV field size limit, capped to what the platform's C long supports.
+
+    Returns:
+        the limit that has been set
+    """
+    while True:
+        try:
+            csv.field_size_limit(limit)
+            return limit
+        except OverflowError:
+            limit //= 2
+
+
+class Record(Mapping):
+    """A CSV row restricted to a fixed set of columns.
+
+    The column index is shared by all records of a file, so a record only holds
+    a list of values. Records can be used wherever a row dictionary is read;
+    values of existing columns can be replaced, but no columns added.
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: Dict[str, int], values: List[Any]):
+        self._index: Dict[str, int] = index
+        self._values: List[Any] = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._index[key]]
+
+    def __setitem__(self, key: str, value: Any):
+        self._values[self._index[key]] = value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i: Optional[int] = self._index.get(key)
+        return default if i is None else self._values[i]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self)})"
+
+
+class CSVReader:
+    """Read a CSV file with a header row, keeping only the given columns.
+
+    Iterating yields a `Record` per (non-empty) row. Columns that are not in the
+    header are silently ignored, like keys missing from a `csv.DictReader` row;
+    rows shorter than the header are padded with None.
+    """
+
+    def __init__(
+        self,
+        f: Iterable[str],
+        columns: Optional[Iterable[str]] = None,
+        **fmtparams,
+    ):
+        """
+        Args:
+            f: the CSV file, opened with newline=''
+            columns: the columns to read; if None, read all columns.
+            fmtparams: format parameters passed to `csv.reader()`
+        """
+        set_field_size_limit()
+
+        self._reader = csv.reader(f, **fmtparams)
+        self.fieldnames: List[str] = next(self._reader, [])
+
+        # for duplicate column names, the last one wins (as in csv.DictReader)
+        positions: Dict[str, int] = {
+            column: i for i, column in enumerate(self.fieldnames)
+        }
+        self.columns: List[str] = [
+            column
+            for column in dict.fromkeys(self.fieldnames if columns is None else columns)
+            if column in positions
+        ]
+        self._positions: List[int] = [positions[column] for column in self.columns]
+        self._index: Dict[str, int] = {
+            column: i for i, column in enumerate(self.columns)
+        }
+
+    def __iter__(self) -> Iterator[Record]:
+        index: Dict[str, int] = self._index
+        for values in project_rows(self._reader, self._positions, len(self.fieldnames)):
+            yield Record(index, values)
+
+
+def project_rows(
+    rows: Iterable[List[str]], positions: Sequence[int], n_fields: int
+) -> Iterator[List[Optional[str]]]:
+    """Select the values at the given positions from each non-empty row.
+
+    Rows shorter than n_fields are padded with None.
+    """
+    for row in rows:
+        if not row:
+            continue
+        if len(row) < n_fields:
+            row += [None] * (n_fields - len(row))
+        yield [row[i] for i in positions]
+
+
+def read_csv(
+    f: TextIO, columns: Optional[Iterable[str]] = None, **fmtparams
+) -> Iterator[Record]:
+    """Iterate over the rows of a CSV file, keeping only the given columns."""
+    return iter(CSVReader(f, columns, **fmtparams))
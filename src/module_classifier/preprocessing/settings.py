@@ -1,6 +1,7 @@
 import string
+import sys
 from pathlib import Path
-from typing import Iterable, Literal
+from typing import Dict, Iterable, Literal
 
 CWD: Path = Path(__file__).parent
 
@@ -23,9 +24,40 @@ MAIN_EDITION_ID_FIELD: str = "link_id"
 
 
 CLASS_FIELD: str = "module_id_for_all"
+ID_FIELD: str = "id"
 MIN_TOKEN_LENGTH: int = 3
 PUNCTUATION_CHARACTERS: str = string.punctuation + "–‒—‘’”“"
 
+# Maximum number of (cleaned) tokens extracted per text field, e.g.
+# {"abstract_description": 2000}. Empty by default, so that inputs are not cut and
+# match what the shipped models were trained on; budgets are opt-in.
+FIELD_TOKEN_BUDGETS: Dict[str, int] = {}
+# Maximum number of input characters scanned per text field, e.g.
+# {"abstract_description": 100000}; empty (no limit) by default.
+FIELD_CHAR_BUDGETS: Dict[str, int] = {}
+
+# Maximum size of a single CSV field; archive excerpts can be very long
+CSV_FIELD_SIZE_LIMIT: int = sys.maxsize
+# Size of the byte ranges into which CSV files are split for parallel parsing
+CSV_CHUNK_SIZE: int = 16 * 1024 * 1024
+# Suffix of the ID index files cached next to archive CSV files
+ARCHIVE_INDEX_SUFFIX: str = ".idx"
+# Suffix of the pre-cleaned corpus directories cached next to CSV files
+CORPUS_SUFFIX: str = ".corpus"
+
+# MinHash signature size and number of LSH bands for near-duplicate detection;
+# texts become candidate duplicates above a Jaccard similarity of about
+# (1 / DEDUP_BANDS) ** (DEDUP_BANDS / DEDUP_PERMUTATIONS), here ~0.7
+DEDUP_PERMUTATIONS: int = 128
+DEDUP_BANDS: int = 16
+# Number of consecutive tokens per shingle
+DEDUP_SHINGLE_SIZE: int = 3
+# Number of shingles hashed at once, bounding the memory per text
+# (DEDUP_PERMUTATIONS * DEDUP_SHINGLE_BLOCK 64 bit integers, here 4 MB)
+DEDUP_SHINGLE_BLOCK: int = 4096
+# Number of texts hashed per task by the worker processes of find_duplicates()
+DEDUP_CHUNK_SIZE: int = 256
+
 DEFAULT_MODEL: str = str(CWD / "data" / "classifier.model.ftz")
 
 DEFAULT_MODULE_DELIMITER: str = "_"
@@ -0,0 +1 @@
+from .server import InferenceServer, PredictionService
@@ -0,0 +1,102 @@
+import mmap
+import threading
+from bisect import bisect_left
+from typing import List, Sequence
+
+import numpy as np
+
+from .settings import LATENCY_BUCKETS
+
+# The counters per endpoint, followed by the latency histogram buckets
+_REQUESTS, _ERRORS, _ITEMS, _LATENCY_MICROSECONDS = range(4)
+_COUNTERS: int = 4
+
+
+class Metrics:
+    """Request counters and latency histograms shared by the worker processes of a server.
+
+    The counters are held in anonymous shared memory, created before the workers
+    are forked. Each worker only writes the row of its `worker` slot, so no lock
+    is needed between processes, and any worker can report the totals of all.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        workers: int = 1,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """
+        Args:
+            endpoints: the endpoints to count requests for
+            workers: the number of worker slots
+            buckets: the upper bounds of the latency histogram buckets in seconds
+        """
+        if workers < 1:
+            raise ValueError(f"Invalid number of workers: {workers}.")
+        self.endpoints: List[str] = list(endpoints)
+        self.workers: int = workers
+        self.buckets: List[float] = sorted(buckets)
+        # the slot written by this process
+        self.worker: int = 0
+
+        shape = (workers, len(self.endpoints), _COUNTERS + len(self.buckets) + 1)
+        self._memory: mmap.mmap = mmap.mmap(-1, int(np.prod(shape)) * 8)
+        self._counters: np.ndarray = np.frombuffer(self._memory, np.int64).reshape(
+            shape
+        )
+        # guards the row of this process against its request threads
+        self._lock: threading.Lock = threading.Lock()
+
+    def observe(
+        self, endpoint: str, seconds: float, items: int = 0, error: bool = False
+    ):
+        """Count a request to an endpoint, its latency and the number of items predicted."""
+        row: np.ndarray = self._counters[self.worker, self.endpoints.index(endpoint)]
+        with self._lock:
+            row[_REQUESTS] += 1
+            row[_ERRORS] += error
+            row[_ITEMS] += items
+            row[_LATENCY_MICROSECONDS] += round(seconds * 1e6)
+            row[_COUNTERS + bisect_left(self.buckets, seconds)] += 1
+
+    def requests(self, endpoint: str) -> int:
+        """The number of requests to an endpoint, by all workers."""
+        return int(self._counters[:, self.endpoints.index(endpoint), _REQUESTS].sum())
+
+    def render(self, prefix: str = "module_classifier") -> str:
+        """The metrics of all workers in the Prometheus text format."""
+        totals: np.ndarray = self._counters.sum(axis=0)
+        lines: List[str] = []
+        for name, kind, index in [
+            ("requests_total", "counter", _REQUESTS),
+            ("errors_total", "counter", _ERRORS),
+            ("predictions_total", "counter", _ITEMS),
+        ]:
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for endpoint, counters in zip(self.endpoints, totals):
+                lines.append(
+                    f'{prefix}_{name}{{endpoint="{endpoint}"}} {counters[index]}'
+                )
+
+        name: str = f"{prefix}_request_duration_seconds"
+        lines.append(f"# TYPE {name} histogram")
+        for endpoint, counters in zip(self.endpoints, totals):
+            cumulative: np.ndarray = counters[_COUNTERS:].cumsum()
+            for bound, count in zip(self.buckets + ["+Inf"], cumulative):
+                lines.append(
+                    f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}'
+                )
+            lines.append(
+                f'{name}_sum{{endpoint="{endpoint}"}}'
+                f" {counters[_LATENCY_MICROSECONDS] / 1e6}"
+            )
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {counters[_REQUESTS]}')
+
+        lines.append(f"# TYPE {prefix}_worker_requests_total counter")
+        for worker, counters in enumerate(self._counters):
+            lines.append(
+                f'{prefix}_worker_requests_total{{worker="{worker}"}}'
+                f" {counters[:, _REQUESTS].sum()}"
+            )
+        return "\n".join(lines) + "\n"
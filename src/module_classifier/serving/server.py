@@ -0,0 +1,549 @@
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from ..classification.binary_classifier import MainEditionClassifier
+from ..classification.combined import CombinedClassifier
+from ..classification.module_classifier import ModuleClassifier, Prediction
+from .metrics import Metrics
+from .settings import (
+    SERVER_BACKLOG,
+    SERVER_HOST,
+    SERVER_KEEPALIVE_TIMEOUT,
+    SERVER_MAX_BATCH_SIZE,
+    SERVER_MAX_BODY_SIZE,
+    SERVER_PORT,
+)
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+MODULE_ENDPOINT: str = "/predict/module"
+MAIN_EDITION_ENDPOINT: str = "/predict/main-edition"
+ROWS_ENDPOINT: str = "/predict/rows"
+PREDICT_ENDPOINTS: Tuple[str, ...] = (
+    MODULE_ENDPOINT,
+    MAIN_EDITION_ENDPOINT,
+    ROWS_ENDPOINT,
+)
+LIVENESS_ENDPOINT: str = "/health/live"
+READINESS_ENDPOINT: str = "/health/ready"
+METRICS_ENDPOINT: str = "/metrics"
+
+# A worker restarted sooner than this many seconds after it started is delayed
+_MIN_WORKER_UPTIME: float = 1.0
+
+
+class RequestError(ValueError):
+    """An invalid request, answered with an HTTP error status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status: HTTPStatus = status
+
+
+class PredictionService:
+    """The prediction endpoints of the inference server, independent of HTTP.
+
+    Request bodies are JSON objects:
+
+    - /predict/module: `{"texts": [...], "k": 3}`, answered with the top k modules
+      and their probabilities per text;
+    - /predict/main-edition: `{"texts": [...]}`, answered with the predicted label
+      and the probability of being a main edition per text;
+    - /predict/rows: `{"rows": [{...}, ...], "k": 3}`, rows such as those of a CSV
+      file, answered with the predictions of each loaded classifier per row. The
+      text fields are the classifiers' defaults, unless given as "text_fields"
+      and "main_edition_text_fields".
+    """
+
+    def __init__(
+        self,
+        module_classifier: Optional[ModuleClassifier] = None,
+        main_edition_classifier: Optional[MainEditionClassifier] = None,
+        max_batch_size: int = SERVER_MAX_BATCH_SIZE,
+    ):
+        """
+        Args:
+            module_classifier: the module classifier, if any
+            main_edition_classifier: the main edition classifier, if any
+            max_batch_size: the maximum number of texts or rows per request
+        """
+        if module_classifier is None and main_edition_classifier is None:
+            raise ValueError("No classifier given.")
+        self.module_classifier: Optional[ModuleClassifier] = module_classifier
+        self.main_edition_classifier: Optional[MainEditionClassifier] = (
+            main_edition_classifier
+        )
+        self.max_batch_size: int = max_batch_size
+
+    def predict(self, endpoint: str, body: Any) -> Tuple[Dict[str, Any], int]:
+        """Answer a request to a prediction endpoint.
+
+        Returns:
+            the response body and the number of texts or rows predicted
+
+        Raises:
+            RequestError: if the request is invalid or its classifier is not loaded
+            ValueError: if a classifier rejects the input, e.g. a row lacks a field
+        """
+        if not isinstance(body, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Expected a JSON object.")
+
+        if endpoint == MODULE_ENDPOINT:
+            classifier: ModuleClassifier = self._module_classifier()
+            texts: List[str] = self._items(body, "texts", str)
+            predictions: Iterable[List[Prediction]] = classifier.predict_batch(
+                texts, _k(body)
+            )
+            return {"predictions": [_modules(p) for p in predictions]}, len(texts)
+
+        if endpoint == MAIN_EDITION_ENDPOINT:
+            main_edition_classifier: MainEditionClassifier = (
+                self._main_edition_classifier()
+            )
+            texts = self._items(body, "texts", str)
+            labels, probs = main_edition_classifier.predict_binary(texts)
+            return {
+                "predictions": [
+                    {"main_edition": label, "prob": prob}
+                    for label, prob in zip(labels.tolist(), probs.tolist())
+                ]
+            }, len(texts)
+
+        if endpoint == ROWS_ENDPOINT:
+            rows: List[Dict[str, str]] = self._items(body, "rows", dict)
+            return {"predictions": self._predict_rows(rows, body)}, len(rows)
+
+        raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown endpoint '{endpoint}'.")
+
+    def _predict_rows(
+        self, rows: List[Dict[str, str]], body: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        module_classifier: Optional[ModuleClassifier] = self.module_classifier
+        main_edition_classifier: Optional[MainEditionClassifier] = (
+            self.main_edition_classifier
+        )
+        fields: List[str] = []
+        main_edition_fields: List[str] = []
+        if module_classifier is not None:
+            fields = _fields(body, "text_fields", module_classifier.DEFAULT_TEXT_FIELDS)
+        if main_edition_classifier is not None:
+            main_edition_fields = _fields(
+                body,
+                "main_edition_text_fields",
+                main_edition_classifier.DEFAULT_TEXT_FIELDS,
+            )
+        _check_rows(rows, fields + main_edition_fields)
+
+        if module_classifier is not None and main_edition_classifier is not None:
+            # cleans the fields read by both classifiers only once
+            combined = CombinedClassifier(
+                module_classifier,
+                main_edition_classifier,
+                fields,
+                main_edition_fields,
+            )
+            return [
+                {
+                    "modules": _modules(prediction.modules),
+                    "main_edition": prediction.main_edition,
+                    "main_edition_prob": prediction.main_edition_prob,
+                }
+                for prediction in combined.predict_rows(rows, _k(body))
+            ]
+
+        if module_classifier is not None:
+            return [
+                {"modules": _modules(predictions.to_predictions())}
+                for predictions in module_classifier.predict_rows(
+                    rows, _k(body), fields
+                )
+            ]
+
+        predicted, true_probs = main_edition_classifier.predict_binary_rows(
+            rows, main_edition_fields
+        )
+        return [
+            {"main_edition": label, "main_edition_prob": prob}
+            for label, prob in zip(predicted.tolist(), true_probs.tolist())
+        ]
+
+    def warm_up(self):
+        """Predict once with each classifier.
+
+        fastText initializes its NumPy bindings on the first prediction; if request
+        threads make their first predictions concurrently, this can deadlock.
+        """
+        if self.module_classifier is not None:
+            self.module_classifier.predict_batch([""])
+        if self.main_edition_classifier is not None:
+            self.main_edition_classifier.predict_binary([""])
+
+    def _module_classifier(self) -> ModuleClassifier:
+        if self.module_classifier is None:
+            raise RequestError(
+                HTTPStatus.NOT_FOUND, "The module classifier is not loaded."
+            )
+        return self.module_classifier
+
+    def _main_edition_classifier(self) -> MainEditionClassifier:
+        if self.main_edition_classifier is None:
+            raise RequestError(
+                HTTPStatus.NOT_FOUND, "The main edition classifier is not loaded."
+            )
+        return self.main_edition_classifier
+
+    def _items(self, body: Dict[str, Any], name: str, item_type: type) -> List[Any]:
+        items: Any = body.get(name)
+        if not isinstance(items, list) or not items:
+            raise RequestError(
+                HTTPStatus.BAD_REQUEST, f"'{name}' must be a non-empty list."
+            )
+        if len(items) > self.max_batch_size:
+            raise RequestError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"At most {self.max_batch_size} {name} per request, got {len(items)}.",
+            )
+        if not all(isinstance(item, item_type) for item in items):
+            raise RequestError(
+                HTTPStatus.BAD_REQUEST,
+                f"'{name}' must only contain {item_type.__name__} items.",
+            )
+        return items
+
+
+def _k(body: Dict[str, Any]) -> int:
+    k: Any = body.get("k", 1)
+    if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid k: {k}.")
+    return k
+
+
+def _fields(body: Dict[str, Any], name: str, default: Iterable[str]) -> List[str]:
+    fields: Any = body.get(name, list(default))
+    if (
+        not isinstance(fields, list)
+        or not fields
+        or not all(isinstance(field, str) for field in fields)
+    ):
+        raise RequestError(
+            HTTPStatus.BAD_REQUEST, f"'{name}' must be a non-empty list of strings."
+        )
+    return fields
+
+
+def _check_rows(rows: List[Dict[str, Any]], fields: Iterable[str]):
+    """Reject text fields that are not strings; classifiers reject missing fields."""
+    for i, row in enumerate(rows):
+        for field in fields:
+            if field in row and not isinstance(row[field], str):
+                raise RequestError(
+                    HTTPStatus.BAD_REQUEST,
+                    f"Field '{field}' of row {i} must be a string, "
+                    f"got {type(row[field]).__name__}.",
+                )
+
+
+def _modules(predictions: Iterable[Prediction]) -> List[Dict[str, Any]]:
+    return [
+        {"module": str(prediction.module), "prob": float(prediction.prob)}
+        for prediction in predictions
+    ]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # closes idle keep-alive connections, so that workers can drain
+    timeout = SERVER_KEEPALIVE_TIMEOUT
+    # headers and body are written separately; with Nagle's algorithm, the body
+    # would wait for the client's delayed ACK of the headers
+    disable_nagle_algorithm = True
+
+    server: "_WorkerHTTPServer"
+
+    def do_GET(self):
+        path: str = urlsplit(self.path).path
+        if path == LIVENESS_ENDPOINT:
+            self._send_json(HTTPStatus.OK, {"status": "alive"})
+        elif path == READINESS_ENDPOINT:
+            ready: bool = not self.server.draining
+            self._send_json(
+                HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE,
+                {
+                    "status": "ready" if ready else "draining",
+                    "worker": self.server.metrics.worker,
+                    "pid": os.getpid(),
+                },
+            )
+        elif path == METRICS_ENDPOINT:
+            self._send(
+                HTTPStatus.OK,
+                self.server.metrics.render().encode(),
+                "text/plain; version=0.0.4",
+            )
+        elif path in PREDICT_ENDPOINTS:
+            self._send_error(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST.")
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown endpoint '{path}'.")
+
+    def do_POST(self):
+        path: str = urlsplit(self.path).path
+        if path not in PREDICT_ENDPOINTS:
+            # the body is not read, so the connection cannot be reused
+            self.close_connection = True
+            if path in (LIVENESS_ENDPOINT, READINESS_ENDPOINT, METRICS_ENDPOINT):
+                self._send_error(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET.")
+            else:
+                self._send_error(HTTPStatus.NOT_FOUND, f"Unknown endpoint '{path}'.")
+            return
+
+        start: float = time.perf_counter()
+        items: int = 0
+        try:
+            body: Any = json.loads(self._read_body())
+            payload, items = self.server.service.predict(path, body)
+            status: HTTPStatus = HTTPStatus.OK
+        except RequestError as e:
+            status, payload = e.status, {"error": str(e)}
+        except ValueError as e:  # including invalid JSON
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception:
+            LOGGER.exception(f"Request to '{path}' failed.")
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {
+                "error": "Internal server error."
+            }
+        # observed before responding, so that clients see their requests counted
+        self.server.metrics.observe(
+            path, time.perf_counter() - start, items, error=status != HTTPStatus.OK
+        )
+        self._send_json(status, payload)
+
+    def _read_body(self) -> bytes:
+        length: Optional[str] = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            raise RequestError(HTTPStatus.LENGTH_REQUIRED, "Content-Length required.")
+        if int(length) > self.server.max_body_size:
+            self.close_connection = True
+            raise RequestError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Request body exceeds {self.server.max_body_size} bytes.",
+            )
+        return self.rfile.read(int(length))
+
+    def _send_error(self, status: HTTPStatus, message: str):
+        self._send_json(status, {"error": message})
+
+    def _send_json(self, status: HTTPStatus, payload: Any):
+        self._send(status, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str):
+        if self.server.draining:
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        LOGGER.debug(f"{self.address_string()} {format % args}")
+
+
+class _WorkerHTTPServer(ThreadingHTTPServer):
+    """An HTTP server accepting connections from a listening socket shared by workers."""
+
+    # in-flight requests are completed when the server is closed
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(
+        self,
+        listener: socket.socket,
+        service: PredictionService,
+        metrics: Metrics,
+        max_body_size: int = SERVER_MAX_BODY_SIZE,
+    ):
+        super().__init__(
+            listener.getsockname()[:2], _RequestHandler, bind_and_activate=False
+        )
+        self.socket.close()
+        self.socket = listener
+        self.service: PredictionService = service
+        self.metrics: Metrics = metrics
+        self.max_body_size: int = max_body_size
+        self.draining: bool = False
+
+    def get_request(self) -> Tuple[socket.socket, Any]:
+        # the listener is non-blocking, so that workers that lose the race for a
+        # connection return to their loop; the connection itself is blocking
+        connection, address = self.socket.accept()
+        connection.setblocking(True)
+        return connection, address
+
+    def handle_error(self, request: socket.socket, client_address: Any):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            LOGGER.debug(f"Connection from {client_address[0]} closed by the client.")
+        else:
+            LOGGER.exception(f"Error serving connection from {client_address[0]}.")
+
+
+class InferenceServer:
+    """A pre-forking HTTP server for the module and main edition classifiers.
+
+    The classifiers are loaded once by the master process, which then forks
+    `workers` processes: the model pages are shared copy-on-write rather than
+    loaded per worker. The workers accept connections from one listening socket
+    and serve each connection in a thread. Workers that die are restarted.
+
+    Endpoints:
+
+    - POST /predict/module, /predict/main-edition and /predict/rows, see
+      `PredictionService`;
+    - GET /health/live: the worker is running;
+    - GET /health/ready: the worker accepts requests; 503 while shutting down;
+    - GET /metrics: request, error and prediction counters, and latency
+      histograms per endpoint, of all workers in the Prometheus text format.
+
+    SIGTERM or SIGINT shut the workers down after their in-flight requests.
+    """
+
+    def __init__(
+        self,
+        module_classifier: Optional[ModuleClassifier] = None,
+        main_edition_classifier: Optional[MainEditionClassifier] = None,
+        *,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        workers: Optional[int] = None,
+        max_batch_size: int = SERVER_MAX_BATCH_SIZE,
+        max_body_size: int = SERVER_MAX_BODY_SIZE,
+    ):
+        """
+        Args:
+            module_classifier: the module classifier, if any
+            main_edition_classifier: the main edition classifier, if any
+            host: the address to listen on
+            port: the port to listen on; if 0, a free port is chosen, see `address`.
+            workers: the number of worker processes;
+                defaults to the number of CPUs available on the system.
+            max_batch_size: the maximum number of texts or rows per request
+            max_body_size: the maximum size of a request body in bytes
+        """
+        self.service: PredictionService = PredictionService(
+            module_classifier, main_edition_classifier, max_batch_size
+        )
+        self.host: str = host
+        self.port: int = port
+        self.workers: int = workers or os.cpu_count() or 1
+        self.max_body_size: int = max_body_size
+        self.metrics: Metrics = Metrics(PREDICT_ENDPOINTS, self.workers)
+        self.socket: Optional[socket.socket] = None
+        # the worker slot and start time per process ID
+        self._workers: Dict[int, Tuple[int, float]] = {}
+        self._stopping: bool = False
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """The host and port the server listens on, binding the socket if necessary."""
+        self.bind()
+        return self.socket.getsockname()[:2]
+
+    def bind(self):
+        """Open the listening socket, e.g. to learn the port before `serve_forever()`."""
+        if self.socket is None:
+            self.socket = socket.create_server(
+                (self.host, self.port), backlog=SERVER_BACKLOG
+            )
+            self.socket.setblocking(False)
+
+    def serve_forever(self):
+        """Fork the workers and restart them when they die, until `stop()` is called."""
+        self.bind()
+        self._stopping = False
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: self.stop())
+
+        host, port = self.address
+        LOGGER.info(f"Serving on http://{host}:{port} with {self.workers} worker(s).")
+        # the workers inherit the initialized models
+        self.service.warm_up()
+        # keep the objects of the master out of the garbage collector, which would
+        # otherwise touch their pages and unshare them in the workers
+        gc.freeze()
+        for slot in range(self.workers):
+            self._fork(slot)
+
+        while self._workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot, started = self._workers.pop(pid)
+            if not self._stopping:
+                LOGGER.warning(
+                    f"Worker {slot} (pid {pid}) exited with status {status}, restarting."
+                )
+                if time.monotonic() - started < _MIN_WORKER_UPTIME:
+                    time.sleep(_MIN_WORKER_UPTIME)
+                self._fork(slot)
+
+        gc.unfreeze()
+        self.socket.close()
+        self.socket = None
+        LOGGER.info("Server stopped.")
+
+    def stop(self):
+        """Shut down the workers and return from `serve_forever()`."""
+        self._stopping = True
+        for pid in list(self._workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _fork(self, slot: int):
+        pid: int = os.fork()
+        if pid:
+            self._workers[pid] = (slot, time.monotonic())
+            return
+
+        status: int = 0
+        try:
+            self._serve_worker(slot)
+        except BaseException:
+            LOGGER.exception(f"Worker {slot} failed.")
+            status = 1
+        finally:
+            # do not return into the master's code, e.g. a test runner
+            os._exit(status)
+
+    def _serve_worker(self, slot: int):
+        self.metrics.worker = slot
+        server = _WorkerHTTPServer(
+            self.socket, self.service, self.metrics, self.max_body_size
+        )
+
+        def drain(*_):
+            server.draining = True
+            # shutdown() waits for serve_forever(), so it must run in another thread
+            threading.Thread(target=server.shutdown).start()
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, drain)
+
+        LOGGER.info(f"Worker {slot} (pid {os.getpid()}) started.")
+        server.serve_forever(poll_interval=0.5)
+        server.server_close()
@@ -0,0 +1,33 @@
+from typing import Tuple
+
+# Address the inference server listens on
+SERVER_HOST: str = "127.0.0.1"
+SERVER_PORT: int = 8000
+
+# Maximum number of pending connections of the listening socket
+SERVER_BACKLOG: int = 1024
+
+# Maximum size of a request body in bytes
+SERVER_MAX_BODY_SIZE: int = 10 * 1024 * 1024
+
+# Maximum number of texts or rows per request
+SERVER_MAX_BATCH_SIZE: int = 10000
+
+# Seconds after which an idle keep-alive connection is closed
+SERVER_KEEPALIVE_TIMEOUT: float = 5.0
+
+# Upper bounds in seconds of the buckets of the request latency histogram
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
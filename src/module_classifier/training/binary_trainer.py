@@ -1,13 +1,19 @@
-import csv
 import os
+from functools import partial
 from tempfile import NamedTemporaryFile
-from typing import IO, Iterable, Optional
+from typing import IO, Callable, Iterable, Mapping, Optional
 
 from fasttext import FastText
 
 from ..classification.binary_classifier import BinaryClassifier
 from ..preprocessing.archive_files import ArchiveFile, MainEditionFile, merge_data
+from ..preprocessing.corpus import Corpus
+from ..preprocessing.dedup import MinHasher, keyed_line, keyed_lines
+from ..preprocessing.parallel_reader import ParallelCSVReader
 from ..preprocessing.settings import (
+    FIELD_CHAR_BUDGETS,
+    FIELD_TOKEN_BUDGETS,
+    LABEL_PREFIX,
     MAIN_EDITION_MERGED_LABEL_FIELD,
     MAIN_EDITION_TEXT_FIELDS,
 )
@@ -21,20 +27,66 @@ class BinaryTrainer(Trainer):
         target_file: IO[str],
         text_fields: Iterable[str],
         class_field: str,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
+        processes: int = 1,
+        corpus: bool = False,
+        deduplicate: bool = False,
         **kwargs,
     ):
+        """Write a FastText file with a labelled line per row of the input file.
+
+        Args:
+            corpus: if True, write the lines from the pre-cleaned corpus cached next
+                to the input file (see `Corpus`), building it if needed.
+            deduplicate: if True, drop lines whose text is a near-duplicate of an
+                earlier line (see `MinHasher`).
+        """
         self.logger.info(f"Reading input file '{input_file}'...")
         self.logger.info(f"Writing temporary FastText file to '{target_file.name}'...")
 
-        with open(input_file, newline="") as csvfile:
-            reader = csv.DictReader(csvfile)
-
-            for row in reader:
-                if class_field in row:
-                    target_file.write(
-                        BinaryClassifier.fasttext_line(row, text_fields, class_field)
-                    )
-                    target_file.write(os.linesep)
+        text_fields = tuple(text_fields)
+        if corpus:
+            cached: Corpus = Corpus.from_csv(
+                input_file,
+                text_fields=text_fields,
+                class_field=class_field,
+                token_budgets=token_budgets,
+                char_budgets=char_budgets,
+                processes=processes,
+            )
+            if not cached.labels:  # no labels if the class field is missing
+                target_file.flush()
+                return
+            lines: Iterable[str] = cached.fasttext_lines(
+                cached.row_labels(LABEL_PREFIX.__add__)
+            )
+            if deduplicate:
+                lines = self._drop_duplicates(keyed_lines(lines))
+            self._write_lines(target_file, lines)
+            return
+
+        transform: Callable = partial(
+            BinaryClassifier.fasttext_line,
+            text_fields=text_fields,
+            class_field=class_field,
+            token_budgets=token_budgets,
+            char_budgets=char_budgets,
+        )
+        if deduplicate:
+            transform = partial(keyed_line, transform=transform, hasher=MinHasher())
+
+        with ParallelCSVReader(
+            input_file,
+            [*text_fields, class_field] if text_fields else None,
+            processes=processes,
+            transform=transform,
+        ) as reader:
+            if class_field in reader.columns:
+                self._write_lines(
+                    target_file,
+                    self._drop_duplicates(reader) if deduplicate else reader,
+                )
 
         target_file.flush()
 
@@ -58,16 +110,65 @@ class MainEditionTrainer(BinaryTrainer):
         text_fields: Iterable[str],
         class_field: str,
         main_edition_file: str,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
+        processes: int = 1,
+        corpus: bool = False,
+        deduplicate: bool = False,
         **kwargs,
     ):
-        archive = ArchiveFile(open(input_file))
-        main_edition = MainEditionFile(open(main_edition_file))
+        """Write a FastText file with a line per archive item, labelled by whether
+        the item is in the main edition.
+
+        Args:
+            corpus: if True, write the lines from the pre-cleaned corpus cached next
+                to the archive file (see `Corpus`), building it if needed.
+            deduplicate: if True, drop lines whose text is a near-duplicate of an
+                earlier line (see `MinHasher`).
+        """
+        main_edition = MainEditionFile(main_edition_file)
+
+        if corpus:
+            self.logger.info(
+                f"Writing temporary FastText file to '{target_file.name}'..."
+            )
+            cached: Corpus = Corpus.from_csv(
+                input_file,
+                text_fields=text_fields,
+                class_field=None,
+                id_field=ArchiveFile.ID_FIELD,
+                token_budgets=token_budgets,
+                char_budgets=char_budgets,
+                processes=processes,
+            )
+            lines: Iterable[str] = cached.fasttext_lines(
+                [
+                    f"{LABEL_PREFIX}{row_id in main_edition}"
+                    for row_id in cached.row_ids.tolist()
+                ]
+            )
+            if deduplicate:
+                lines = self._drop_duplicates(keyed_lines(lines))
+            self._write_lines(target_file, lines)
+            return
+
+        archive = ArchiveFile(
+            input_file, columns=list(text_fields) or None, processes=processes
+        )
 
         with NamedTemporaryFile("w", delete=False) as merged_file:
             merge_data(archive, main_edition, merged_file, class_field)
 
         super()._write_training_file(
-            merged_file.name, target_file, text_fields, class_field, **kwargs
+            merged_file.name,
+            target_file,
+            text_fields,
+            class_field,
+            token_budgets=token_budgets,
+            char_budgets=char_budgets,
+            processes=processes,
+            deduplicate=deduplicate,
+            **kwargs,
         )
 
         os.remove(merged_file.name)
@@ -80,6 +181,7 @@ class MainEditionTrainer(BinaryTrainer):
         main_edition_file: str,
         class_field: str = MAIN_EDITION_MERGED_LABEL_FIELD,
         test_label: bool = False,
+        corpus: bool = False,
         **kwargs,
     ):
         with NamedTemporaryFile("wt", delete=False) as target_file:
@@ -89,6 +191,7 @@ class MainEditionTrainer(BinaryTrainer):
                 MAIN_EDITION_TEXT_FIELDS,
                 class_field,
                 main_edition_file,
+                corpus=corpus,
             )
 
         model: FastText._FastText = FastText.load_model(model_file)
@@ -111,6 +214,9 @@ class MainEditionTrainer(BinaryTrainer):
         text_fields: Iterable[str] = MAIN_EDITION_TEXT_FIELDS,
         class_field: str = MAIN_EDITION_MERGED_LABEL_FIELD,
         autotune_model_size: Optional[int] = None,
+        processes: int = 1,
+        corpus: bool = False,
+        deduplicate: bool = False,
     ) -> FastText:
 
         with NamedTemporaryFile("wt") as training, NamedTemporaryFile(
@@ -122,6 +228,9 @@ class MainEditionTrainer(BinaryTrainer):
                 text_fields,
                 class_field,
                 main_edition_file=main_edition_file,
+                processes=processes,
+                corpus=corpus,
+                deduplicate=deduplicate,
             )
             self._write_training_file(
                 validation_archive_file,
@@ -129,6 +238,8 @@ class MainEditionTrainer(BinaryTrainer):
                 text_fields,
                 class_field,
                 main_edition_file=main_edition_file,
+                processes=processes,
+                corpus=corpus,
             )
             training_params = {"autotuneValidationFile": validation.name}
             if autotune_model_size is not None:
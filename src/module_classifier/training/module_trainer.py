@@ -1,12 +1,23 @@
-import csv
-import os
+from functools import partial
 from tempfile import NamedTemporaryFile
-from typing import IO, Iterable
+from typing import IO, Callable, Iterable, Mapping
 
 from fasttext import FastText
 
 from ..classification import ModuleClassifier
-from ..preprocessing.settings import CLASS_FIELD, DEFAULT_MODULE_DELIMITER, TEXT_FIELDS
+from ..preprocessing.corpus import Corpus
+from ..preprocessing.dedup import MinHasher, keyed_line, keyed_lines
+from ..preprocessing.models import normalize_module_label
+from ..preprocessing.parallel_reader import ParallelCSVReader
+from ..preprocessing.settings import (
+    CLASS_FIELD,
+    DEFAULT_MODULE_DELIMITER,
+    FIELD_CHAR_BUDGETS,
+    FIELD_TOKEN_BUDGETS,
+    LABEL_PREFIX,
+    MODULE_DELIMITERS,
+    TEXT_FIELDS,
+)
 from . import Trainer
 
 
@@ -17,6 +28,7 @@ class ModuleTrainer(Trainer):
         model_file: str,
         module_delimiter: str = DEFAULT_MODULE_DELIMITER,
         test_label: bool = False,
+        corpus: bool = False,
         **kwargs,
     ):
         with NamedTemporaryFile("wt") as temp_file:
@@ -26,6 +38,7 @@ class ModuleTrainer(Trainer):
                 TEXT_FIELDS,
                 CLASS_FIELD,
                 module_delimiter=module_delimiter,
+                corpus=corpus,
             )
 
             self.logger.info("Loading model from '%s'", model_file)
@@ -44,22 +57,73 @@ class ModuleTrainer(Trainer):
         text_fields: Iterable[str],
         class_field: str,
         module_delimiter: str = DEFAULT_MODULE_DELIMITER,
+        token_budgets: Mapping[str, int] = FIELD_TOKEN_BUDGETS,
+        char_budgets: Mapping[str, int] = FIELD_CHAR_BUDGETS,
+        processes: int = 1,
+        corpus: bool = False,
+        deduplicate: bool = False,
     ):
+        """Write a FastText file with a labelled line per row of the input file.
+
+        Args:
+            corpus: if True, write the lines from the pre-cleaned corpus cached next
+                to the input file (see `Corpus`), building it if needed.
+            deduplicate: if True, drop lines whose text is a near-duplicate of an
+                earlier line (see `MinHasher`).
+        """
         self.logger.info(f"Reading input file '{input_file}'...")
         self.logger.info(f"Writing temporary FastText file to '{target_file.name}'...")
-        with open(input_file, newline="") as csvfile:
-            reader = csv.DictReader(csvfile)
+        text_fields = tuple(text_fields)
+
+        if corpus:
+            cached: Corpus = Corpus.from_csv(
+                input_file,
+                text_fields=text_fields,
+                class_field=class_field,
+                token_budgets=token_budgets,
+                char_budgets=char_budgets,
+                processes=processes,
+            )
+            if not cached.labels:  # no labels if the class field is missing
+                target_file.flush()
+                return
+            lines: Iterable[str] = cached.fasttext_lines(
+                cached.row_labels(
+                    partial(_fasttext_label, module_delimiter=module_delimiter)
+                )
+            )
+            if deduplicate:
+                lines = self._drop_duplicates(keyed_lines(lines))
+            self._write_lines(target_file, lines)
+            return
+
+        transform: Callable = partial(
+            ModuleClassifier.fasttext_line,
+            text_fields=text_fields,
+            class_field=class_field,
+            module_delimiter=module_delimiter,
+            token_budgets=token_budgets,
+            char_budgets=char_budgets,
+        )
+        if deduplicate:
+            transform = partial(keyed_line, transform=transform, hasher=MinHasher())
 
-            for row in reader:
-                if class_field in row:
-                    target_file.write(
-                        ModuleClassifier.fasttext_line(
-                            row,
-                            text_fields,
-                            class_field,
-                            module_delimiter=module_delimiter,
-                        )
-                    )
-                    target_file.write(os.linesep)
+        with ParallelCSVReader(
+            input_file,
+            [*text_fields, class_field] if text_fields else None,
+            processes=processes,
+            transform=transform,
+        ) as reader:
+            if class_field in reader.columns:
+                self._write_lines(
+                    target_file,
+                    self._drop_duplicates(reader) if deduplicate else reader,
+                )
 
         target_file.flush()
+
+
+def _fasttext_label(label: str, module_delimiter: str) -> str:
+    return LABEL_PREFIX + normalize_module_label(
+        label, module_delimiter, tuple(MODULE_DELIMITERS)
+    )
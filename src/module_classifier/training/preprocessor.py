@@ -1,23 +1,32 @@
-import csv
 import os
-from typing import Dict, Generator, Iterable, Optional, Tuple
+from typing import Iterable, Iterator, Mapping, Optional, Tuple
 
 import numpy as np
 
 from ..classification import ModuleClassifier
-from ..classification.settings import CLASS_FIELD, TEXT_FIELDS
+from ..preprocessing.compression import open_file
+from ..preprocessing.parallel_reader import ParallelCSVReader
+from ..preprocessing.reader import Record
+from ..preprocessing.settings import CLASS_FIELD, TEXT_FIELDS
 
 
 class Preprocessor:
-    def __init__(self, csv_file: str):
+    def __init__(self, csv_file: str, processes: int = 1):
+        """
+        Args:
+            csv_file: the CSV file to read, optionally compressed.
+            processes: the number of processes for parsing the CSV file
+        """
         self.csv_file = csv_file
+        self.processes = processes
 
-    def read_csv(self) -> Iterable[Dict[str, str]]:
-        with open(self.csv_file) as f:
-            reader = csv.DictReader(f, dialect="excel")
-            for row in reader:
-                if row:
-                    yield row
+    def read_csv(
+        self, columns: Optional[Iterable[str]] = None
+    ) -> Iterable[Mapping[str, str]]:
+        """Read the rows of the CSV file, optionally only the given columns."""
+        return ParallelCSVReader(
+            self.csv_file, columns, processes=self.processes, dialect="excel"
+        )
 
     def write_fasttext(
         self,
@@ -31,7 +40,7 @@ class Preprocessor:
         np.random.seed(seed)
 
         target_files = [target_file + suffix for suffix in suffixes]
-        handlers = [open(f, "w") for f in target_files]
+        handlers = [open_file(f, "w") for f in target_files]
 
         for line in self.generate_fasttext_lines():
             handler = np.random.choice(handlers, p=split)
@@ -41,9 +50,22 @@ class Preprocessor:
         for handler in handlers:
             handler.close()
 
-    def generate_fasttext_lines(self) -> Generator[str, None, None]:
-        return (
-            ModuleClassifier.fasttext_line(row, TEXT_FIELDS)
-            for row in self.read_csv()
-            if row.get(CLASS_FIELD)
+    def generate_fasttext_lines(self) -> Iterator[str]:
+        # lines are generated in the worker processes
+        return iter(
+            ParallelCSVReader(
+                self.csv_file,
+                [*TEXT_FIELDS, CLASS_FIELD],
+                processes=self.processes,
+                transform=_labelled_fasttext_line,
+                dialect="excel",
+            )
         )
+
+
+def _labelled_fasttext_line(row: Record) -> Optional[str]:
+    return (
+        ModuleClassifier.fasttext_line(row, TEXT_FIELDS)
+        if row.get(CLASS_FIELD)
+        else None
+    )
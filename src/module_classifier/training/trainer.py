@@ -2,11 +2,12 @@ import logging
 import os
 from abc import ABC, abstractmethod
 from tempfile import NamedTemporaryFile
-from typing import IO, Any, Dict, Iterable, Optional
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Tuple
 
 import fasttext
 from fasttext import FastText
 
+from ..preprocessing.dedup import BandKeys, DuplicateIndex
 from ..preprocessing.settings import CLASS_FIELD, TEXT_FIELDS
 from .settings import QUANTIZE, TRAINING_PARAMS
 
@@ -88,6 +89,26 @@ class Trainer(ABC):
     ):
         return NotImplemented
 
+    def _write_lines(self, target_file: IO[str], lines: Iterable[str]):
+        for line in lines:
+            target_file.write(line)
+            target_file.write(os.linesep)
+        target_file.flush()
+
+    def _drop_duplicates(
+        self, keyed_lines: Iterable[Tuple[str, BandKeys]]
+    ) -> Iterator[str]:
+        """Drop lines that are near-duplicates of earlier lines (see `DuplicateIndex`).
+
+        Args:
+            keyed_lines: FastText lines paired with their band keys
+        """
+        index = DuplicateIndex()
+        yield from index.drop_duplicates(keyed_lines)
+        self.__logger.info(
+            f"Dropped {index.duplicates} of {len(index)} lines ({index.ratio:.1%}) as near-duplicates."
+        )
+
     def _train_model(
         self,
         training_file: str,
@@ -37,7 +37,7 @@ if __name__ == "__main__":
         "-i",
         type=argparse.FileType("r"),
         required=True,
-        help="The input CSV file.",
+        help="The input CSV file, optionally compressed (gzip, bz2, xz).",
     )
     parser.add_argument(
         "--output",
@@ -60,6 +60,7 @@ if __name__ == "__main__":
         "-d",
         type=str,
         required=False,
+        default=DEFAULT_MODULE_DELIMITER,
         help=f"The delimiter used in module labels as in 'S1.M1' or 'S1_M1'. If not given, uses default ('{DEFAULT_MODULE_DELIMITER}').",
     )
 
@@ -67,6 +68,11 @@ if __name__ == "__main__":
         "--labels", "-l", action="store_true", help="Run analysis per label."
     )
 
+    parser.add_argument(
+        "--corpus",
+        action="store_true",
+        help="Read the input from a pre-cleaned corpus cached next to the input file (built on first use, rebuilt when the file or the cleaning settings change).",
+    )
     parser.add_argument("-k", type=int, default=1)
     parser.add_argument("--threshold", "-t", type=float, default=0.0)
 
@@ -83,6 +89,7 @@ if __name__ == "__main__":
         "k": args.k,
         "threshold": args.threshold,
         "module_delimiter": args.delimiter,
+        "corpus": args.corpus,
     }
 
     if args.labels:
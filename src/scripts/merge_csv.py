@@ -3,7 +3,9 @@ import csv
 import logging
 from collections import defaultdict
 from functools import cached_property, reduce
-from typing import Dict, IO, List, Sequence
+from typing import Dict, List, Sequence
+
+from module_classifier.preprocessing.compression import open_file
 
 ID_FIELD = "item_title"
 
@@ -54,18 +56,20 @@ class CSVFile:
             LOGGER.warning(f"Skipped {duplicates} duplicate lines.")
         return CSVFile(rows, all_fields, self.id_field)
 
-    def write(self, f: IO):
-        writer = csv.DictWriter(f, self.fieldnames)
-        writer.writeheader()
-        writer.writerows(self.rows)
-        LOGGER.info(f"Wrote {len(self.rows)} rows to {f.name}.")
+    def write(self, filename: str):
+        with open_file(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, self.fieldnames)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        LOGGER.info(f"Wrote {len(self.rows)} rows to {filename}.")
 
     @classmethod
-    def from_file(cls, f: IO, id_field: str):
-        LOGGER.info(f"Reading file {f.name}.")
-        reader: csv.DictReader = csv.DictReader(f)
-        rows = list(reader)
-        LOGGER.info(f"Read {len(rows)} rows from {f.name}.")
+    def from_file(cls, filename: str, id_field: str):
+        LOGGER.info(f"Reading file {filename}.")
+        with open_file(filename, newline="") as f:
+            reader: csv.DictReader = csv.DictReader(f)
+            rows = list(reader)
+        LOGGER.info(f"Read {len(rows)} rows from {filename}.")
         return cls(rows, reader.fieldnames, id_field)
 
 
@@ -83,11 +87,15 @@ if __name__ == "__main__":
         "-i",
         nargs="+",
         required=True,
-        type=argparse.FileType("r"),
-        help="The input files.",
+        type=str,
+        help="The input files, optionally compressed (gzip, bz2, xz).",
     )
     parser.add_argument(
-        "--output", "-o", type=argparse.FileType("w"), help="The output file."
+        "--output",
+        "-o",
+        type=str,
+        default="-",
+        help="The output file. Compressed if the name ends with .gz, .bz2, or .xz.",
     )
     parser.add_argument(
         "--field-size-limit",
@@ -7,16 +7,24 @@ Example call:
 import argparse
 import csv
 import logging
+import os
 import random
-import sys
 from functools import reduce
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+from module_classifier.classification.classifier import Classifier
+from module_classifier.preprocessing import dedup
+from module_classifier.preprocessing.compression import STDIO, open_file
+from module_classifier.preprocessing.settings import TEXT_FIELDS
+
 logging.basicConfig(level=logging.INFO)
 
 
 def split(
-    rows: List[Dict[str, Any]], ratio: List[float], seed: Optional[int]
+    rows: List[Dict[str, Any]],
+    ratio: List[float],
+    seed: Optional[int],
+    groups: Optional[List[int]] = None,
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
     """Split rows into training, validation and test sets.
 
@@ -24,6 +32,8 @@ def split(
         rows (List[Dict[str, Any]]): all rows, each represented as a dict
         ratio (List[float]): the train/dev/test split ratio, e.g. [0.8, 0.1, 0.1]
         seed (Optional[int]): a random seed to use for shuffling, if given
+        groups (Optional[List[int]]): a group per row, e.g. of near-duplicates;
+            rows of the same group are always in the same set.
 
     Raises:
         ValueError: if the 'ratio' list is not of length 3, or does not sum up to 1.
@@ -40,18 +50,50 @@ def split(
         logging.info(f"Using random seed '{seed}' for shuffling train/dev/test split.")
         random.seed(seed)
 
-    random.shuffle(rows)
+    if groups is None:
+        groups = list(range(len(rows)))
+    grouped: Dict[int, List[Dict[str, Any]]] = {}
+    for row, group in zip(rows, groups):
+        grouped.setdefault(group, []).append(row)
+    shuffled: List[List[Dict[str, Any]]] = list(grouped.values())
+    random.shuffle(shuffled)
 
     train_size = int(len(rows) * ratio[0])
     dev_size = int(len(rows) * ratio[1])
 
-    train = rows[:train_size]
-    dev = rows[train_size : train_size + dev_size]
-    test = rows[train_size + dev_size :]
+    # each group goes to the set in which its first row falls
+    train, dev, test = [], [], []
+    for group_rows in shuffled:
+        position = len(train) + len(dev) + len(test)
+        if position < train_size:
+            train.extend(group_rows)
+        elif position < train_size + dev_size:
+            dev.extend(group_rows)
+        else:
+            test.extend(group_rows)
 
     return train, dev, test
 
 
+def find_duplicates(
+    rows: List[Dict[str, Any]], text_fields: List[str], processes: int
+) -> List[int]:
+    """Group rows with near-duplicate (cleaned) texts.
+
+    Returns:
+        List[int]: the group of each row, i.e. the index of its first near-duplicate.
+    """
+    texts: List[str] = Classifier.fasttext_lines(
+        {field: [row.get(field) or "" for row in rows] for field in text_fields},
+        text_fields,
+    )
+    index = dedup.find_duplicates(texts, processes=processes)
+    logging.info(
+        f"Found {index.duplicates} near-duplicates in {len(index)} rows ({index.ratio:.1%})."
+    )
+    return index.groups()
+
+
 def _merge_rows(
     rows1: List[Dict[str, Any]], rows2: List[Dict[str, Any]]
 ) -> List[Dict[str, Any]]:
@@ -90,16 +132,16 @@ if __name__ == "__main__":
         "-i",
         nargs="+",
         required=True,
-        type=argparse.FileType("r"),
-        help="Input files",
+        type=str,
+        help="Input files, optionally compressed (gzip, bz2, xz).",
     )
 
     parser.add_argument(
         "--output",
         "-o",
-        default=sys.stdout,
-        type=argparse.FileType("w"),
-        help="Output file. Defaults to stdout.",
+        default=STDIO,
+        type=str,
+        help="Output file. Defaults to stdout. Compressed if the name ends with .gz, .bz2, or .xz.",
     )
 
     parser.add_argument(
@@ -125,9 +167,29 @@ if __name__ == "__main__":
         "--keep-unmatched", action="store_true", help="Keep unmatched rows."
     )
 
+    parser.add_argument(
+        "--deduplicate",
+        choices=["drop", "group"],
+        help="Detect near-duplicate texts (MinHash/LSH) and either drop all but the first of each group, or keep groups of near-duplicates in the same train/dev/test set.",
+    )
+
+    parser.add_argument(
+        "--text-fields",
+        nargs="+",
+        default=list(TEXT_FIELDS),
+        help="The columns compared for near-duplicates; columns missing from all input files are ignored.",
+    )
+
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of processes for near-duplicate detection.",
+    )
+
     args = parser.parse_args()
 
-    if args.split is not None and args.output is sys.stdout:
+    if args.split is not None and args.output == STDIO:
         raise ValueError("Cannot split to stdout")
 
     if len(args.input) < 2:
@@ -135,30 +197,46 @@ if __name__ == "__main__":
 
     input_data: List[List[Dict[str, Any]]] = []
 
-    for f in args.input:
-        logging.info(f"Reading from'{f.name}'...")
-        reader = csv.DictReader(f)
-        if reader.fieldnames and args.id in reader.fieldnames:
-            input_data.append([line for line in reader])
-        else:
-            raise ValueError(f"'{f.name}' does not contain column '{args.id}'.")
+    for input_file in args.input:
+        logging.info(f"Reading from'{input_file}'...")
+        with open_file(input_file, newline="") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames and args.id in reader.fieldnames:
+                input_data.append([line for line in reader])
+            else:
+                raise ValueError(f"'{input_file}' does not contain column '{args.id}'.")
 
     merged: List[Dict[str, Any]] = reduce(_merge_rows, input_data)
     fieldnames: Set[str] = {key for line in merged for key in line.keys()}
 
+    groups: Optional[List[int]] = None
+    if args.deduplicate:
+        text_fields = [field for field in args.text_fields if field in fieldnames]
+        if not text_fields:
+            raise ValueError(f"No text fields ({args.text_fields}) in the input files.")
+        groups = find_duplicates(merged, text_fields, args.processes)
+        if args.deduplicate == "drop":
+            merged = [row for i, row in enumerate(merged) if groups[i] == i]
+            groups = None
+            logging.info(f"Keeping {len(merged)} rows.")
+
     if args.split is None:
         outputs = [(merged, args.output)]
     else:
-        train, dev, test = split(merged, args.split, args.seed)
+        train, dev, test = split(merged, args.split, args.seed, groups)
 
+        root, extension = os.path.splitext(args.output)
+        if extension not in (".gz", ".bz2", ".xz"):
+            root, extension = args.output, ""
         outputs = [
             (train, args.output),
-            (dev, open(args.output.name + ".dev.csv", "w")),
-            (test, open(args.output.name + ".test.csv", "w")),
+            (dev, root + ".dev.csv" + extension),
+            (test, root + ".test.csv" + extension),
         ]
 
-    for lines, f in outputs:
-        logging.info(f"Writing {len(lines)} rows to '{f.name}'...")
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(lines)
+    for lines, output_file in outputs:
+        logging.info(f"Writing {len(lines)} rows to '{output_file}'...")
+        with open_file(output_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(lines)
@@ -19,7 +19,7 @@ if __name__ == "__main__":
         type=argparse.FileType(),
         metavar="FILE",
         required=True,
-        help="The file containing the main edition items with `link_id` column.",
+        help="The file containing the main edition items with `link_id` column, optionally compressed (gzip, bz2, xz).",
     )
     parser.add_argument(
         "--archive-file",
@@ -27,7 +27,7 @@ if __name__ == "__main__":
         type=argparse.FileType(),
         metavar="FILE",
         required=True,
-        help="The file containing the archive items with input texts.",
+        help="The file containing the archive items with input texts, optionally compressed (gzip, bz2, xz).",
     )
     parser.add_argument(
         "--validation-file",
@@ -58,6 +58,23 @@ if __name__ == "__main__":
         default=MAIN_EDITION_TEXT_FIELDS,
         help=f"The column(s) containing the text fields in the input file. Defaults to '{' '.join(MAIN_EDITION_TEXT_FIELDS)}'.",
     )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        metavar="N",
+        help="The number of processes for parsing the archive file(s). Defaults to 1.",
+    )
+    parser.add_argument(
+        "--corpus",
+        action="store_true",
+        help="Read the input from a pre-cleaned corpus cached next to the archive file(s) (built on first use, rebuilt when the file or the cleaning settings change).",
+    )
+    parser.add_argument(
+        "--deduplicate",
+        action="store_true",
+        help="Drop training items whose text is a near-duplicate (MinHash/LSH) of an earlier item.",
+    )
     parser.add_argument("--quantize", action="store_false", help="Quantize the model.")
 
     args = parser.parse_args()
@@ -73,6 +90,9 @@ if __name__ == "__main__":
             text_fields=args.text_fields,
             class_field=MAIN_EDITION_MERGED_LABEL_FIELD,
             autotune_model_size=args.autotuneModelSize,
+            processes=args.processes,
+            corpus=args.corpus,
+            deduplicate=args.deduplicate,
         )
     else:
         if args.autotuneModelSize:
@@ -84,4 +104,7 @@ if __name__ == "__main__":
             class_field=MAIN_EDITION_MERGED_LABEL_FIELD,
             main_edition_file=args.main_edition_file.name,
             quantize=args.quantize,
+            processes=args.processes,
+            corpus=args.corpus,
+            deduplicate=args.deduplicate,
         )
@@ -3,6 +3,7 @@ import pytest
 from src.module_classifier.classification import (
     ModuleClassifier,
     Prediction,
+    PredictionCache,
     Predictions,
 )
 from src.module_classifier.preprocessing import Module
@@ -29,7 +30,7 @@ class TestPredictions:
 
 @pytest.mark.skipif(TEST_MODEL is None, reason="'TEST_MODEL' not specified.")
 class TestClassifier:
-    classifier = ModuleClassifier(TEST_MODEL)
+    classifier = ModuleClassifier(TEST_MODEL) if TEST_MODEL else None
 
     def test_init(self):
         assert isinstance(self.classifier, ModuleClassifier)
@@ -121,6 +122,26 @@ class TestClassifier:
     def test_predict_rows(self, rows, columns, k, expected):
         assert self.classifier.predict_rows(rows, k, columns=columns) == expected
 
+    @pytest.mark.parametrize(
+        "rows, columns, k",
+        [
+            (
+                [
+                    {"text": "a text about China", "authors": "Jane Doe"},
+                    {"text": "artificial intelligence", "authors": "Jane Doe"},
+                    {"text": "a text about China", "authors": ""},
+                ],
+                ["text", "authors"],
+                1,
+            ),
+        ],
+    )
+    def test_predict_columns(self, rows, columns, k):
+        columnar = {column: [row[column] for row in rows] for column in columns}
+        assert self.classifier.predict_columns(
+            columnar, k, text_fields=columns
+        ) == self.classifier.predict_rows(rows, k, columns=columns)
+
     @pytest.mark.parametrize(
         "text,k,expected",
         [
@@ -194,6 +215,37 @@ class TestClassifier:
             self.classifier.raw_labels.index(label) for label in expected_top_labels
         ]
 
+    @pytest.mark.parametrize("k", [1, 3, -1])
+    def test_predict_proba(self, k):
+        texts = ["ai and automation", "a text about china", ""]
+        probs: np.ndarray = self.classifier.predict_proba(texts, k)
+
+        assert probs.dtype == np.float32
+        assert probs.shape == (len(texts), len(self.classifier.raw_labels))
+        assert (probs > 0).sum(axis=1).tolist() == [
+            len(self.classifier.raw_labels) if k == -1 else k
+        ] * len(texts)
+        for row, predictions in zip(probs, self.classifier.predict_texts(texts, k)):
+            assert row == pytest.approx(
+                predictions.get_probabilities(self.classifier.raw_labels)
+            )
+
+    def test_cache(self, tmp_path):
+        texts = ["ai and automation", "a text about china", "ai and automation"]
+        expected = self.classifier.predict_texts(texts, 3)
+
+        for _ in range(2):
+            classifier = ModuleClassifier(TEST_MODEL)
+            classifier.set_cache(PredictionCache(path=tmp_path / "cache.sqlite"))
+            for predictions, expected_predictions in zip(
+                classifier.predict_texts(texts, 3), expected
+            ):
+                assert predictions.labels == expected_predictions.labels
+                assert predictions.probs == pytest.approx(expected_predictions.probs)
+        # the second classifier reads the predictions from disk
+        assert classifier.cache.stats.disk_hits == 2
+        assert classifier.cache.stats.misses == 0
+
     @pytest.mark.skip(reason="not implemented")
     @pytest.mark.parametrize(
         "remote,local,expected_exception",
@@ -2,11 +2,12 @@ import logging
 import os
 from csv import DictWriter
 from distutils.util import strtobool
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from typing import Dict, List
 
 import pytest
 from fasttext import FastText
+from src.module_classifier.preprocessing.compression import open_file
 from src.module_classifier.preprocessing.settings import CLASS_FIELD, TEXT_FIELDS
 from src.module_classifier.training.module_trainer import ModuleTrainer
 from src.module_classifier.training.settings import TRAINING_PARAMS
@@ -203,3 +204,116 @@ def test_train_model(caplog, input, quantize, expected_labels, expected_words):
     assert sorted(model.labels) == sorted(expected_labels)
     assert sorted(model.words) == sorted(expected_words)
     os.remove(out)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".csv.gz", ".csv.bz2", ".csv.xz"])
+def test_write_training_file_compressed(suffix):
+    row = {
+        "item_title": "test title",
+        "authors": "test authors",
+        "publication_name": "test publication",
+        "abstract_description": "test abstract",
+        "module_id_for_all": "s1.m1",
+        "excerpts_ts": "test excerpt",
+        "yt_description": "test yt description",
+    }
+    trainer = ModuleTrainer()
+
+    with TemporaryDirectory() as tmpdir:
+        input_file = os.path.join(tmpdir, "input" + suffix)
+        with open_file(input_file, "w", newline="") as csvfile:
+            writer = DictWriter(csvfile, row.keys())
+            writer.writeheader()
+            writer.writerow(row)
+
+        with NamedTemporaryFile("w+t") as target_file:
+            trainer._write_training_file(
+                input_file, target_file, TEXT_FIELDS, CLASS_FIELD
+            )
+            target_file.seek(0)
+            assert target_file.readlines() == [
+                "__label__S1_M1 test title test authors test publication test abstract test excerpt test description"
+                + os.linesep
+            ]
+
+
+def test_write_training_file_corpus():
+    rows = [
+        {
+            "item_title": f"Test title {i}",
+            "authors": "Test authors",
+            "publication_name": "",
+            "abstract_description": "Test abstract, with punctuation!",
+            "module_id_for_all": f"s{i % 3 + 1}.m1",
+            "excerpts_ts": "test excerpt",
+            "yt_description": "",
+        }
+        for i in range(10)
+    ]
+    trainer = ModuleTrainer()
+
+    with TemporaryDirectory() as tmpdir:
+        input_file = os.path.join(tmpdir, "input.csv")
+        with open(input_file, "w", newline="") as csvfile:
+            writer = DictWriter(csvfile, rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+
+        outputs = []
+        for corpus in [False, True, True]:
+            with NamedTemporaryFile("w+t") as target_file:
+                trainer._write_training_file(
+                    input_file, target_file, TEXT_FIELDS, CLASS_FIELD, corpus=corpus
+                )
+                target_file.seek(0)
+                outputs.append([" ".join(line.split()) for line in target_file])
+
+        assert os.path.isdir(input_file + ".corpus")
+        assert outputs[0] == outputs[1] == outputs[2]
+        assert outputs[0][1] == (
+            "__label__S2_M1 test title test authors test abstract with punctuation test excerpt"
+        )
+
+
+@pytest.mark.parametrize("corpus", [False, True])
+def test_write_training_file_deduplicate(corpus):
+    row = {
+        "item_title": "test title",
+        "authors": "test authors",
+        "publication_name": "test publication",
+        "abstract_description": "test abstract with some more words to compare",
+        "module_id_for_all": "s1.m1",
+        "excerpts_ts": "test excerpt",
+        "yt_description": "test yt description",
+    }
+    rows = [
+        row,
+        dict(row, module_id_for_all="s2.m1"),
+        dict(row, item_title="other title"),
+        dict(row, abstract_description="something else entirely", excerpts_ts=""),
+    ]
+    trainer = ModuleTrainer()
+
+    with TemporaryDirectory() as tmpdir:
+        input_file = os.path.join(tmpdir, "input.csv")
+        with open(input_file, "w", newline="") as csvfile:
+            writer = DictWriter(csvfile, row.keys())
+            writer.writeheader()
+            writer.writerows(rows)
+
+        with NamedTemporaryFile("w+t") as target_file:
+            trainer._write_training_file(
+                input_file,
+                target_file,
+                TEXT_FIELDS,
+                CLASS_FIELD,
+                corpus=corpus,
+                deduplicate=True,
+            )
+            target_file.seek(0)
+            lines = [" ".join(line.split()) for line in target_file]
+
+    assert lines == [
+        "__label__S1_M1 test title test authors test publication test abstract with some more words compare test excerpt test description",
+        "__label__S1_M1 test title test authors test publication something else entirely test description",
+    ]
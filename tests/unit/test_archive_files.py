@@ -1,7 +1,10 @@
 import csv
+import io
 import os
+import shutil
 from tempfile import NamedTemporaryFile
 
+import pytest
 from src.module_classifier.preprocessing.archive_files import (
     ArchiveFile,
     MainEditionFile,
@@ -63,7 +66,6 @@ class TestMainEditionsFile:
             111474,
             110903,
         }
-        assert len(main_editions_file._rows) == len(main_editions_file._ids)
 
     def test_contains(self):
         main_editions_file = MainEditionFile(open(TEST_MAIN_EDITION_ITEMS_FILE))
@@ -91,7 +93,7 @@ class TestMainEditionPreprocessing:
             rows = [row for row in reader]
 
         assert reader.fieldnames == archive_file.fieldnames + ["label"]
-        assert len(rows) == len(main_editions_file._rows)
+        assert len(rows) == len(list(archive_file))
 
         for row in rows:
             id_ = int(row["id"])
@@ -103,3 +105,55 @@ class TestMainEditionPreprocessing:
                 assert row["label"] == "False", f"{id_} shoud be 'False'"
 
         os.remove(output_file.name)
+
+
+class TestIndexedFiles:
+    @pytest.fixture
+    def archive_path(self, tmp_path):
+        path = tmp_path / "archive.csv"
+        shutil.copy(TEST_ARCHIVE_FILE, path)
+        return str(path)
+
+    @pytest.fixture
+    def main_edition_path(self, tmp_path):
+        path = tmp_path / "main_edition.csv"
+        shutil.copy(TEST_MAIN_EDITION_ITEMS_FILE, path)
+        return str(path)
+
+    def test_archive_file(self, archive_path):
+        archive_file = ArchiveFile(archive_path, columns=["item_title"])
+        expected = ArchiveFile(open(TEST_ARCHIVE_FILE), columns=["item_title"])
+
+        assert archive_file._rows is None
+        assert archive_file.fieldnames == expected.fieldnames == ["id", "item_title"]
+        assert list(archive_file) == list(expected)
+        assert not os.path.exists(archive_path + ".id.idx")
+
+        assert archive_file.all_ids == expected.all_ids
+        assert os.path.exists(archive_path + ".id.idx")
+        assert 3981 in archive_file and 0 not in archive_file
+
+    def test_main_edition_file(self, main_edition_path):
+        main_editions_file = MainEditionFile(main_edition_path)
+        expected = MainEditionFile(open(TEST_MAIN_EDITION_ITEMS_FILE))
+
+        assert main_editions_file._fieldnames == expected._fieldnames
+        assert all(id_ in main_editions_file for id_ in expected._ids)
+        assert 111493 not in main_editions_file
+        assert "test id" not in main_editions_file
+
+    def test_merge_data(self, archive_path, main_edition_path):
+        outputs = []
+        for archive_file, main_editions_file in [
+            (archive_path, main_edition_path),
+            (open(TEST_ARCHIVE_FILE), open(TEST_MAIN_EDITION_ITEMS_FILE)),
+        ]:
+            output_file = io.StringIO()
+            merge_data(
+                ArchiveFile(archive_file),
+                MainEditionFile(main_editions_file),
+                output_file,
+            )
+            outputs.append(output_file.getvalue())
+
+        assert outputs[0] == outputs[1]
@@ -0,0 +1,102 @@
+import csv
+import gzip
+import os
+
+import pytest
+from src.module_classifier.preprocessing.archive_index import ArchiveIndex
+
+ROWS = [
+    ["id", "text", "label"],
+    ["3", "three", "a"],
+    ["1", 'one,\n"quoted"\nline breaks', "b"],
+    [],
+    ["2", "two", "c"],
+    ["1", "duplicate", "d"],
+    ["-5", "negative", "e"],
+]
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = str(tmp_path / "test.csv")
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(ROWS)
+    return path
+
+
+class TestArchiveIndex:
+    def test_lookup(self, csv_file):
+        index = ArchiveIndex(csv_file, "id")
+
+        assert list(index) == [3, 1, 2, -5]
+        assert len(index) == 4
+        assert index[1] == {
+            "id": "1",
+            "text": 'one,\n"quoted"\nline breaks',
+            "label": "b",
+        }
+        assert index[-5]["text"] == "negative"
+        assert index.get(4) is None
+        with pytest.raises(KeyError):
+            index[4]
+        index.close()
+
+    @pytest.mark.parametrize(
+        "key,expected", [(2, True), (4, False), ("2", False), (None, False)]
+    )
+    def test_contains(self, csv_file, key, expected):
+        assert (key in ArchiveIndex(csv_file, "id")) == expected
+
+    def test_columns(self, csv_file):
+        with ArchiveIndex(csv_file, "id", ["label", "missing"]) as index:
+            assert index.columns == ["label"]
+            assert dict(index.items()) == {
+                3: {"label": "a"},
+                1: {"label": "b"},
+                2: {"label": "c"},
+                -5: {"label": "e"},
+            }
+
+    def test_cache(self, csv_file, mocker):
+        ArchiveIndex(csv_file, "id")
+        assert os.path.isfile(csv_file + ".id.idx")
+
+        build = mocker.spy(ArchiveIndex, "_build")
+        assert list(ArchiveIndex(csv_file, "id")) == [3, 1, 2, -5]
+        build.assert_not_called()
+
+        # the index is rebuilt when the CSV file changes
+        with open(csv_file, "a", newline="") as f:
+            csv.writer(f).writerow(["7", "seven", "f"])
+        assert list(ArchiveIndex(csv_file, "id")) == [3, 1, 2, -5, 7]
+        build.assert_called_once()
+
+    def test_uncached(self, csv_file, tmp_path):
+        index_path = str(tmp_path / "missing" / "test.idx")
+        index = ArchiveIndex(csv_file, "id", index_path=index_path)
+
+        assert not os.path.exists(index_path)
+        assert list(index) == [3, 1, 2, -5]
+
+    def test_large(self, tmp_path):
+        path = str(tmp_path / "large.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "value"])
+            writer.writerows([i * 1024, i] for i in range(5000))
+
+        index = ArchiveIndex(path, "id")
+        assert all(index[i * 1024]["value"] == str(i) for i in range(0, 5000, 7))
+        assert not any(i in index for i in range(1, 1024))
+
+    def test_invalid(self, csv_file, tmp_path):
+        with pytest.raises(ValueError):
+            ArchiveIndex(csv_file, "missing")
+        with pytest.raises(ValueError):
+            ArchiveIndex(csv_file, "text")
+
+        compressed = str(tmp_path / "test.csv.gz")
+        with open(csv_file, "rb") as f, gzip.open(compressed, "wb") as gz:
+            gz.write(f.read())
+        with pytest.raises(ValueError):
+            ArchiveIndex(compressed, "id")
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+
+import pytest
+from src.module_classifier.classification import AsyncBatcher, ModuleClassifier
+from src.module_classifier.classification.binary_classifier import (
+    MainEditionClassifier,
+)
+
+from .test_binary_classifier import FakeModel as FakeBinaryModel
+from .test_classifier import FakeModel
+
+
+class RecordingModel(FakeModel):
+    """Records the texts of each call, blocking while the event is cleared."""
+
+    def __init__(self):
+        self.calls = []
+        self.proceed = threading.Event()
+        self.proceed.set()
+
+    def predict(self, texts, k=1):
+        self.proceed.wait()
+        self.calls.append(list(texts))
+        if "fail" in texts:
+            raise ValueError("prediction failed")
+        return super().predict(texts, k)
+
+
+@pytest.fixture
+def classifier():
+    classifier = ModuleClassifier.__new__(ModuleClassifier)
+    classifier.model = RecordingModel()
+    return classifier
+
+
+def test_predict(classifier):
+    texts = ["first", "second", "second", "first", "second"]
+
+    async def run():
+        async with AsyncBatcher(classifier, max_wait=0.05) as batcher:
+            results = await asyncio.gather(*(batcher.predict(t, k=2) for t in texts))
+        return results, batcher.stats
+
+    results, stats = asyncio.run(run())
+
+    assert results == [classifier.predict_text(text, k=2) for text in texts]
+    assert classifier.model.calls[0] == ["first", "second"]
+    assert stats.requests == 5
+    assert stats.coalesced == 3
+    assert stats.batches == 1
+    assert stats.batch_sizes == {2: 1}
+    assert stats.queue_depths == {0: 1, 1: 1, 2: 3}
+    assert stats.mean_batch_size == 2
+
+
+def test_max_batch_size(classifier):
+    texts = ["first", "second"] * 3
+
+    async def run():
+        async with AsyncBatcher(classifier, max_batch_size=1, max_wait=10) as batcher:
+            return await asyncio.gather(*(batcher.predict(t) for t in texts))
+
+    results = asyncio.run(run())
+
+    assert results == [classifier.predict_text(text) for text in texts]
+    assert classifier.model.calls[:2] == [["first"], ["second"]]
+
+
+def test_batch_per_k(classifier):
+    async def run():
+        async with AsyncBatcher(classifier, max_wait=0.05) as batcher:
+            return await asyncio.gather(
+                batcher.predict("first", k=1), batcher.predict("first", k=3)
+            )
+
+    first, second = asyncio.run(run())
+
+    assert len(first) == 1 and len(second) == 3
+    assert classifier.model.calls == [["first"], ["first"]]
+
+
+def test_coalesce_running(classifier):
+    model = classifier.model
+    model.proceed.clear()
+
+    async def run():
+        async with AsyncBatcher(classifier, max_wait=0) as batcher:
+            first = asyncio.ensure_future(batcher.predict("first"))
+            while not batcher.stats.batches:
+                await asyncio.sleep(0.001)
+            # the batch is running; the same text is answered by it
+            second = asyncio.ensure_future(batcher.predict("first"))
+            await asyncio.sleep(0.01)
+            assert batcher.queue_depth == 1
+            model.proceed.set()
+            return await first, await second, batcher.stats
+
+    first, second, stats = asyncio.run(run())
+
+    assert first == second
+    assert model.calls == [["first"]]
+    assert stats.coalesced == 1
+
+
+def test_cancelled_caller(classifier):
+    async def run():
+        async with AsyncBatcher(classifier, max_wait=0.05) as batcher:
+            cancelled = asyncio.ensure_future(batcher.predict("first"))
+            other = asyncio.ensure_future(batcher.predict("first"))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            return await other
+
+    assert asyncio.run(run()) == classifier.predict_text("first")
+
+
+def test_exception(classifier):
+    async def run():
+        async with AsyncBatcher(classifier, max_wait=0.05) as batcher:
+            return await asyncio.gather(
+                batcher.predict("fail"),
+                batcher.predict("first"),
+                return_exceptions=True,
+            )
+
+    failed, first = asyncio.run(run())
+
+    # only the request of the failing text gets the exception
+    assert isinstance(failed, ValueError)
+    assert first == classifier.predict_text("first")
+    assert classifier.model.calls[:3] == [["fail", "first"], ["fail"], ["first"]]
+
+
+def test_exception_binary():
+    class NewlineModel(FakeBinaryModel):
+        def predict(self, texts, k=1, threshold=0.0):
+            # as fastText, which predicts one line at a time
+            if any("\n" in text for text in texts):
+                raise ValueError("predict processes one line at a time")
+            return super().predict(texts, k, threshold)
+
+    classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+    classifier.model = NewlineModel()
+
+    async def run():
+        async with AsyncBatcher(classifier, max_wait=0.05) as batcher:
+            return await asyncio.gather(
+                batcher.predict("0.9\n"),
+                batcher.predict("0.2"),
+                return_exceptions=True,
+            )
+
+    failed, result = asyncio.run(run())
+
+    assert isinstance(failed, ValueError)
+    assert result == classifier.predict_texts(["0.2"])[0]
+
+
+def test_close_flushes(classifier):
+    async def run():
+        batcher = AsyncBatcher(classifier, max_wait=10)
+        request = asyncio.ensure_future(batcher.predict("second"))
+        await asyncio.sleep(0)
+        await batcher.close()
+        return request.result()
+
+    assert asyncio.run(run()) == classifier.predict_text("second")
+
+
+def test_binary():
+    classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+    classifier.model = FakeBinaryModel()
+
+    async def run():
+        async with AsyncBatcher(classifier, max_wait=0.05) as batcher:
+            return await asyncio.gather(*(batcher.predict(t) for t in ["0.9", "0.2"]))
+
+    assert asyncio.run(run()) == classifier.predict_texts(["0.9", "0.2"])
+
+
+def test_invalid(classifier):
+    with pytest.raises(ValueError):
+        AsyncBatcher(classifier, max_batch_size=0)
+    with pytest.raises(ValueError):
+        AsyncBatcher(classifier, max_wait=-1)
@@ -1,6 +1,10 @@
+import numpy as np
 import pytest
 
-from src.module_classifier.classification.binary_classifier import BinaryClassifier
+from src.module_classifier.classification.binary_classifier import (
+    BinaryClassifier,
+    MainEditionClassifier,
+)
 
 
 class TestBinaryClassifier:
@@ -9,3 +13,75 @@ class TestBinaryClassifier:
     )
     def test_deserialize_label(self, label, expected):
         assert BinaryClassifier._deserialize_label(label) == expected
+
+
+class FakeModel:
+    """A stand-in for a binary FastText model with fixed label scores per text."""
+
+    def __init__(self, labels=("__label__False", "__label__True")):
+        self.labels = list(labels)
+
+    def get_labels(self):
+        return list(self.labels)
+
+    def predict(self, texts, k=1, threshold=0.0):
+        labels, probs = [], []
+        for text in texts:
+            p_true = float(text)
+            scores = {"__label__True": p_true, "__label__False": 1 - p_true}
+            ranked = sorted(self.labels, key=lambda label: -scores[label])
+            ranked = [
+                label
+                for label in ranked[: None if k < 0 else k]
+                if scores[label] >= threshold
+            ]
+            labels.append(ranked)
+            probs.append(np.array([scores[label] for label in ranked], np.float32))
+        return labels, probs
+
+
+class TestMainEditionClassifier:
+    @pytest.fixture
+    def classifier(self):
+        classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+        classifier.model = FakeModel()
+        return classifier
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 10])
+    def test_predict_binary(self, classifier, batch_size):
+        predicted, true_probs = classifier.predict_binary(
+            ["0.9", "0.2", "0.6"], batch_size=batch_size
+        )
+
+        assert predicted.dtype == bool
+        assert predicted.tolist() == [True, False, True]
+        assert true_probs.dtype == np.float32
+        assert true_probs.tolist() == pytest.approx([0.9, 0.2, 0.6])
+
+    def test_predict_binary_empty(self, classifier):
+        predicted, true_probs = classifier.predict_binary([])
+        assert predicted.shape == true_probs.shape == (0,)
+
+    def test_predict_binary_negative_only(self, classifier):
+        classifier.model = FakeModel(["__label__False"])
+        predicted, true_probs = classifier.predict_binary(["0.9", "0.2"])
+
+        assert predicted.tolist() == [False, False]
+        assert true_probs.tolist() == [0, 0]
+
+    def test_predict_texts(self, classifier):
+        assert classifier.predict_texts(["0.9", "0.2"]) == [
+            (True, pytest.approx(0.9)),
+            (False, pytest.approx(0.8)),
+        ]
+
+    @pytest.mark.parametrize("prefetch", [0, 2])
+    def test_predict_stream(self, classifier, prefetch):
+        texts = (str(p) for p in [0.9, 0.2, 0.6])
+        assert list(
+            classifier.predict_stream(texts, batch_size=2, prefetch=prefetch)
+        ) == [
+            (True, pytest.approx(0.9)),
+            (False, pytest.approx(0.8)),
+            (True, pytest.approx(0.6)),
+        ]
@@ -0,0 +1,128 @@
+import csv
+import io
+
+import pytest
+from src.module_classifier.classification import ModuleClassifier
+from src.module_classifier.classification.binary_classifier import (
+    MainEditionClassifier,
+)
+from src.module_classifier.classification.bulk import classify_csv, module_columns
+
+from .test_binary_classifier import FakeModel as FakeBinaryModel
+from .test_classifier import FakeModel
+
+INPUT = "id,text,title\n1,first,x\n2,second,y\n3,first,\n"
+
+
+class FakeMainEditionModel(FakeBinaryModel):
+    """Predicts P(True) from words, as digits are replaced when cleaning texts."""
+
+    true_probs = {"first": "0.9", "second": "0.2"}
+
+    def predict(self, texts, k=1):
+        return super().predict([self.true_probs[text] for text in texts], k)
+
+
+@pytest.fixture
+def module_classifier():
+    classifier = ModuleClassifier.__new__(ModuleClassifier)
+    classifier.model = FakeModel()
+    return classifier
+
+
+@pytest.fixture
+def main_edition_classifier():
+    classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+    classifier.model = FakeMainEditionModel()
+    return classifier
+
+
+def _classify(*classifiers, **kwargs):
+    output = io.StringIO()
+    count = classify_csv(io.StringIO(INPUT), output, *classifiers, **kwargs)
+    output.seek(0)
+    return count, list(csv.reader(output))
+
+
+def test_module_columns():
+    assert module_columns(2) == [
+        "module_1",
+        "module_1_prob",
+        "module_2",
+        "module_2_prob",
+    ]
+
+
+@pytest.mark.parametrize("batch_size,processes", [(1, 1), (2, 1), (10, 1), (2, 2)])
+def test_module(module_classifier, batch_size, processes):
+    count, rows = _classify(
+        module_classifier,
+        k=2,
+        text_fields=["text"],
+        batch_size=batch_size,
+        processes=processes,
+    )
+    assert count == 3
+    assert rows == [
+        ["id", "text", "title"] + module_columns(2),
+        ["1", "first", "x", "S1_M1", "0.7000", "S6_M8", "0.2000"],
+        ["2", "second", "y", "S3_M6", "0.6000", "S6_M8", "0.3000"],
+        ["3", "first", "", "S1_M1", "0.7000", "S6_M8", "0.2000"],
+    ]
+
+
+def test_both(module_classifier, main_edition_classifier):
+    count, rows = _classify(
+        module_classifier,
+        main_edition_classifier,
+        text_fields=["text"],
+        main_edition_text_fields=["text"],
+        batch_size=2,
+    )
+    assert rows[0][-4:] == [
+        "module_1",
+        "module_1_prob",
+        "main_edition",
+        "main_edition_prob",
+    ]
+    assert [row[-2:] for row in rows[1:]] == [
+        ["True", "0.9000"],
+        ["False", "0.2000"],
+        ["True", "0.9000"],
+    ]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_main_edition(main_edition_classifier, processes):
+    count, rows = _classify(
+        None,
+        main_edition_classifier,
+        main_edition_text_fields=["text"],
+        batch_size=2,
+        processes=processes,
+    )
+    assert rows[0] == ["id", "text", "title", "main_edition", "main_edition_prob"]
+    # the probability of True, as written with both classifiers
+    assert [row[-2:] for row in rows[1:]] == [
+        ["True", "0.9000"],
+        ["False", "0.2000"],
+        ["True", "0.9000"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"text_fields": ["missing"]},
+        {"text_fields": ["text"], "k": 0},
+        {"text_fields": ["text"], "batch_size": 0},
+    ],
+)
+def test_invalid(module_classifier, kwargs):
+    with pytest.raises(ValueError):
+        _classify(module_classifier, **kwargs)
+
+
+def test_no_classifier():
+    with pytest.raises(ValueError):
+        _classify()
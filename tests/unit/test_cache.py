@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+from src.module_classifier.classification import ModuleClassifier, PredictionCache
+from src.module_classifier.classification.binary_classifier import (
+    MainEditionClassifier,
+)
+from src.module_classifier.classification.cache import CachedModel
+
+from .test_binary_classifier import FakeModel as FakeBinaryModel
+from .test_classifier import FakeModel
+
+
+def _entry(label: str, prob: float):
+    return [label], np.array([prob])
+
+
+class TestPredictionCache:
+    def test_lru(self):
+        cache = PredictionCache(max_size=2)
+        cache.put_many([(b"a", _entry("x", 0.1)), (b"b", _entry("y", 0.2))])
+        assert cache.get_many([b"a"])[0][0] == ["x"]  # 'b' is now least recently used
+        cache.put_many([(b"c", _entry("z", 0.3))])
+
+        assert len(cache) == 2
+        assert [value is not None for value in cache.get_many([b"a", b"b", b"c"])] == [
+            True,
+            False,
+            True,
+        ]
+        stats = cache.stats
+        assert (stats.hits, stats.misses, stats.evictions) == (3, 1, 1)
+        assert stats.hit_ratio == pytest.approx(0.75)
+
+    def test_frozen(self):
+        cache = PredictionCache()
+        cache.put_many([(b"a", _entry("x", 0.5))])
+        labels, probs = cache.get_many([b"a"])[0]
+        assert probs.dtype == np.float64  # the dtype of the entry is kept
+        with pytest.raises(ValueError):
+            probs[0] = 1.0
+
+    def test_disabled_memory(self):
+        cache = PredictionCache(max_size=0)
+        cache.put_many([(b"a", _entry("x", 0.5))])
+        assert cache.get_many([b"a"]) == [None]
+
+    def test_sqlite(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        with PredictionCache(max_size=1, path=path) as cache:
+            cache.put_many([(b"a", _entry("x", 0.5)), (b"b", (["y", "z"], [0.3, 0.2]))])
+
+        with PredictionCache(path=path) as cache:
+            values = cache.get_many([b"a", b"b", b"c"])
+            assert values[0][0] == ["x"]
+            assert values[1][0] == ["y", "z"]
+            assert values[1][1] == pytest.approx([0.3, 0.2])
+            assert values[0][1].dtype == np.float64
+            assert values[2] is None
+            assert (cache.stats.hits, cache.stats.disk_hits) == (2, 2)
+
+            # promoted to memory
+            cache.get_many([b"a"])
+            assert cache.stats.disk_hits == 2
+
+    def test_key(self):
+        assert PredictionCache.key("md5", 1, "text") == PredictionCache.key(
+            "md5", 1, "text"
+        )
+        assert PredictionCache.key("md5", 1, "text") != PredictionCache.key(
+            "md5", 2, "text"
+        )
+        assert PredictionCache.key("md5", 1, "text") != PredictionCache.key(
+            "other", 1, "text"
+        )
+        assert PredictionCache.key("md5", 1, "text") != PredictionCache.key(
+            "md5", 1, "text", 0.5
+        )
+        assert PredictionCache.key("md5", 1, "text") != PredictionCache.key(
+            "md5", 1, "text", engine="numpy"
+        )
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            PredictionCache(max_size=-1)
+
+
+class TestCachedClassifier:
+    @pytest.fixture
+    def classifier(self):
+        classifier = ModuleClassifier.__new__(ModuleClassifier)
+        classifier.model = FakeModel()
+        return classifier
+
+    def test_predict_texts(self, classifier, mocker):
+        texts = ["first", "second", "first"]
+        expected = classifier.predict_texts(texts, k=2)
+        cache = PredictionCache()
+        classifier.set_cache(cache, model_id="fake")
+        assert classifier.cache is cache
+        spy = mocker.spy(classifier.model.model, "predict")
+
+        for _ in range(2):
+            predictions = classifier.predict_texts(texts, k=2)
+            assert [p.labels for p in predictions] == [p.labels for p in expected]
+            assert [p.probs.tolist() for p in predictions] == [
+                pytest.approx(p.probs.tolist()) for p in expected
+            ]
+
+        # identical texts are predicted once, and cached texts not at all
+        assert [call.args[0] for call in spy.call_args_list] == [["first", "second"]]
+        assert (cache.stats.hits, cache.stats.misses) == (2, 2)
+
+        classifier.predict_texts(texts, k=1)
+        assert spy.call_count == 2
+
+    def test_model_output(self, classifier):
+        model = classifier.model
+        classifier.set_cache(PredictionCache(), model_id="fake")
+        for _ in range(2):
+            labels, probs = classifier.model.predict(["first", "second"], 3, 0.25)
+            expected_labels, expected_probs = model.predict(
+                ["first", "second"], 3, 0.25
+            )
+            assert labels == expected_labels
+            assert [p.tolist() for p in probs] == [p.tolist() for p in expected_probs]
+            assert [p.dtype for p in probs] == [p.dtype for p in expected_probs]
+
+        # copies, which do not change the cached entries
+        probs[0][0] = -1.0
+        labels[0].append("other")
+        labels, probs = classifier.model.predict(["second"], 3, 0.25)
+        assert labels == expected_labels[1:]
+        assert probs[0].tolist() == expected_probs[1].tolist()
+        # a different threshold is a different entry
+        assert (
+            classifier.model.predict(["second"], 3)[0]
+            == model.predict(["second"], 3)[0]
+        )
+
+    def test_predict_proba(self, classifier):
+        expected = classifier.predict_proba(["first", "second"])
+        classifier.set_cache(PredictionCache(), model_id="fake")
+        classifier.predict_proba(["first"])
+        assert classifier.predict_proba(["first", "second"]) == pytest.approx(expected)
+
+    def test_binary(self):
+        classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+        classifier.model = FakeBinaryModel()
+        expected = classifier.predict_texts(["0.9", "0.3"])
+        classifier.set_cache(PredictionCache(), model_id="fake")
+        classifier.predict_texts(["0.9"])
+        assert classifier.predict_texts(["0.9", "0.3"]) == expected
+
+    def test_unset(self, classifier):
+        model = classifier.model
+        classifier.set_cache(PredictionCache(), model_id="fake")
+        classifier.set_cache(PredictionCache(), model_id="fake")
+        assert isinstance(classifier.model, CachedModel)
+        assert classifier.model.model is model
+        assert classifier.model.get_labels() == model.get_labels()
+
+        classifier.set_cache(None)
+        assert classifier.model is model
+        assert classifier.cache is None
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+
+import pytest
+from src.module_classifier.classification import checksums
+from src.module_classifier.classification.checksums import file_md5, verified_md5
+from src.module_classifier.classification.settings import MD5_SIDECAR_SUFFIX
+
+
+@pytest.mark.parametrize("size", [0, 1, 7, 8, 9, 100])
+def test_file_md5(tmp_path, size):
+    content = os.urandom(size)
+    path = tmp_path / "model.bin"
+    path.write_bytes(content)
+
+    assert file_md5(str(path), chunk_size=8) == hashlib.md5(content).hexdigest()
+
+
+class TestVerifiedMD5:
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = tmp_path / "model.bin"
+        path.write_bytes(b"some text")
+        return str(path)
+
+    def test_sidecar(self, path, mocker):
+        spy = mocker.spy(checksums, "file_md5")
+        md5 = hashlib.md5(b"some text").hexdigest()
+
+        assert verified_md5(path) == md5
+        with open(path + MD5_SIDECAR_SUFFIX) as f:
+            recorded = json.load(f)
+        assert recorded["md5"] == md5
+        assert recorded["size"] == 9
+
+        assert verified_md5(path) == md5
+        assert spy.call_count == 1
+
+    def test_changed_file(self, path, mocker):
+        verified_md5(path)
+        spy = mocker.spy(checksums, "file_md5")
+        with open(path, "ab") as f:
+            f.write(b" more")
+
+        assert verified_md5(path) == hashlib.md5(b"some text more").hexdigest()
+        assert spy.call_count == 1
+
+    @pytest.mark.parametrize(
+        "sidecar", ["", "not json", "[]", '{"md5": 1}', '{"size": 9, "md5": "x"}']
+    )
+    def test_invalid_sidecar(self, path, sidecar):
+        with open(path + MD5_SIDECAR_SUFFIX, "w") as f:
+            f.write(sidecar)
+        assert verified_md5(path) == hashlib.md5(b"some text").hexdigest()
+
+    def test_unwritable_sidecar(self, path, mocker):
+        mocker.patch.object(checksums.os, "replace", side_effect=PermissionError)
+
+        assert verified_md5(path) == hashlib.md5(b"some text").hexdigest()
+        assert os.listdir(os.path.dirname(path)) == ["model.bin"]
+
+    def test_read_only_directory(self, path, mocker):
+        access = mocker.patch.object(checksums.os, "access", return_value=False)
+        write = mocker.spy(checksums.json, "dump")
+
+        assert verified_md5(path) == hashlib.md5(b"some text").hexdigest()
+        access.assert_called_once_with(os.path.dirname(path), os.W_OK)
+        write.assert_not_called()
+        assert os.listdir(os.path.dirname(path)) == ["model.bin"]
@@ -1,9 +1,15 @@
 import os
 from tempfile import TemporaryDirectory
 
+import numpy as np
 import pytest
-from src.module_classifier.classification import Classifier
-from src.module_classifier.classification.module_classifier import ModuleClassifier
+from src.module_classifier.classification import Classifier, PredictionBatch
+from src.module_classifier.classification.module_classifier import (
+    ModuleClassifier,
+    Prediction,
+)
+from src.module_classifier.preprocessing import Module
+from src.module_classifier.preprocessing.settings import CLASS_FIELD
 
 from ..conftest import does_not_raise
 
@@ -107,3 +113,318 @@ def test_validate_md5(filename, content, expected, exception):
             test_file.flush()
             with exception:
                 assert Classifier.validate_md5(test_file.name) == expected
+
+
+@pytest.mark.parametrize(
+    "row,token_budgets,char_budgets,expected",
+    [
+        (
+            {"item_title": "test title", "abstract_description": "one two three"},
+            {},
+            {},
+            "test title one two three",
+        ),
+        (
+            {"item_title": "test title", "abstract_description": "one two three"},
+            {"abstract_description": 2},
+            {},
+            "test title one two",
+        ),
+        (
+            {"item_title": "test title", "abstract_description": "one two three"},
+            {"item_title": 1},
+            {"abstract_description": 7},
+            "test one two",
+        ),
+    ],
+    ids=["no budgets", "token budget", "token and character budgets"],
+)
+def test_fasttext_line_budgets(row, token_budgets, char_budgets, expected):
+    assert (
+        ModuleClassifier.fasttext_line(
+            row,
+            ("item_title", "abstract_description"),
+            token_budgets=token_budgets,
+            char_budgets=char_budgets,
+        )
+        == expected
+    )
+
+
+def test_fasttext_line_no_default_budgets():
+    row = {"item_title": "title", "abstract_description": "word " * 5000}
+    assert ModuleClassifier.fasttext_line(row, tuple(row)) == "title" + " word" * 5000
+
+
+def test_fasttext_line_default_delimiter():
+    row = {"item_title": "title", CLASS_FIELD: "s1.m2"}
+    assert (
+        ModuleClassifier.fasttext_line(row, ["item_title"], module_delimiter=None)
+        == "__label__S1_M2 title"
+    )
+
+
+@pytest.mark.parametrize(
+    "columns,text_fields,exception",
+    [
+        (
+            {
+                "item_title": ["test title", "Second Title", "test title"],
+                "authors": ["Jane Doe", "", "Jane Doe"],
+                "publication_name": np.array(["IEEE Spectrum", "Wired", "Wired"]),
+            },
+            ("item_title", "authors", "publication_name"),
+            does_not_raise(),
+        ),
+        (
+            {"item_title": ["a title"], "authors": [None]},
+            (),
+            does_not_raise(),
+        ),
+        (
+            {"item_title": ["test title"]},
+            ("item_title", "authors"),
+            pytest.raises(ValueError),
+        ),
+        (
+            {"item_title": ["test title"], "authors": []},
+            ("item_title", "authors"),
+            pytest.raises(ValueError),
+        ),
+    ],
+    ids=["columns", "all columns", "missing column", "length mismatch"],
+)
+def test_fasttext_lines(columns, text_fields, exception):
+    with exception:
+        lines = Classifier.fasttext_lines(columns, text_fields)
+
+        rows = [
+            {
+                field: "" if values[i] is None else str(values[i])
+                for field, values in columns.items()
+            }
+            for i in range(len(lines))
+        ]
+        assert lines == [
+            ModuleClassifier.fasttext_line(row, text_fields) for row in rows
+        ]
+
+
+class FakeModel:
+    """A stand-in for a FastText model with fixed label scores per text."""
+
+    labels = ["__label__S1_M1", "__label__S6_M8", "__label__S3_M6"]
+    scores = {
+        "first": [0.7, 0.2, 0.1],
+        "second": [0.1, 0.3, 0.6],
+    }
+
+    def get_labels(self):
+        return list(self.labels)
+
+    def predict(self, texts, k=1, threshold=0.0):
+        labels, probs = [], []
+        for text in texts:
+            ranked = sorted(
+                zip(self.scores[text], self.labels), key=lambda score: -score[0]
+            )[: None if k < 0 else k]
+            ranked = [(score, label) for score, label in ranked if score >= threshold]
+            labels.append([label for _, label in ranked])
+            probs.append(np.array([score for score, _ in ranked]))
+        return labels, probs
+
+
+class TestPredictProba:
+    @pytest.fixture
+    def classifier(self):
+        classifier = ModuleClassifier.__new__(ModuleClassifier)
+        classifier.model = FakeModel()
+        return classifier
+
+    def test_all_labels(self, classifier):
+        probs = classifier.predict_proba(["first", "second", "first"])
+
+        assert probs.dtype == np.float32
+        assert probs.shape == (3, 3)
+        assert probs == pytest.approx(
+            np.array([[0.7, 0.2, 0.1], [0.1, 0.3, 0.6], [0.7, 0.2, 0.1]])
+        )
+
+    def test_top_k(self, classifier):
+        probs = classifier.predict_proba(["first", "second"], k=1)
+        assert probs == pytest.approx(np.array([[0.7, 0, 0], [0, 0, 0.6]]))
+
+    def test_empty(self, classifier):
+        assert classifier.predict_proba([]).shape == (0, 3)
+
+    def test_prediction_probs(self, classifier):
+        texts = ["first", "second"]
+        expected = [
+            p.get_probabilities(classifier.raw_labels)
+            for p in classifier.predict_texts(texts, 2)
+        ]
+        assert classifier.prediction_probs(texts, 2) == pytest.approx(
+            np.array(expected)
+        )
+
+
+class TestPredictionBatch:
+    @pytest.fixture
+    def classifier(self):
+        classifier = ModuleClassifier.__new__(ModuleClassifier)
+        classifier.model = FakeModel()
+        return classifier
+
+    def test_predict_batch(self, classifier):
+        batch = classifier.predict_batch(["first", "second", "first"], k=2)
+
+        assert len(batch) == 3
+        assert batch.k == 2
+        assert batch.label_ids.dtype == np.int32
+        assert batch.probs.dtype == np.float32
+        assert batch.label_ids.tolist() == [[0, 1], [2, 1], [0, 1]]
+        assert batch[1] == [
+            Prediction(Module(section=3, module=6), pytest.approx(0.6)),
+            Prediction(Module(section=6, module=8), pytest.approx(0.3)),
+        ]
+        assert batch[-1] == batch[0]
+        assert list(batch) == [batch[0], batch[1], batch[2]]
+
+    def test_predictions(self, classifier):
+        texts = ["first", "second"]
+        batch = classifier.predict_batch(texts, k=2)
+
+        for i, expected in enumerate(classifier.predict_texts(texts, k=2)):
+            assert batch.predictions(i).labels == expected.labels
+            assert batch.predictions(i).probs.tolist() == pytest.approx(
+                expected.probs.tolist()
+            )
+            assert batch.predictions(i).to_predictions() == batch[i]
+
+    def test_predict_text(self, classifier):
+        assert classifier.predict_text("second", k=1) == [
+            Prediction(Module(section=3, module=6), pytest.approx(0.6))
+        ]
+
+    def test_slice(self, classifier):
+        batch = classifier.predict_batch(["first", "second", "first"], k=-1)
+        view = batch[1:]
+
+        assert isinstance(view, PredictionBatch)
+        assert len(view) == 2
+        assert view[0] == batch[1]
+        assert np.shares_memory(view.probs, batch.probs)
+        assert batch.to_numpy()[1] is batch.probs
+
+    def test_from_arrays_padded(self, classifier):
+        batch = PredictionBatch.from_arrays(
+            np.array([2, 0, 1]),
+            np.array([1, 0, 2]),
+            np.array([0.6, 0.4, 1.0]),
+            classifier.label_table,
+        )
+
+        assert batch.label_ids.tolist() == [[1, 0], [-1, -1], [2, -1]]
+        assert batch.probs.ravel().tolist() == pytest.approx([0.6, 0.4, 0, 0, 1.0, 0])
+        assert batch[1] == []
+        assert batch[2] == [Prediction(Module(section=3, module=6), 1.0)]
+        assert batch.predictions(2).labels == ["__label__S3_M6"]
+
+    def test_invalid(self, classifier):
+        with pytest.raises(ValueError):
+            PredictionBatch(
+                np.zeros((2, 1), np.int32),
+                np.zeros((2, 2), np.float32),
+                classifier.label_table,
+            )
+
+    def test_to_pandas(self, classifier):
+        pandas = pytest.importorskip("pandas")
+        batch = classifier.predict_batch(["first", "second"], k=2)
+        frame = batch.to_pandas()
+
+        assert isinstance(frame, pandas.DataFrame)
+        assert list(frame.columns) == ["label_0", "prob_0", "label_1", "prob_1"]
+        assert frame["label_0"].tolist() == ["__label__S1_M1", "__label__S3_M6"]
+        assert frame["prob_1"].tolist() == batch.probs[:, 1].tolist()
+        frame.loc[0, "prob_0"] = -1.0
+        assert batch.probs[0, 0] != -1.0
+
+    def test_to_pandas_no_copy(self, classifier):
+        pytest.importorskip("pandas")
+        batch = classifier.predict_batch(["first", "second"], k=2)
+        frame = batch.to_pandas(copy=False)
+
+        assert frame["prob_0"].tolist() == batch.probs[:, 0].tolist()
+        assert frame["label_1"].tolist() == ["__label__S6_M8", "__label__S6_M8"]
+
+
+class TestPredictStream:
+    @pytest.fixture
+    def classifier(self):
+        classifier = ModuleClassifier.__new__(ModuleClassifier)
+        classifier.model = FakeModel()
+        return classifier
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 10])
+    @pytest.mark.parametrize("prefetch", [0, 1, 3])
+    def test_texts(self, classifier, batch_size, prefetch):
+        texts = ["first", "second", "second", "first", "second"]
+        predictions = classifier.predict_stream(
+            iter(texts), k=2, batch_size=batch_size, prefetch=prefetch
+        )
+        assert [p.labels for p in predictions] == [
+            p.labels for p in classifier.predict_texts(texts, k=2)
+        ]
+
+    def test_rows(self, classifier):
+        rows = [
+            {"text": "second"},
+            {"text": "first", "module_id_for_all": "S6_M8"},
+            "second",
+        ]
+        predictions = list(classifier.predict_stream(rows, text_fields=["text"]))
+        assert [p.labels[0] for p in predictions] == [
+            "__label__S3_M6",
+            "__label__S1_M1",
+            "__label__S3_M6",
+        ]
+
+    def test_batches(self, classifier, mocker):
+        spy = mocker.spy(classifier.model, "predict")
+        stream = classifier.predict_stream(
+            ("first" for _ in range(5)), batch_size=2, prefetch=1
+        )
+        next(stream)
+        assert spy.call_count == 1
+        assert len(list(stream)) == 4
+        assert [len(call.args[0]) for call in spy.call_args_list] == [2, 2, 1]
+
+    def test_close(self, classifier):
+        read = []
+
+        def texts():
+            for i in range(100):
+                read.append(i)
+                yield "first"
+
+        stream = classifier.predict_stream(texts(), batch_size=2, prefetch=2)
+        next(stream)
+        stream.close()
+        # the current batch and at most `prefetch` batches ahead, plus one being read
+        assert len(read) <= 8
+
+    @pytest.mark.parametrize("prefetch", [0, 2])
+    def test_error(self, classifier, prefetch):
+        def texts():
+            yield "first"
+            raise OSError("read error")
+
+        stream = classifier.predict_stream(texts(), batch_size=1, prefetch=prefetch)
+        with pytest.raises(OSError, match="read error"):
+            list(stream)
+
+    @pytest.mark.parametrize("kwargs", [{"batch_size": 0}, {"prefetch": -1}])
+    def test_invalid(self, classifier, kwargs):
+        with pytest.raises(ValueError):
+            next(classifier.predict_stream(["first"], **kwargs))
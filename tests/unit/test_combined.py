@@ -0,0 +1,131 @@
+import pickle
+
+import pytest
+from src.module_classifier.classification import (
+    CombinedClassifier,
+    CombinedPrediction,
+    ModuleClassifier,
+    ParallelClassifier,
+)
+from src.module_classifier.classification import combined as combined_module
+from src.module_classifier.classification.binary_classifier import (
+    MainEditionClassifier,
+)
+from src.module_classifier.preprocessing.settings import (
+    MAIN_EDITION_TEXT_FIELDS,
+    TEXT_FIELDS,
+)
+
+from .test_bulk import FakeMainEditionModel
+from .test_classifier import FakeModel
+
+# "note", read by both classifiers, is empty once cleaned (short words are removed)
+ROWS = [
+    {"text": "first", "title": "second", "note": "a b"},
+    {"text": "second", "title": "second", "note": "c"},
+    {"text": "first", "title": "first", "note": "a b"},
+]
+
+
+@pytest.fixture
+def module_classifier():
+    classifier = ModuleClassifier.__new__(ModuleClassifier)
+    classifier.model = FakeModel()
+    return classifier
+
+
+@pytest.fixture
+def main_edition_classifier():
+    classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+    classifier.model = FakeMainEditionModel()
+    return classifier
+
+
+@pytest.fixture
+def combined(module_classifier, main_edition_classifier):
+    return CombinedClassifier(
+        module_classifier, main_edition_classifier, ["text", "note"], ["note", "title"]
+    )
+
+
+def test_fasttext_lines(module_classifier, main_edition_classifier):
+    rows = [
+        {
+            field: f"The {field} of row {i}: Automation, AI & “robots”"
+            for field in (*TEXT_FIELDS, *MAIN_EDITION_TEXT_FIELDS)
+        }
+        for i in range(3)
+    ]
+    rows[1]["item_title"] = ""
+    combined = CombinedClassifier(module_classifier, main_edition_classifier)
+
+    module_lines, main_edition_lines = combined.fasttext_lines(
+        {field: [row[field] for row in rows] for field in combined.fields}
+    )
+
+    assert module_lines == [ModuleClassifier.fasttext_line(row) for row in rows]
+    assert main_edition_lines == [
+        MainEditionClassifier.fasttext_line(row) for row in rows
+    ]
+
+
+def test_fields_cleaned_once(combined, mocker):
+    clean_column = mocker.spy(combined_module, "clean_column")
+    combined.predict_rows(ROWS)
+    assert combined.fields == ("text", "note", "title")
+    assert clean_column.call_count == 3
+
+
+def test_predict_rows(combined, module_classifier, main_edition_classifier):
+    predictions = combined.predict_rows(ROWS, k=2)
+
+    assert [p.modules for p in predictions] == [
+        module_classifier.predict_row(row, 2, ["text", "note"]) for row in ROWS
+    ]
+    assert [(p.main_edition, p.main_edition_prob) for p in predictions] == [
+        (False, pytest.approx(0.2)),
+        (False, pytest.approx(0.2)),
+        (True, pytest.approx(0.9)),
+    ]
+    assert combined.predict_row(ROWS[0], k=2) == predictions[0]
+    assert isinstance(predictions[0], CombinedPrediction)
+
+
+def test_predict_columns(combined):
+    columns = {field: [row[field] for row in ROWS] for field in combined.fields}
+    assert combined.predict_columns(columns) == combined.predict_rows(ROWS)
+    assert combined.predict_rows([]) == []
+
+
+def test_parallel(combined):
+    with ParallelClassifier(combined, 2, 1) as parallel:
+        assert parallel.predict_rows(ROWS * 2) == combined.predict_rows(ROWS * 2)
+
+
+def test_pickle(combined, mocker):
+    combined.module_classifier.model_path = "module.bin"
+    combined.main_edition_classifier.model_path = "main_edition.bin"
+    module_classifier = mocker.patch.object(combined_module, "ModuleClassifier")
+    main_edition_classifier = mocker.patch.object(
+        combined_module, "MainEditionClassifier"
+    )
+
+    loaded = pickle.loads(pickle.dumps(combined))
+
+    module_classifier.assert_called_once_with("module.bin", "fasttext")
+    main_edition_classifier.assert_called_once_with("main_edition.bin", "fasttext")
+    assert loaded.text_fields == ("text", "note")
+    assert loaded.main_edition_text_fields == ("note", "title")
+
+
+@pytest.mark.parametrize(
+    "rows", [[{"text": "first", "note": ""}], ROWS + [{"text": "second"}]]
+)
+def test_missing_field(combined, rows):
+    with pytest.raises(ValueError, match="Missing input field"):
+        combined.predict_rows(rows)
+
+
+def test_no_text_fields(module_classifier, main_edition_classifier):
+    with pytest.raises(ValueError):
+        CombinedClassifier(module_classifier, main_edition_classifier, [], ["text"])
@@ -0,0 +1,53 @@
+import os
+from tempfile import TemporaryDirectory
+
+import pytest
+from src.module_classifier.preprocessing.compression import (
+    detect_compression,
+    open_file,
+)
+
+CONTENT = 'id,text\n1,"multi\nline ä"\n'
+
+
+@pytest.mark.parametrize(
+    "filename,expected",
+    [
+        ("file.csv", None),
+        ("file.csv.gz", "gzip"),
+        ("file.csv.bz2", "bz2"),
+        ("file.csv.xz", "xz"),
+        ("file.CSV.GZ", "gzip"),
+    ],
+)
+def test_roundtrip(filename, expected):
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, filename)
+
+        assert detect_compression(path, "w") == expected
+        with open_file(path, "w", encoding="utf-8", newline="") as f:
+            f.write(CONTENT)
+        assert detect_compression(path) == expected
+
+        with open_file(path, encoding="utf-8", newline="") as f:
+            assert f.read() == CONTENT
+
+
+@pytest.mark.parametrize("compressed,plain", [("a.csv.gz", "b.csv")])
+def test_detect_by_magic_bytes(compressed, plain):
+    with TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, compressed)
+        target = os.path.join(tmpdir, plain)
+        with open_file(source, "w") as f:
+            f.write(CONTENT)
+        os.rename(source, target)
+
+        assert detect_compression(target) == "gzip"
+        with open_file(target, newline="") as f:
+            assert f.read() == CONTENT
+
+
+@pytest.mark.parametrize("mode", ["rb", "w+", "r+"])
+def test_invalid_mode(mode):
+    with pytest.raises(ValueError):
+        open_file("file.csv", mode)
@@ -0,0 +1,139 @@
+import csv
+import io
+import os
+
+import numpy as np
+import pytest
+from src.module_classifier.classification import ModuleClassifier
+from src.module_classifier.preprocessing.corpus import Corpus
+from src.module_classifier.preprocessing.models import normalize_module_label
+
+TEXT_FIELDS = ("title", "text")
+ROWS = [
+    ["id", "title", "text", "module"],
+    ["11", "First Title", "Some text, with 'punctuation' (and numbers: 123).", "s1.m1"],
+    ["12", "", 'Quoted "text"\nwith line breaks', "S2_M3"],
+    ["13", "Third", "", "s1.m1"],
+    ["14", "a b", "x", "S6.M10"],
+]
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = str(tmp_path / "archive.csv")
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(ROWS)
+    return path
+
+
+def _fasttext_lines(path):
+    with open(path, newline="") as f:
+        return [
+            " ".join(ModuleClassifier.fasttext_line(row, TEXT_FIELDS, "module").split())
+            for row in csv.DictReader(f)
+        ]
+
+
+def _module_label(label):
+    return "__label__" + normalize_module_label(label)
+
+
+class TestCorpus:
+    def test_build(self, csv_file):
+        corpus = Corpus.build(csv_file, text_fields=TEXT_FIELDS, class_field="module")
+
+        assert len(corpus) == 4
+        assert corpus.row_ids.tolist() == [11, 12, 13, 14]
+        assert corpus.labels == ["s1.m1", "S2_M3", "S6.M10"]
+        assert corpus.label_ids.tolist() == [0, 1, 0, 2]
+        assert corpus.tokens(1) == ["quoted", "text", "with", "line", "breaks"]
+        assert corpus.tokens(3) == []
+        assert list(corpus.texts())[2] == "third"
+
+    def test_fasttext_lines(self, csv_file):
+        corpus = Corpus.build(csv_file, text_fields=TEXT_FIELDS, class_field="module")
+        lines = list(corpus.fasttext_lines(corpus.row_labels(_module_label)))
+        assert lines == _fasttext_lines(csv_file)
+
+        output = io.StringIO()
+        corpus.write_fasttext(output)
+        assert output.getvalue().splitlines() == list(corpus.texts())
+
+    def test_no_labels(self, csv_file):
+        corpus = Corpus.build(csv_file, text_fields=TEXT_FIELDS, class_field=None)
+
+        assert corpus.labels == []
+        assert corpus.label_ids.tolist() == [-1] * 4
+        with pytest.raises(ValueError):
+            corpus.row_labels(str)
+
+    def test_row_numbers(self, csv_file):
+        corpus = Corpus.build(csv_file, text_fields=TEXT_FIELDS, id_field="missing")
+        assert corpus.row_ids.tolist() == [0, 1, 2, 3]
+
+    def test_invalid_row_ids(self, tmp_path):
+        path = str(tmp_path / "archive.csv")
+        with open(path, "w", newline="") as f:
+            csv.writer(f).writerows(
+                [
+                    ["id", "title", "text"],
+                    ["11", "apple", "banana"],
+                    ["", "cherry", "grape"],
+                    ["x", "melon", "lemon"],
+                ]
+            )
+        corpus = Corpus.build(path, text_fields=TEXT_FIELDS)
+        assert corpus.row_ids.tolist() == [11, -1, -1]
+        assert list(corpus.texts()) == ["apple banana", "cherry grape", "melon lemon"]
+
+    def test_missing_field(self, csv_file):
+        with pytest.raises(ValueError):
+            Corpus.build(csv_file, text_fields=("title", "missing"))
+        with pytest.raises(ValueError):
+            Corpus.build(csv_file, text_fields=())
+
+    def test_slice(self, csv_file):
+        corpus = Corpus.build(csv_file, text_fields=TEXT_FIELDS, class_field="module")
+        view = corpus[1:3]
+
+        assert len(view) == 2
+        assert view.row_ids.tolist() == [12, 13]
+        assert list(view.texts()) == list(corpus.texts())[1:3]
+        assert np.shares_memory(view.offsets, corpus.offsets)
+        assert view.token_ids is corpus.token_ids
+        assert len(corpus[3:1]) == 0
+        with pytest.raises(ValueError):
+            corpus[::2]
+
+    def test_save_load(self, csv_file, tmp_path):
+        corpus = Corpus.build(csv_file, text_fields=TEXT_FIELDS, class_field="module")
+        corpus.save(str(tmp_path / "corpus"))
+        loaded = Corpus.load(str(tmp_path / "corpus"))
+
+        assert isinstance(loaded.token_ids, np.memmap)
+        assert loaded.vocabulary == corpus.vocabulary
+        assert loaded.labels == corpus.labels
+        assert loaded.settings == corpus.settings
+        for name in ("token_ids", "offsets", "label_ids", "row_ids"):
+            assert np.array_equal(getattr(loaded, name), getattr(corpus, name))
+
+    def test_from_csv(self, csv_file, mocker):
+        build = mocker.spy(Corpus, "build")
+
+        corpus = Corpus.from_csv(csv_file, text_fields=TEXT_FIELDS)
+        assert os.path.isdir(csv_file + ".corpus")
+        Corpus.from_csv(csv_file, text_fields=TEXT_FIELDS)
+        assert build.call_count == 1
+
+        # different settings
+        Corpus.from_csv(csv_file, text_fields=TEXT_FIELDS, token_budgets={"text": 1})
+        assert build.call_count == 2
+        Corpus.from_csv(csv_file, text_fields=TEXT_FIELDS, token_budgets={"text": 1})
+        assert build.call_count == 2
+
+        # changed source file
+        with open(csv_file, "a", newline="") as f:
+            csv.writer(f).writerow(["15", "new row", "", "S1_M1"])
+        updated = Corpus.from_csv(csv_file, text_fields=TEXT_FIELDS)
+        assert build.call_count == 3
+        assert len(updated) == len(corpus) + 1
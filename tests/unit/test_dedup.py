@@ -0,0 +1,158 @@
+import random
+import string
+
+import numpy as np
+import pytest
+from src.module_classifier.preprocessing import dedup
+from src.module_classifier.preprocessing.dedup import (
+    DuplicateIndex,
+    MinHasher,
+    find_duplicates,
+    keyed_line,
+    keyed_lines,
+)
+
+RNG = random.Random(0)
+WORDS = ["".join(RNG.choices(string.ascii_lowercase, k=8)) for _ in range(1000)]
+
+
+def _text(n: int = 100) -> str:
+    return " ".join(RNG.choices(WORDS, k=n))
+
+
+def _edit(text: str, n: int) -> str:
+    tokens = text.split()
+    for i in RNG.sample(range(len(tokens)), n):
+        tokens[i] = "edited"
+    return " ".join(tokens)
+
+
+class TestMinHasher:
+    def test_signature(self):
+        hasher = MinHasher()
+        text = _text()
+
+        assert hasher.signature(text).shape == (128,)
+        assert np.array_equal(hasher.signature(text), hasher.signature(text))
+        similar = (hasher.signature(text) == hasher.signature(_edit(text, 2))).mean()
+        different = (hasher.signature(text) == hasher.signature(_text())).mean()
+        assert similar > 0.8
+        assert different < 0.1
+
+    def test_signature_blocks(self, monkeypatch):
+        hasher = MinHasher()
+        text = _text(1000)
+        expected = hasher.signature(text)
+        monkeypatch.setattr(dedup, "DEDUP_SHINGLE_BLOCK", 7)
+        assert np.array_equal(hasher.signature(text), expected)
+
+    def test_band_keys(self):
+        hasher = MinHasher(permutations=64, bands=8)
+        text = _text()
+
+        keys = hasher.band_keys(text)
+        assert len(keys) == 8
+        assert keys == MinHasher(permutations=64, bands=8).band_keys(text)
+        assert keys != MinHasher(permutations=64, bands=8, seed=1).band_keys(text)
+        assert set(keys) & set(hasher.band_keys(_edit(text, 1)))
+        assert not set(keys) & set(hasher.band_keys(_text()))
+        assert hasher.band_keys("") == ()
+        assert len(hasher.band_keys("short")) == 8
+
+    def test_line_band_keys(self):
+        hasher = MinHasher()
+        text = _text()
+        assert hasher.line_band_keys(f"__label__S1_M1 {text}") == (
+            hasher.band_keys(text)
+        )
+        assert hasher.line_band_keys("__label__True") == ()
+
+    def test_threshold(self):
+        assert MinHasher().threshold == pytest.approx(0.707, abs=0.001)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            MinHasher(permutations=100, bands=16)
+        with pytest.raises(ValueError):
+            MinHasher(shingle_size=0)
+
+
+class TestDuplicateIndex:
+    def test_add(self):
+        hasher = MinHasher()
+        first, second = _text(), _text()
+        index = DuplicateIndex()
+
+        assert not index.add(hasher.band_keys(first))
+        assert not index.add(hasher.band_keys(second))
+        assert index.add(hasher.band_keys(_edit(first, 1)))
+        assert index.add(hasher.band_keys(second))
+        assert not index.add(())
+        assert not index.add(())
+
+        assert len(index) == 6
+        assert index.duplicates == 2
+        assert index.ratio == pytest.approx(1 / 3)
+        assert index.groups() == [0, 1, 0, 1, 4, 5]
+
+    def test_transitive(self):
+        index = DuplicateIndex(bands=2)
+        index.add((1, 2))
+        index.add((3, 4))
+        index.add((1, 4))  # joins both groups
+        assert index.groups() == [0, 0, 0]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            DuplicateIndex(bands=2).add((1, 2, 3))
+
+    def test_drop_duplicates(self):
+        lines = [f"__label__a {text}" for text in [_text(), _text()]]
+        lines += [lines[0].replace("__label__a", "__label__b")]
+
+        assert list(DuplicateIndex().drop_duplicates(keyed_lines(lines))) == lines[:2]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_find_duplicates(processes):
+    texts = [_text() for _ in range(50)]
+    texts += [_edit(text, 1) for text in texts[:10]]
+
+    index = find_duplicates(texts, processes=processes)
+    assert index.groups() == list(range(50)) + list(range(10))
+
+
+def test_find_duplicates_streamed(monkeypatch):
+    monkeypatch.setattr(dedup, "DEDUP_CHUNK_SIZE", 5)
+    texts = [_text() for _ in range(50)]
+    texts += [_edit(text, 1) for text in texts[:10]]
+    read = []
+    first_add = []
+    add = DuplicateIndex.add
+
+    def stream():
+        for text in texts:
+            read.append(text)
+            yield text
+
+    def counting_add(self, keys):
+        if not first_add:
+            first_add.append(len(read))
+        return add(self, keys)
+
+    monkeypatch.setattr(DuplicateIndex, "add", counting_add)
+    index = find_duplicates(stream(), processes=2)
+    assert index.groups() == list(range(50)) + list(range(10))
+    # at most two chunks per process are read ahead
+    assert first_add == [20]
+
+
+def test_keyed_line():
+    hasher = MinHasher()
+    text = _text()
+
+    assert keyed_line({"text": text}, lambda row: row["text"], hasher) == (
+        text,
+        hasher.band_keys(text),
+    )
+    assert keyed_line({}, lambda row: None, hasher) is None
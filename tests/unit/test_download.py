@@ -0,0 +1,266 @@
+import hashlib
+import io
+import os
+import threading
+import time
+
+import pytest
+from src.module_classifier.classification import ModuleClassifier, download, registry
+from src.module_classifier.classification.checksums import (
+    file_md5,
+    verified_md5,
+)
+from src.module_classifier.classification.download import (
+    LOCK_SUFFIX,
+    PART_SUFFIX,
+    STATE_SUFFIX,
+    download_model,
+)
+from src.module_classifier.classification.registry import ModelRegistry
+from src.module_classifier.classification.settings import MD5_SIDECAR_SUFFIX
+
+BUCKET = "bucket"
+KEY = "model.bin"
+CONTENT = bytes(range(256)) * 40 + b"end"
+CONTENT_MD5 = hashlib.md5(CONTENT).hexdigest()
+
+
+class FakeS3Client:
+    """Serves objects from memory, optionally failing a number of ranged requests."""
+
+    def __init__(self, objects, etag=None, failures=0, delay=0.0):
+        self.objects = objects
+        self.etag = etag
+        self.failures = failures
+        self.delay = delay
+        self.heads = 0
+        self.ranges = []
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        self.heads += 1
+        content = self.objects[(Bucket, Key)]
+        etag = self.etag or hashlib.md5(content).hexdigest()
+        return {"ContentLength": len(content), "ETag": f'"{etag}"'}
+
+    def get_object(self, Bucket, Key, Range):
+        time.sleep(self.delay)
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("connection reset")
+            self.ranges.append(Range)
+        first, last = map(int, Range[len("bytes=") :].split("-"))
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)][first : last + 1])}
+
+
+@pytest.fixture
+def client():
+    return FakeS3Client({(BUCKET, KEY): CONTENT})
+
+
+@pytest.fixture
+def local_path(tmp_path):
+    return str(tmp_path / "models" / "model.bin")
+
+
+def _leftovers(local_path):
+    return [
+        suffix
+        for suffix in (PART_SUFFIX, STATE_SUFFIX)
+        if os.path.exists(local_path + suffix)
+    ]
+
+
+def test_download(client, local_path):
+    md5 = download_model(
+        client, BUCKET, KEY, local_path, part_size=1000, max_concurrency=3
+    )
+
+    assert md5 == CONTENT_MD5
+    with open(local_path, "rb") as f:
+        assert f.read() == CONTENT
+    assert len(client.ranges) == -(-len(CONTENT) // 1000)
+    assert "bytes=10000-10242" in client.ranges
+    assert _leftovers(local_path) == []
+    assert os.path.exists(local_path + MD5_SIDECAR_SUFFIX)
+    assert verified_md5(local_path) == CONTENT_MD5
+
+
+def test_download_empty(local_path):
+    client = FakeS3Client({(BUCKET, KEY): b""})
+
+    assert download_model(client, BUCKET, KEY, local_path) == hashlib.md5().hexdigest()
+    assert os.path.getsize(local_path) == 0
+
+
+def test_existing_file(client, local_path):
+    download_model(client, BUCKET, KEY, local_path)
+    client.heads, client.ranges = 0, []
+
+    assert download_model(client, BUCKET, KEY, local_path) == CONTENT_MD5
+    assert client.heads == 0 and client.ranges == []
+
+
+def test_existing_invalid_file(client, local_path):
+    os.makedirs(os.path.dirname(local_path))
+    with open(local_path, "wb") as f:
+        f.write(CONTENT[:100])
+
+    md5 = download_model(client, BUCKET, KEY, local_path, expected_md5=CONTENT_MD5)
+    assert md5 == CONTENT_MD5 == file_md5(local_path)
+
+
+def test_retry(local_path):
+    client = FakeS3Client({(BUCKET, KEY): CONTENT}, failures=2)
+
+    download_model(client, BUCKET, KEY, local_path, part_size=1000, retries=2)
+    assert file_md5(local_path) == CONTENT_MD5
+
+
+def test_resume(local_path):
+    client = FakeS3Client({(BUCKET, KEY): CONTENT}, failures=1)
+    with pytest.raises(ConnectionError):
+        download_model(
+            client,
+            BUCKET,
+            KEY,
+            local_path,
+            part_size=1000,
+            max_concurrency=1,
+            retries=0,
+        )
+    assert not os.path.exists(local_path)
+    assert _leftovers(local_path) == [PART_SUFFIX, STATE_SUFFIX]
+
+    # the first part failed; let the second attempt fail after three parts
+    client = FakeS3Client({(BUCKET, KEY): CONTENT})
+    original = client.get_object
+
+    def get_object(**kwargs):
+        if len(client.ranges) == 3:
+            raise ConnectionError("connection reset")
+        return original(**kwargs)
+
+    client.get_object = get_object
+    with pytest.raises(ConnectionError):
+        download_model(
+            client,
+            BUCKET,
+            KEY,
+            local_path,
+            part_size=1000,
+            max_concurrency=1,
+            retries=0,
+        )
+    assert client.ranges == ["bytes=0-999", "bytes=1000-1999", "bytes=2000-2999"]
+
+    client = FakeS3Client({(BUCKET, KEY): CONTENT})
+    md5 = download_model(client, BUCKET, KEY, local_path, part_size=1000)
+    assert md5 == CONTENT_MD5 == file_md5(local_path)
+    assert "bytes=0-999" not in client.ranges
+    assert len(client.ranges) == 8
+    assert _leftovers(local_path) == []
+
+
+def test_failure_cancels_pending_parts(local_path):
+    # the first part fails while the next one is in flight; the rest are cancelled
+    client = FakeS3Client({(BUCKET, KEY): CONTENT}, failures=1, delay=0.01)
+    with pytest.raises(ConnectionError):
+        download_model(
+            client,
+            BUCKET,
+            KEY,
+            local_path,
+            part_size=100,
+            max_concurrency=1,
+            retries=0,
+        )
+    assert len(client.ranges) <= 1
+
+
+def test_resume_changed_object(local_path):
+    client = FakeS3Client({(BUCKET, KEY): CONTENT}, failures=1)
+    with pytest.raises(ConnectionError):
+        download_model(
+            client,
+            BUCKET,
+            KEY,
+            local_path,
+            part_size=1000,
+            max_concurrency=1,
+            retries=0,
+        )
+
+    changed = CONTENT[::-1]
+    client = FakeS3Client({(BUCKET, KEY): changed})
+    md5 = download_model(client, BUCKET, KEY, local_path, part_size=1000)
+    assert md5 == hashlib.md5(changed).hexdigest()
+    assert len(client.ranges) == 11
+
+
+@pytest.mark.parametrize("etag, expected_md5", [("0" * 32, None), (None, "0" * 32)])
+def test_md5_mismatch(local_path, etag, expected_md5):
+    client = FakeS3Client({(BUCKET, KEY): CONTENT}, etag=etag)
+
+    with pytest.raises(ValueError):
+        download_model(
+            client, BUCKET, KEY, local_path, expected_md5=expected_md5, part_size=1000
+        )
+    assert not os.path.exists(local_path)
+    assert _leftovers(local_path) == []
+
+
+def test_multipart_etag(local_path):
+    client = FakeS3Client({(BUCKET, KEY): CONTENT}, etag="0" * 32 + "-2")
+
+    assert download_model(client, BUCKET, KEY, local_path) == CONTENT_MD5
+
+
+def test_concurrent_download(local_path):
+    client = FakeS3Client({(BUCKET, KEY): CONTENT}, delay=0.01)
+    md5s = []
+
+    def run():
+        md5s.append(download_model(client, BUCKET, KEY, local_path, part_size=1000))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert md5s == [CONTENT_MD5] * 4
+    assert client.heads == 1
+    assert len(client.ranges) == 11
+    assert os.path.exists(local_path + LOCK_SUFFIX)
+
+
+def test_invalid_arguments(client, local_path):
+    with pytest.raises(ValueError):
+        download_model(client, BUCKET, KEY, local_path, part_size=0)
+    with pytest.raises(ValueError):
+        download_model(client, BUCKET, KEY, local_path, max_concurrency=0)
+
+
+def test_from_s3(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(download, "s3_client", lambda: client)
+    monkeypatch.setattr(registry, "REGISTRY", ModelRegistry(loader=lambda path: path))
+    local_path = str(tmp_path / f"model.bin.{CONTENT_MD5}")
+
+    classifier = ModuleClassifier.from_s3(BUCKET, KEY, local_path)
+    assert classifier.model == os.path.realpath(local_path)
+    assert classifier.model_md5 == CONTENT_MD5
+
+    client.heads = 0
+    ModuleClassifier.from_s3(BUCKET, KEY, local_path)
+    assert client.heads == 0
+
+
+def test_from_s3_invalid_md5(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(download, "s3_client", lambda: client)
+    local_path = str(tmp_path / f"model.bin.{'0' * 32}")
+
+    with pytest.raises(ValueError):
+        ModuleClassifier.from_s3(BUCKET, KEY, local_path)
+    assert not os.path.exists(local_path)
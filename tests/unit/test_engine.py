@@ -0,0 +1,229 @@
+import random
+import struct
+
+import fasttext
+import numpy as np
+import pytest
+from src.module_classifier.classification import (
+    ModuleClassifier,
+    PredictionCache,
+    engine,
+)
+from src.module_classifier.classification.engine import NumpyModel
+
+RNG = random.Random(0)
+WORDS = [
+    "".join(RNG.choices("abcdefghijklmnopqrstuvwxyzéü", k=RNG.randint(2, 8)))
+    for _ in range(300)
+]
+TEXTS = [" ".join(RNG.choices(WORDS, k=RNG.randint(0, 15))) for _ in range(100)] + [
+    "",
+    "unknown wörds",
+    "tabs\tand\vspaces  ",
+    "__label__S1_M1 labels are skipped",
+]
+
+MODELS = {
+    "dense": ({"wordNgrams": 2, "minn": 2, "maxn": 5, "bucket": 20000}, None),
+    "no subwords": ({"wordNgrams": 1, "maxn": 0}, None),
+    "quantized": ({"wordNgrams": 2, "minn": 2, "maxn": 5, "bucket": 20000}, {}),
+    "pruned": (
+        {"wordNgrams": 3, "minn": 3, "maxn": 4, "bucket": 20000},
+        {"cutoff": 500, "qnorm": True, "dsub": 3, "retrain": True},
+    ),
+    "one-vs-all": ({"wordNgrams": 2, "loss": "ova"}, None),
+}
+
+
+def _train(path, n_labels: int, quantize=None, **kwargs) -> str:
+    rng = random.Random(1)
+    train = path.with_suffix(".txt")
+    with open(train, "w") as f:
+        for _ in range(2000):
+            label = rng.randrange(n_labels)
+            words = [
+                WORDS[(7 * label + rng.randrange(12)) % len(WORDS)] for _ in range(8)
+            ]
+            f.write(
+                f"__label__S{label + 1}_M1 {' '.join(words + rng.choices(WORDS, k=4))}\n"
+            )
+    model = fasttext.train_supervised(
+        str(train), **{"dim": 16, "epoch": 5, "thread": 1, "verbose": 0, **kwargs}
+    )
+    if quantize is not None:
+        model.quantize(str(train), thread=1, verbose=0, **quantize)
+    model.save_model(str(path))
+    return str(path)
+
+
+@pytest.fixture(scope="module", params=MODELS)
+def model_path(request, tmp_path_factory):
+    kwargs, quantize = MODELS[request.param]
+    suffix = ".bin" if quantize is None else ".ftz"
+    path = tmp_path_factory.mktemp("models") / f"model{suffix}"
+    return _train(path, 8, quantize, **kwargs)
+
+
+def _reference(model, text: str, k: int = -1, threshold: float = 0.0):
+    # fastText's C++ prediction, one text at a time
+    return {
+        label: prob
+        for prob, label in model.f.predict(text + "\n", k, threshold, "strict")
+    }
+
+
+def _assert_predictions(model, labels, probs, k: int, threshold: float = 0.0):
+    for text, text_labels, text_probs in zip(TEXTS, labels, probs):
+        expected = _reference(model, text, k, threshold)
+        # labels of equal probabilities may be ordered differently
+        assert sorted(text_probs, reverse=True) == pytest.approx(
+            sorted(expected.values(), reverse=True), abs=1e-6
+        )
+        every_label = _reference(model, text)
+        assert [every_label[label] for label in text_labels] == pytest.approx(
+            text_probs, abs=1e-6
+        )
+
+
+@pytest.mark.parametrize("k", [1, 3, -1])
+@pytest.mark.parametrize("threshold", [0.0, 0.2])
+def test_predict(model_path, k, threshold):
+    model = fasttext.load_model(model_path)
+    labels, probs = NumpyModel.load(model_path).predict(TEXTS, k, threshold)
+    assert len(labels) == len(probs) == len(TEXTS)
+    _assert_predictions(model, labels, probs, k, threshold)
+
+
+def test_quantized_output(tmp_path):
+    # product quantization of the output matrix needs at least 256 labels
+    path = _train(tmp_path / "model.ftz", 300, {"qout": True, "dsub": 2}, dim=4)
+    labels, probs = NumpyModel.load(path).predict(TEXTS, 5)
+    _assert_predictions(fasttext.load_model(path), labels, probs, 5)
+
+
+def test_pruned_to_words(tmp_path):
+    # a dictionary pruned to words only (pruneidx_size 0): n-grams are skipped
+    path = _train(tmp_path / "model.ftz", 8, {}, wordNgrams=2, minn=2, maxn=4)
+    with open(path, "r+b") as f:
+        f.seek(84)  # the pruneidx_size of the dictionary, -1 if not pruned
+        assert struct.unpack("q", f.read(8)) == (-1,)
+        f.seek(84)
+        f.write(struct.pack("q", 0))
+
+    numpy_model = NumpyModel.load(path)
+    assert numpy_model._pruned_ids is None
+    labels, probs = numpy_model.predict(TEXTS, 3)
+    _assert_predictions(fasttext.load_model(path), labels, probs, 3)
+
+
+def test_subword_rows(model_path):
+    model = fasttext.load_model(model_path)
+    numpy_model = NumpyModel.load(model_path)
+    words = WORDS[:20] + ["unknown", "wörds", "é", "</s>"]
+    ids, owners = numpy_model._subword_rows(words)
+    for i, word in enumerate(words):
+        assert sorted(ids[owners == i]) == sorted(model.get_subwords(word)[1])
+
+
+def test_predict_arrays(model_path):
+    numpy_model = NumpyModel.load(model_path)
+    counts, label_ids, probs = numpy_model.predict_arrays(TEXTS, 2)
+    labels, expected = numpy_model.predict(TEXTS, 2)
+
+    assert counts.tolist() == [len(text_labels) for text_labels in labels]
+    assert [numpy_model.labels[i] for i in label_ids] == sum(labels, [])
+    assert probs.tolist() == np.concatenate(expected).tolist()
+    assert numpy_model.get_labels() == fasttext.load_model(model_path).get_labels()
+
+
+def test_predict_one(model_path):
+    numpy_model = NumpyModel.load(model_path)
+    labels, probs = numpy_model.predict(TEXTS[0], 2)
+    expected_labels, expected_probs = numpy_model.predict(TEXTS[:1], 2)
+    assert labels == expected_labels[0]
+    assert probs.tolist() == expected_probs[0].tolist()
+
+
+def test_token_cache(model_path, monkeypatch):
+    expected = NumpyModel.load(model_path).predict(TEXTS, 3)
+    monkeypatch.setattr(engine, "ENGINE_TOKEN_CACHE_SIZE", 50)
+    monkeypatch.setattr(engine, "ENGINE_CHUNK_TOKENS", 10)
+    numpy_model = NumpyModel.load(model_path)
+
+    for _ in range(2):
+        labels, probs = numpy_model.predict(TEXTS, 3)
+        assert labels == expected[0]
+        assert np.concatenate(probs) == pytest.approx(np.concatenate(expected[1]))
+        assert len(numpy_model._token_index) <= 50
+
+
+@pytest.mark.parametrize("k", [0, -2])
+def test_invalid_k(model_path, k):
+    with pytest.raises(ValueError):
+        NumpyModel.load(model_path).predict(TEXTS, k)
+
+
+def test_newline(model_path):
+    with pytest.raises(ValueError, match="one line at a time"):
+        NumpyModel.load(model_path).predict(["two\nlines"])
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "model.bin"
+    path.write_bytes(b"\0" * 100)
+    with pytest.raises(ValueError, match="not a supported fastText model"):
+        NumpyModel.load(str(path))
+
+
+@pytest.fixture(scope="module")
+def path(tmp_path_factory):
+    return _train(tmp_path_factory.mktemp("models") / "model.bin", 4, minn=2, maxn=4)
+
+
+class TestClassifier:
+    def test_engine(self, path):
+        classifier = ModuleClassifier(path, "numpy")
+        assert classifier.engine == "numpy"
+        assert isinstance(classifier.model, NumpyModel)
+        assert ModuleClassifier(path).engine == "fasttext"
+
+    def test_predict_proba(self, path):
+        classifier = ModuleClassifier(path, "numpy")
+        model = fasttext.load_model(path)
+        texts = classifier._clean_texts(TEXTS)
+        for text, probs in zip(texts, classifier.predict_proba(texts)):
+            expected = _reference(model, text)
+            assert probs.tolist() == pytest.approx(
+                [expected.get(label, 0.0) for label in classifier.raw_labels], abs=1e-6
+            )
+
+    def test_set_engine(self, path):
+        classifier = ModuleClassifier(path)
+        classifier.set_cache(PredictionCache(), "model")
+        assert classifier.model.engine == "fasttext"
+        classifier.set_engine("numpy")
+
+        assert classifier.engine == "numpy"
+        assert classifier.cache is not None
+        assert classifier.model.model_id == "model"
+        assert classifier.model.engine == "numpy"
+        assert isinstance(classifier.model.model, NumpyModel)
+        classifier.set_cache(None)
+        assert isinstance(classifier.model, NumpyModel)
+        classifier.set_engine("fasttext")
+        assert classifier.engine == "fasttext"
+
+    def test_cache_per_engine(self, path):
+        classifier = ModuleClassifier(path)
+        cache = PredictionCache()
+        classifier.set_cache(cache, "model")
+        classifier.predict_texts(TEXTS[:10])
+        classifier.set_engine("numpy")
+        classifier.predict_texts(TEXTS[:10])
+
+        assert cache.stats.hits == 0
+        assert len(cache) == 2 * len(set(classifier._clean_texts(TEXTS[:10])))
+
+    def test_invalid_engine(self, path):
+        with pytest.raises(ValueError, match="Invalid prediction engine"):
+            ModuleClassifier(path, "torch")
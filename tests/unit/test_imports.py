@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+ROOT: Path = Path(__file__).parents[2]
+
+# Dependencies that are only imported by the code paths that need them; import
+# times are measured by benchmarks/bench_import_time.py
+DEFERRED_MODULES = ("boto3", "botocore", "s3transfer", "lime", "sklearn", "scipy")
+
+
+def _import(module: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["src.module_classifier.classification", "src.module_classifier.explanation"],
+)
+def test_deferred_imports(module):
+    imported: List[str] = _import(module).stdout.split()
+    assert not [name for name in imported if name.split(".")[0] in DEFERRED_MODULES]
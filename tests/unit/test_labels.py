@@ -0,0 +1,41 @@
+import pytest
+from src.module_classifier.classification.labels import LabelTable
+from src.module_classifier.preprocessing import Module
+
+
+class TestLabelTable:
+    raw_labels = ["__label__S1_M1", "__label__S6_M8", "__label__S3_M6"]
+
+    @pytest.fixture
+    def table(self):
+        return LabelTable(
+            self.raw_labels,
+            lambda label: Module.from_string(label, label_prefix="__label__"),
+        )
+
+    def test_init(self, table):
+        assert len(table) == 3
+        assert table.raw_labels == self.raw_labels
+        assert table.values == [
+            Module(section=1, module=1),
+            Module(section=6, module=8),
+            Module(section=3, module=6),
+        ]
+
+    def test_lookup(self, table):
+        for i, label in enumerate(self.raw_labels):
+            assert label in table
+            assert table.index(label) == i
+            assert table.index_of_value(table.value(label)) == i
+        assert table.value("__label__S6_M8") is Module(section=6, module=8)
+        assert "__label__S9_M9" not in table
+        with pytest.raises(KeyError):
+            table.index("__label__S9_M9")
+
+    def test_indices(self, table):
+        labels = ["__label__S3_M6", "__label__S1_M1", "__label__S3_M6"]
+        assert table.indices(labels).tolist() == [2, 0, 2]
+        assert table.indices(iter(labels), len(labels)).tolist() == [2, 0, 2]
+        assert table.indices([]).tolist() == []
+        with pytest.raises(KeyError):
+            table.indices(["__label__S9_M9"])
@@ -1,5 +1,8 @@
+import pickle
+
 import pytest
 from src.module_classifier.preprocessing import Module
+from src.module_classifier.preprocessing.models import normalize_module_label
 
 
 class TestModule:
@@ -64,7 +67,39 @@ class TestModule:
             (Module(section=1, module=1), "_", "S1_M1"),
             (Module(section=1, module=1), ".", "S1.M1"),
             (Module(section=10, module=10), ".", "S10.M10"),
+            (Module(section=1, module=2), None, "S1_M2"),
         ],
     )
     def test_to_string(self, input: Module, delimiter: str, expected: str):
         assert input.to_string(delimiter=delimiter) == expected
+
+    def test_interned(self):
+        assert Module(section=1, module=2) is Module(section=1, module=2)
+        assert Module(section=1, module=2) is Module.from_string("s1.m2")
+        assert Module(section=1, module=2) is not Module(section=2, module=1)
+        assert pickle.loads(pickle.dumps(Module(section=1, module=2))) is Module(
+            section=1, module=2
+        )
+        assert len({Module(section=1, module=2), Module.from_string("S1_M2")}) == 1
+
+    def test_immutable(self):
+        module = Module(section=1, module=2)
+        with pytest.raises(AttributeError):
+            module.section = 3
+        assert module.section == 1
+
+    @pytest.mark.parametrize("section", [0, -1, "x", None])
+    def test_invalid(self, section):
+        with pytest.raises(ValueError):
+            Module(section=section, module=1)
+
+    def test_repr(self):
+        assert repr(Module(section=6, module=8)) == "Module(section=6, module=8)"
+
+
+@pytest.mark.parametrize(
+    "input,delimiter,expected",
+    [("s1.m1", "_", "S1_M1"), ("S10_M2", ".", "S10.M2"), ("s1.m2", None, "S1_M2")],
+)
+def test_normalize_module_label(input, delimiter, expected):
+    assert normalize_module_label(input, delimiter) == expected
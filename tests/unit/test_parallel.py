@@ -0,0 +1,110 @@
+import os
+
+import pytest
+from src.module_classifier.classification import ModuleClassifier, ParallelClassifier
+from src.module_classifier.classification.binary_classifier import (
+    MainEditionClassifier,
+)
+
+from .test_binary_classifier import FakeModel as FakeBinaryModel
+from .test_bulk import FakeMainEditionModel
+from .test_classifier import FakeModel
+
+TEXTS = ["first", "second", "second", "first", "second", "first", "first"]
+
+
+class CrashingModel(FakeModel):
+    """Kills the worker process on the first prediction, while the flag file exists."""
+
+    def __init__(self, flag: str):
+        self.flag = flag
+
+    def predict(self, texts, k=1):
+        if os.path.exists(self.flag):
+            os.remove(self.flag)
+            os._exit(1)
+        return super().predict(texts, k)
+
+
+@pytest.fixture
+def classifier():
+    classifier = ModuleClassifier.__new__(ModuleClassifier)
+    classifier.model = FakeModel()
+    return classifier
+
+
+@pytest.mark.parametrize("processes,chunk_size", [(1, 2), (2, 2), (2, 3), (3, 100)])
+def test_predict_texts(classifier, processes, chunk_size):
+    with ParallelClassifier(classifier, processes, chunk_size) as parallel:
+        predictions = parallel.predict_texts(TEXTS, k=2)
+    assert [p.labels for p in predictions] == [
+        p.labels for p in classifier.predict_texts(TEXTS, k=2)
+    ]
+
+
+def test_predict_rows(classifier):
+    rows = [{"text": text} for text in TEXTS]
+    with ParallelClassifier(classifier, 2, 2) as parallel:
+        predictions = parallel.predict_rows(rows, columns=["text"])
+        with pytest.raises(ValueError, match="Missing input field"):
+            parallel.predict_rows(rows, columns=["title"])
+    assert [p.labels for p in predictions] == [
+        p.labels for p in classifier.predict_texts(TEXTS)
+    ]
+
+
+def test_predict_stream(classifier):
+    with ParallelClassifier(classifier, 2, 2) as parallel:
+        predictions = list(parallel.predict_stream(iter(TEXTS)))
+    assert [p.labels for p in predictions] == [
+        p.labels for p in classifier.predict_texts(TEXTS)
+    ]
+
+
+def test_binary():
+    classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+    classifier.model = FakeBinaryModel()
+    texts = [str(p / 10) for p in range(10)]
+    with ParallelClassifier(classifier, 2, 3) as parallel:
+        assert parallel.predict_texts(texts) == classifier.predict_texts(texts)
+
+
+def test_predict_binary_rows():
+    classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+    classifier.model = FakeMainEditionModel()
+    rows = [{"text": text} for text in TEXTS]
+    with ParallelClassifier(classifier, 2, 3) as parallel:
+        predicted, true_probs = parallel.predict_binary_rows(rows, ["text"])
+    expected_predicted, expected_probs = classifier.predict_binary_rows(rows, ["text"])
+    assert predicted.tolist() == expected_predicted.tolist()
+    assert true_probs.tolist() == expected_probs.tolist()
+
+
+def test_worker_died(classifier, tmp_path):
+    flag = tmp_path / "crash"
+    flag.touch()
+    classifier.model = CrashingModel(str(flag))
+    with ParallelClassifier(classifier, 2, 2) as parallel:
+        predictions = parallel.predict_texts(TEXTS)
+    assert len(predictions) == len(TEXTS)
+
+    flag.touch()
+    with ParallelClassifier(classifier, 2, 2, retries=0) as parallel:
+        with pytest.raises(Exception, match="terminated abruptly"):
+            parallel.predict_texts(TEXTS)
+
+
+def test_invalid(classifier):
+    with pytest.raises(ValueError):
+        ParallelClassifier(classifier, chunk_size=0)
+
+
+def test_close_cancels_pending(classifier):
+    parallel = ParallelClassifier(classifier, 1, 1)
+    stream = parallel.predict_stream(iter(TEXTS * 10))
+    next(stream)
+    futures = list(parallel._futures)
+    parallel.close()
+
+    assert parallel._executor is None and not parallel._futures
+    assert all(future.done() for future in futures)
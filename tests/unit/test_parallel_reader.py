@@ -0,0 +1,126 @@
+import csv
+import gzip
+import io
+import os
+import random
+import shutil
+from tempfile import TemporaryDirectory
+
+import pytest
+from src.module_classifier.preprocessing.archive_files import ArchiveFile
+from src.module_classifier.preprocessing.parallel_reader import (
+    ParallelCSVReader,
+    next_record_start,
+    read_csv_parallel,
+)
+from src.module_classifier.preprocessing.reader import CSVReader
+
+from ..conftest import TEST_ARCHIVE_FILE
+
+
+@pytest.fixture(scope="module")
+def csv_file():
+    """A CSV file with quoted line breaks, quotes and delimiters in its fields."""
+    rng = random.Random(0)
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "test.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "text", "label"])
+            for i in range(500):
+                text = "".join(
+                    rng.choice('ab "\n\r,') for _ in range(rng.randint(0, 30))
+                )
+                writer.writerow([i, text, f"S{i % 6 + 1}_M1"])
+                if i % 100 == 0:
+                    f.write("\n")  # empty line
+        yield path
+
+
+def expected_rows(path, columns=None):
+    with open(path, newline="") as f:
+        return [dict(record) for record in CSVReader(f, columns)]
+
+
+def _id(record):
+    return int(record["id"])
+
+
+class TestNextRecordStart:
+    @pytest.mark.parametrize(
+        "offset,in_quotes,expected",
+        [
+            (0, False, 6),
+            (2, False, 6),
+            (6, False, 19),
+            (9, True, 19),
+            (11, True, 19),
+            (19, False, 24),
+            (24, False, 24),
+        ],
+    )
+    def testnext_record_start(self, offset, in_quotes, expected):
+        content = b'a,b,c\n1,"x\n"",\n",3\n4,5,6'
+        f = io.BytesIO(content)
+        assert next_record_start(f, offset, in_quotes, b'"') == expected
+
+    def test_no_quotechar(self):
+        f = io.BytesIO(b'a,"b\nc\n')
+        assert next_record_start(f, 0, False, None) == 5
+
+
+class TestParallelCSVReader:
+    @pytest.mark.parametrize("chunk_size", [1, 10, 100, 1000])
+    @pytest.mark.parametrize("columns", [None, ["label", "id", "missing"]])
+    def test_ordered(self, csv_file, chunk_size, columns):
+        reader = ParallelCSVReader(
+            csv_file, columns, processes=2, chunk_size=chunk_size
+        )
+
+        assert reader.fieldnames == ["id", "text", "label"]
+        assert list(reader) == expected_rows(csv_file, columns)
+
+    def test_unordered(self, csv_file):
+        records = list(
+            read_csv_parallel(csv_file, processes=2, chunk_size=100, ordered=False)
+        )
+        assert sorted(records, key=_id) == expected_rows(csv_file)
+
+    def test_transform(self, csv_file):
+        records = list(
+            read_csv_parallel(csv_file, processes=2, chunk_size=100, transform=_id)
+        )
+        assert records == [_id(record) for record in expected_rows(csv_file)]
+
+    def test_sequential(self, csv_file):
+        with ParallelCSVReader(csv_file, processes=1, chunk_size=100) as reader:
+            assert reader._file is not None
+            assert list(reader) == expected_rows(csv_file)
+
+    def test_compressed(self, csv_file):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "test.csv.gz")
+            with open(csv_file, "rb") as f, gzip.open(path, "wb") as gz:
+                gz.write(f.read())
+
+            with ParallelCSVReader(path, processes=2, chunk_size=100) as reader:
+                assert list(reader) == expected_rows(csv_file)
+
+    @pytest.mark.parametrize(
+        "fmtparams",
+        [{"doublequote": False, "escapechar": "\\"}, {"encoding": "utf-16"}],
+    )
+    def test_unsupported_format(self, csv_file, fmtparams):
+        with pytest.raises(ValueError):
+            ParallelCSVReader(csv_file, processes=2, chunk_size=100, **fmtparams)
+
+    def test_archive_file(self, tmp_path):
+        path = str(tmp_path / "archive.csv")
+        shutil.copy(TEST_ARCHIVE_FILE, path)
+        archive_file = ArchiveFile(path, columns=["item_title"], processes=2)
+        with open(TEST_ARCHIVE_FILE, newline="") as f:
+            expected = ArchiveFile(f, columns=["item_title"])
+
+        assert archive_file.fieldnames == expected.fieldnames
+        assert list(archive_file) == list(expected)
+        assert archive_file.all_ids == expected.all_ids
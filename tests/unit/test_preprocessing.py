@@ -1,6 +1,22 @@
+import csv
+import os
+import sys
+from types import SimpleNamespace
+from typing import List
+
 import pytest
-from src.module_classifier.preprocessing import clean
+from src.module_classifier.preprocessing import (
+    Normalizer,
+    clean,
+    clean_many,
+    column_values,
+)
+from src.module_classifier.preprocessing.settings import (
+    MIN_TOKEN_LENGTH,
+    PUNCTUATION_CHARACTERS,
+)
 
+from ..conftest import TEST_ARCHIVE_FILE
 
 
 @pytest.mark.parametrize(
@@ -29,3 +45,135 @@ from src.module_classifier.preprocessing import clean
 def test_clean(text, expected):
     assert clean(text) == expected
 
+
+def _legacy_clean(s: str) -> str:
+    """The original multi-pass implementation of `clean()`."""
+    for c in PUNCTUATION_CHARACTERS:
+        s = s.replace(c, " ")
+    for n in "0123456789":
+        s = s.replace(n, "0")
+    return " ".join(
+        (
+            token
+            for token in s.strip().replace(os.linesep, " ").lower().split()
+            if len(token) >= MIN_TOKEN_LENGTH
+        )
+    )
+
+
+def _differential_corpus() -> List[str]:
+    corpus: List[str] = [
+        "",
+        " ",
+        "\n\r\t",
+        "a",
+        "abc",
+        "ab-c",
+        "It's 2021: 3.5% of U.S. GDP -- (approx.)",
+        "line one\nline two\r\nline three",
+        "İstanbul ÇAĞLAR straße ΣΊΣΥΦΟΣ",
+        "–‒—‘’”“ quotes “like” ‘these’ — dashes",
+        "１２３ full-width digits ٣٤٥ arabic-indic digits",
+        "tabs\tand non-breaking spaces",
+        PUNCTUATION_CHARACTERS,
+        "0123456789",
+        "emoji 🙂 text 🙂🙂🙂",
+    ]
+    with open(TEST_ARCHIVE_FILE, newline="") as f:
+        for row in csv.reader(f):
+            corpus.extend(row)
+    return corpus
+
+
+@pytest.mark.parametrize("text", _differential_corpus())
+def test_clean_differential(text):
+    assert clean(text) == _legacy_clean(text)
+
+
+class FakeNA:
+    """Like pandas.NA, whose comparisons cannot be converted to bool."""
+
+    def __ne__(self, other):
+        return self
+
+    def __bool__(self):
+        raise TypeError("boolean value of NA is ambiguous")
+
+
+def test_column_values(monkeypatch):
+    np = pytest.importorskip("numpy")
+    na = FakeNA()
+    monkeypatch.setitem(sys.modules, "pandas", SimpleNamespace(NA=na))
+
+    assert column_values(["a", None, float("nan"), na, b"caf\xc3\xa9", 1]) == [
+        "a",
+        "",
+        "",
+        "",
+        "café",
+        "1",
+    ]
+    assert column_values(np.array([b"one", b"", "é".encode()], dtype=object)) == [
+        "one",
+        "",
+        "é",
+    ]
+    assert column_values(np.array([b"two"])) == ["two"]
+    assert column_values(np.array(["x", np.datetime64("NaT")], dtype=object)) == [
+        "x",
+        "",
+    ]
+
+
+def test_clean_many():
+    corpus = _differential_corpus()
+    assert clean_many(corpus) == [_legacy_clean(text) for text in corpus]
+    assert clean_many(iter(corpus)) == clean_many(corpus)
+    assert clean_many([]) == []
+
+
+@pytest.mark.parametrize(
+    "punctuation,min_token_length,text,expected",
+    [
+        ("-", 1, "a-b c.d", "a b c.d"),
+        ("", 3, "spe-cial 42", "spe-cial"),
+        ("1", 1, "a1b2", "a b0"),
+    ],
+)
+def test_normalizer(punctuation, min_token_length, text, expected):
+    normalizer = Normalizer(punctuation, min_token_length)
+    assert normalizer.clean(text) == expected
+    assert normalizer.clean_many([text]) == [expected]
+
+
+@pytest.mark.parametrize("max_tokens", [0, 1, 2, 10, 100, 1000, 5000])
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "short text",
+        "Lorem ipsum, dolor sit amet. “Consectetur” adipiscing elit 2021 " * 500,
+        "ΣΊΣΥΦΟΣ ΟΔΥΣΣΕΥΣ İstanbul " * 1000,
+        "x" * 20000 + " tail tokens",
+    ],
+    ids=["empty", "short", "long", "long non-ascii", "long token"],
+)
+def test_clean_max_tokens(text, max_tokens):
+    expected = " ".join(_legacy_clean(text).split()[:max_tokens])
+    assert clean(text, max_tokens=max_tokens) == expected
+    assert clean_many([text], max_tokens=max_tokens) == [expected]
+
+
+@pytest.mark.parametrize(
+    "text,max_tokens,max_chars,expected",
+    [
+        ("random tokens", None, 0, ""),
+        ("random tokens", None, 10, "random tok"),
+        ("random tokens", None, 9, "random"),
+        ("random tokens", None, 100, "random tokens"),
+        ("one two three four five", 2, 13, "one two"),
+        ("one two three four five", 1, 100, "one"),
+    ],
+)
+def test_clean_max_chars(text, max_tokens, max_chars, expected):
+    assert clean(text, max_tokens=max_tokens, max_chars=max_chars) == expected
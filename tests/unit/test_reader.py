@@ -0,0 +1,69 @@
+import csv
+import io
+
+import pytest
+from src.module_classifier.preprocessing.reader import CSVReader, Record, read_csv
+
+from ..conftest import TEST_ARCHIVE_FILE
+
+CSV_CONTENT = 'a,b,c\n1,"two\nlines",3\n\n4,5\n6,7,8,9\n'
+
+
+class TestRecord:
+    def test_mapping(self):
+        record = Record({"a": 0, "b": 1}, ["1", "2"])
+
+        assert record["b"] == "2"
+        assert "a" in record and "c" not in record
+        assert list(record) == ["a", "b"]
+        assert len(record) == 2
+        assert record.get("c", "default") == "default"
+        assert record == {"a": "1", "b": "2"}
+        assert {**record, "c": "3"} == {"a": "1", "b": "2", "c": "3"}
+
+    def test_setitem(self):
+        record = Record({"a": 0}, ["1"])
+        record["a"] = "2"
+        assert record["a"] == "2"
+
+        with pytest.raises(KeyError):
+            record["b"] = "3"
+
+
+class TestCSVReader:
+    @pytest.mark.parametrize(
+        "columns,expected_columns",
+        [
+            (None, ["a", "b", "c"]),
+            (["c", "a"], ["c", "a"]),
+            (["a", "missing", "a"], ["a"]),
+            ([], []),
+        ],
+    )
+    def test_columns(self, columns, expected_columns):
+        reader = CSVReader(io.StringIO(CSV_CONTENT, newline=""), columns)
+
+        assert reader.fieldnames == ["a", "b", "c"]
+        assert reader.columns == expected_columns
+
+        expected = [
+            {column: row.get(column) for column in expected_columns}
+            for row in csv.DictReader(io.StringIO(CSV_CONTENT, newline=""))
+        ]
+        assert [dict(record) for record in reader] == expected
+
+    def test_archive_file(self):
+        columns = ["id", "item_title", "module_id_for_all"]
+        with open(TEST_ARCHIVE_FILE, newline="") as f:
+            records = list(read_csv(f, columns))
+        with open(TEST_ARCHIVE_FILE, newline="") as f:
+            expected = [
+                {column: row[column] for column in columns}
+                for row in csv.DictReader(f)
+            ]
+        assert records == expected
+
+    def test_empty(self):
+        reader = CSVReader(io.StringIO(""), ["a"])
+        assert reader.fieldnames == []
+        assert list(reader) == []
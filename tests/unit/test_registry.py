@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+
+import pytest
+from src.module_classifier.classification import ModuleClassifier, registry
+from src.module_classifier.classification.checksums import file_md5
+from src.module_classifier.classification.registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, path):
+        self.path = path
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def model_registry(loads):
+    def load(path):
+        loads.append(path)
+        return FakeModel(path)
+
+    return ModelRegistry(loader=load)
+
+
+def _model_file(tmp_path, name: str, size: int = 10) -> str:
+    path = tmp_path / name
+    path.write_bytes(name.encode().ljust(size, b"\0"))
+    return str(path)
+
+
+def test_get(model_registry, loads, tmp_path):
+    path = _model_file(tmp_path, "a.bin")
+    model = model_registry.get(path)
+
+    assert model_registry.get(path) is model
+    assert model_registry.get(str(tmp_path / "." / "a.bin")) is model
+    assert loads == [os.path.realpath(path)]
+
+    (info,) = model_registry.models()
+    assert info.signature == (10, os.stat(path).st_mtime_ns, os.stat(path).st_ino)
+    assert info.size == 10
+    assert info.uses == 3
+    assert info.last_used >= info.loaded_at
+
+
+def test_changed_file(model_registry, loads, tmp_path):
+    path = _model_file(tmp_path, "a.bin")
+    model = model_registry.get(path)
+    time.sleep(0.01)
+    with open(path, "ab") as f:
+        f.write(b"changed")
+
+    assert model_registry.get(path) is not model
+    assert len(loads) == 2
+    # the previous version is dropped
+    assert len(model_registry) == 1
+    assert model_registry.memory_used == 17
+
+
+def test_no_hashing(model_registry, mocker, tmp_path):
+    verified_md5 = mocker.spy(registry, "verified_md5")
+    path = _model_file(tmp_path, "a.bin")
+    model_registry.get(path)
+    model_registry.get(path)
+    verified_md5.assert_not_called()
+
+    # only computed when asked for, and once per version of the file
+    assert model_registry.md5(path) == file_md5(path)
+    assert model_registry.md5(path) == file_md5(path)
+    assert verified_md5.call_count == 1
+
+
+def test_missing(model_registry):
+    with pytest.raises(ValueError):
+        model_registry.get("/does/not/exist")
+
+
+def test_evict_lru(loads, tmp_path):
+    model_registry = ModelRegistry(
+        memory_budget=25, loader=lambda path: loads.append(path) or FakeModel(path)
+    )
+    a, b, c = (_model_file(tmp_path, name) for name in ("a.bin", "b.bin", "c.bin"))
+    model_registry.get(a)
+    model_registry.get(b)
+    model_registry.get(a)  # 'b' is now least recently used
+    model_registry.get(c)
+
+    assert [os.path.basename(info.path) for info in model_registry.models()] == [
+        "a.bin",
+        "c.bin",
+    ]
+    assert model_registry.memory_used == 20
+
+    # a model larger than the budget is kept on its own
+    big = _model_file(tmp_path, "big.bin", size=100)
+    model_registry.get(big)
+    assert [os.path.basename(info.path) for info in model_registry.models()] == [
+        "big.bin"
+    ]
+
+
+def test_evict(model_registry, tmp_path):
+    path = _model_file(tmp_path, "a.bin")
+    model_registry.get(path)
+
+    assert model_registry.evict(path)
+    assert not model_registry.evict(path)
+    assert len(model_registry) == 0
+
+
+def test_concurrent_load(tmp_path):
+    loads = []
+    started = threading.Event()
+
+    def slow_load(path):
+        loads.append(path)
+        started.set()
+        time.sleep(0.05)
+        return FakeModel(path)
+
+    model_registry = ModelRegistry(loader=slow_load)
+    path = _model_file(tmp_path, "a.bin")
+    models = []
+    threads = [
+        threading.Thread(target=lambda: models.append(model_registry.get(path)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(model is models[0] for model in models)
+    assert not model_registry._load_locks
+
+
+def test_failed_load(tmp_path):
+    def fail(path):
+        raise ValueError("not a model")
+
+    model_registry = ModelRegistry(loader=fail)
+    with pytest.raises(ValueError):
+        model_registry.get(_model_file(tmp_path, "a.bin"))
+    assert len(model_registry) == 0
+    assert not model_registry._load_locks
+
+
+def test_classifiers_share_model(model_registry, monkeypatch, tmp_path):
+    monkeypatch.setattr(registry, "REGISTRY", model_registry)
+    path = _model_file(tmp_path, "a.bin")
+
+    first, second = ModuleClassifier(path), ModuleClassifier(path)
+    assert first.model is second.model
+    assert first.model_md5 == file_md5(path)
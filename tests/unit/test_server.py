@@ -0,0 +1,348 @@
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import time
+from http import HTTPStatus
+
+import pytest
+from src.module_classifier.classification import ModuleClassifier
+from src.module_classifier.classification.binary_classifier import (
+    MainEditionClassifier,
+)
+from src.module_classifier.serving import InferenceServer, PredictionService
+from src.module_classifier.serving.metrics import Metrics
+from src.module_classifier.serving.server import RequestError
+
+from .test_bulk import FakeMainEditionModel
+from .test_classifier import FakeModel
+
+
+class FakeServedModel(FakeModel):
+    """Also predicts the empty text used to warm up the server."""
+
+    scores = {**FakeModel.scores, "": [0.4, 0.3, 0.3]}
+
+
+class FakeServedMainEditionModel(FakeMainEditionModel):
+    true_probs = {**FakeMainEditionModel.true_probs, "": "0.5"}
+
+
+@pytest.fixture
+def module_classifier():
+    classifier = ModuleClassifier.__new__(ModuleClassifier)
+    classifier.model = FakeServedModel()
+    return classifier
+
+
+@pytest.fixture
+def main_edition_classifier():
+    classifier = MainEditionClassifier.__new__(MainEditionClassifier)
+    classifier.model = FakeServedMainEditionModel()
+    return classifier
+
+
+@pytest.fixture
+def service(module_classifier, main_edition_classifier):
+    return PredictionService(module_classifier, main_edition_classifier, 3)
+
+
+class TestPredictionService:
+    def test_module(self, service):
+        response, count = service.predict(
+            "/predict/module", {"texts": ["first", "second"], "k": 2}
+        )
+
+        assert count == 2
+        assert response == {
+            "predictions": [
+                [
+                    {"module": "S1_M1", "prob": pytest.approx(0.7)},
+                    {"module": "S6_M8", "prob": pytest.approx(0.2)},
+                ],
+                [
+                    {"module": "S3_M6", "prob": pytest.approx(0.6)},
+                    {"module": "S6_M8", "prob": pytest.approx(0.3)},
+                ],
+            ]
+        }
+
+    def test_main_edition(self, service):
+        response, count = service.predict(
+            "/predict/main-edition", {"texts": ["first", "second"]}
+        )
+
+        assert count == 2
+        assert response == {
+            "predictions": [
+                {"main_edition": True, "prob": pytest.approx(0.9)},
+                {"main_edition": False, "prob": pytest.approx(0.2)},
+            ]
+        }
+
+    def test_rows(self, service):
+        response, count = service.predict(
+            "/predict/rows",
+            {
+                "rows": [{"text": "first", "title": "second"}],
+                "text_fields": ["text"],
+                "main_edition_text_fields": ["title"],
+            },
+        )
+
+        assert count == 1
+        assert response == {
+            "predictions": [
+                {
+                    "modules": [{"module": "S1_M1", "prob": pytest.approx(0.7)}],
+                    "main_edition": False,
+                    "main_edition_prob": pytest.approx(0.2),
+                }
+            ]
+        }
+
+    def test_rows_single_classifier(self, module_classifier):
+        service = PredictionService(module_classifier)
+        response, _ = service.predict(
+            "/predict/rows", {"rows": [{"text": "second"}], "text_fields": ["text"]}
+        )
+
+        assert response == {
+            "predictions": [
+                {"modules": [{"module": "S3_M6", "prob": pytest.approx(0.6)}]}
+            ]
+        }
+
+    def test_rows_main_edition_classifier(self, main_edition_classifier):
+        service = PredictionService(main_edition_classifier=main_edition_classifier)
+        response, _ = service.predict(
+            "/predict/rows",
+            {
+                "rows": [{"title": "first"}, {"title": "second"}],
+                "main_edition_text_fields": ["title"],
+            },
+        )
+
+        assert response == {
+            "predictions": [
+                {"main_edition": True, "main_edition_prob": pytest.approx(0.9)},
+                {"main_edition": False, "main_edition_prob": pytest.approx(0.2)},
+            ]
+        }
+
+    @pytest.mark.parametrize(
+        "endpoint,body,status",
+        [
+            ("/predict/module", [], HTTPStatus.BAD_REQUEST),
+            ("/predict/module", {}, HTTPStatus.BAD_REQUEST),
+            ("/predict/module", {"texts": []}, HTTPStatus.BAD_REQUEST),
+            ("/predict/module", {"texts": "first"}, HTTPStatus.BAD_REQUEST),
+            ("/predict/module", {"texts": [1]}, HTTPStatus.BAD_REQUEST),
+            ("/predict/module", {"texts": ["first"], "k": 0}, HTTPStatus.BAD_REQUEST),
+            (
+                "/predict/module",
+                {"texts": ["first"], "k": True},
+                HTTPStatus.BAD_REQUEST,
+            ),
+            (
+                "/predict/module",
+                {"texts": ["first"] * 4},
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            ),
+            ("/predict/rows", {"rows": ["first"]}, HTTPStatus.BAD_REQUEST),
+            (
+                "/predict/rows",
+                {"rows": [{"text": "first"}], "text_fields": "text"},
+                HTTPStatus.BAD_REQUEST,
+            ),
+            (
+                "/predict/rows",
+                {"rows": [{"text": 1}], "text_fields": ["text"]},
+                HTTPStatus.BAD_REQUEST,
+            ),
+            (
+                "/predict/rows",
+                {
+                    "rows": [{"text": "first", "title": None}],
+                    "text_fields": ["text"],
+                    "main_edition_text_fields": ["title"],
+                },
+                HTTPStatus.BAD_REQUEST,
+            ),
+            ("/predict/other", {"texts": ["first"]}, HTTPStatus.NOT_FOUND),
+        ],
+    )
+    def test_invalid(self, service, endpoint, body, status):
+        with pytest.raises(RequestError) as e:
+            service.predict(endpoint, body)
+        assert e.value.status == status
+
+    def test_missing_field(self, service):
+        with pytest.raises(ValueError):
+            service.predict("/predict/rows", {"rows": [{"text": "first"}]})
+
+    def test_classifier_not_loaded(self, module_classifier):
+        with pytest.raises(RequestError) as e:
+            PredictionService(module_classifier).predict(
+                "/predict/main-edition", {"texts": ["first"]}
+            )
+        assert e.value.status == HTTPStatus.NOT_FOUND
+
+    def test_warm_up(self, service, mocker):
+        predict = mocker.spy(service.module_classifier.model, "predict")
+        service.warm_up()
+        predict.assert_called_once_with([""], 1)
+
+    def test_no_classifier(self):
+        with pytest.raises(ValueError):
+            PredictionService()
+
+
+def test_metrics():
+    metrics = Metrics(["/a", "/b"], workers=2, buckets=[0.01, 0.1])
+    metrics.observe("/a", 0.005, items=3)
+    metrics.worker = 1
+    metrics.observe("/a", 0.05, items=2)
+    metrics.observe("/b", 1.0, error=True)
+
+    assert metrics.requests("/a") == 2
+    lines = metrics.render(prefix="test").splitlines()
+    assert 'test_requests_total{endpoint="/a"} 2' in lines
+    assert 'test_errors_total{endpoint="/b"} 1' in lines
+    assert 'test_predictions_total{endpoint="/a"} 5' in lines
+    assert 'test_request_duration_seconds_bucket{endpoint="/a",le="0.01"} 1' in lines
+    assert 'test_request_duration_seconds_bucket{endpoint="/a",le="0.1"} 2' in lines
+    assert 'test_request_duration_seconds_bucket{endpoint="/b",le="+Inf"} 1' in lines
+    assert 'test_request_duration_seconds_sum{endpoint="/a"} 0.055' in lines
+    assert 'test_worker_requests_total{worker="1"} 2' in lines
+
+
+def _request(address, method, path, body=None):
+    connection = http.client.HTTPConnection(*address, timeout=10)
+    try:
+        connection.request(
+            method, path, body=None if body is None else json.dumps(body).encode()
+        )
+        response = connection.getresponse()
+        data = response.read()
+        if response.getheader("Content-Type") == "application/json":
+            data = json.loads(data)
+        return response.status, data
+    finally:
+        connection.close()
+
+
+def _wait_until_ready(address, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status, body = _request(address, "GET", "/health/ready")
+            if status == HTTPStatus.OK:
+                return body
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def server(module_classifier, main_edition_classifier):
+    server = InferenceServer(
+        module_classifier, main_edition_classifier, port=0, workers=2
+    )
+    address = server.address
+    process = multiprocessing.get_context("fork").Process(target=server.serve_forever)
+    process.start()
+    server.socket.close()
+    _wait_until_ready(address)
+    yield address, process
+
+    process.terminate()
+    process.join(10)
+    assert process.exitcode == 0
+
+
+class TestInferenceServer:
+    def test_predict(self, server):
+        address, _ = server
+
+        status, body = _request(
+            address, "POST", "/predict/module", {"texts": ["first"], "k": 1}
+        )
+        assert status == HTTPStatus.OK
+        assert body["predictions"][0][0]["module"] == "S1_M1"
+
+        status, body = _request(
+            address, "POST", "/predict/main-edition", {"texts": ["first"]}
+        )
+        assert status == HTTPStatus.OK
+        assert body["predictions"][0]["main_edition"] is True
+
+    def test_keep_alive(self, server):
+        address, _ = server
+        connection = http.client.HTTPConnection(*address, timeout=10)
+        for text in ["first", "second", "first"]:
+            connection.request(
+                "POST", "/predict/module", json.dumps({"texts": [text]}).encode()
+            )
+            response = connection.getresponse()
+            assert response.status == HTTPStatus.OK
+            response.read()
+        connection.close()
+
+    @pytest.mark.parametrize(
+        "method,path,body,status",
+        [
+            ("POST", "/predict/module", None, HTTPStatus.BAD_REQUEST),
+            ("POST", "/predict/module", {"texts": []}, HTTPStatus.BAD_REQUEST),
+            (
+                "POST",
+                "/predict/rows",
+                {"rows": [{"item_title": 1.5}]},
+                HTTPStatus.BAD_REQUEST,
+            ),
+            ("GET", "/predict/module", None, HTTPStatus.METHOD_NOT_ALLOWED),
+            ("POST", "/metrics", {}, HTTPStatus.METHOD_NOT_ALLOWED),
+            ("GET", "/unknown", None, HTTPStatus.NOT_FOUND),
+        ],
+    )
+    def test_errors(self, server, method, path, body, status):
+        address, _ = server
+        assert _request(address, method, path, body)[0] == status
+
+    def test_health(self, server):
+        address, _ = server
+        assert _request(address, "GET", "/health/live") == (
+            HTTPStatus.OK,
+            {"status": "alive"},
+        )
+        status, body = _request(address, "GET", "/health/ready")
+        assert status == HTTPStatus.OK
+        assert body["worker"] in (0, 1)
+
+    def test_metrics(self, server):
+        address, _ = server
+        for _ in range(4):
+            _request(address, "POST", "/predict/module", {"texts": ["first", "second"]})
+        _request(address, "POST", "/predict/rows", {"rows": []})
+
+        status, text = _request(address, "GET", "/metrics")
+        lines = text.decode().splitlines()
+        assert status == HTTPStatus.OK
+        assert 'module_classifier_requests_total{endpoint="/predict/module"} 4' in lines
+        assert (
+            'module_classifier_predictions_total{endpoint="/predict/module"} 8' in lines
+        )
+        assert 'module_classifier_errors_total{endpoint="/predict/rows"} 1' in lines
+
+    def test_restart_worker(self, server):
+        address, _ = server
+        pid = _wait_until_ready(address)["pid"]
+        os.kill(pid, signal.SIGKILL)
+
+        deadline = time.monotonic() + 10
+        pids = set()
+        while len(pids - {pid}) < 2 and time.monotonic() < deadline:
+            pids.add(_wait_until_ready(address)["pid"])
+        assert len(pids - {pid}) == 2